@@ -0,0 +1,73 @@
+"""Benchmarks repeated probes with and without the result cache
+
+Run from the repository root:
+    python -m benchmarks.bench_cache
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import timeit
+
+from sqlpt.sql import Query, Table, result_cache
+
+NUMBER = 20
+ROW_CT = 200_000
+
+
+def build_db(directory):
+    """Copies tests/college.db and scales student_section up to ROW_CT rows"""
+    db_path = os.path.join(directory, 'college.db')
+    shutil.copyfile('tests/college.db', db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('delete from student_section')
+        conn.executemany(
+            'insert into student_section values (?, ?, ?, ?)',
+            ((i, i, i % 2 + 1, i % 4 + 1) for i in range(1, ROW_CT + 1)))
+
+    db_conn_str = f'sqlite:///{db_path}'
+
+    return db_conn_str
+
+
+def mean_us(func):
+    """Returns the mean wall time of func in microseconds"""
+    seconds = timeit.timeit(func, number=NUMBER) / NUMBER
+
+    return seconds * 1_000_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db_conn_str = build_db(directory)
+
+        query = Query('select * from student_section where term_id = :term_id',
+                      db_conn_str=db_conn_str)
+        table = Table(name='student_section', db_conn_str=db_conn_str)
+        probes = {
+            'query.count()': lambda: query.count(term_id=1),
+            'query.counts()': Query('select * from student_section where term_id = 1',
+                                    db_conn_str=db_conn_str).counts,
+            'table.rows_unique()': lambda: table.rows_unique(['student_id']),
+        }
+
+        print(f'{ROW_CT} rows in student_section')
+        print(f'{"probe":<22} {"uncached us":>12} {"cached us":>12}')
+
+        for name, probe in probes.items():
+            result_cache.enabled = False
+            uncached = mean_us(probe)
+
+            result_cache.enabled = True
+            probe()
+            cached = mean_us(probe)
+
+            print(f'{name:<22} {uncached:>12.1f} {cached:>12.1f}')
+
+        print(result_cache.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Benchmarks rows_exist and rows_unique early exit on a scaled-up copy of college.db
+
+Run from the repository root:
+    python -m benchmarks.bench_exists
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import timeit
+
+from sqlpt.sql import Query, Table
+
+REPEAT = 3
+ROW_CT = 1_000_000
+
+
+def build_db(directory):
+    """Copies tests/college.db and scales student_section up to ROW_CT rows"""
+    db_path = os.path.join(directory, 'college.db')
+    shutil.copyfile('tests/college.db', db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('delete from student_section')
+        conn.executemany(
+            'insert into student_section values (?, ?, ?, ?)',
+            ((i, i, i % 2 + 1, i % 4 + 1) for i in range(1, ROW_CT + 1)))
+        conn.execute('create index student_section_term on student_section (term_id)')
+
+    db_conn_str = f'sqlite:///{db_path}'
+
+    return db_conn_str
+
+
+def best_ms(func):
+    """Returns the best wall time of func in milliseconds"""
+    seconds = min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+    return seconds * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db_conn_str = build_db(directory)
+
+        query = Query('select * from student_section where section_id = 1',
+                      db_conn_str=db_conn_str)
+        table = Table(name='student_section', db_conn_str=db_conn_str)
+        duplicates = Query('select term_id, count(*) from student_section '
+                           'group by term_id having count(*) > 1', db_conn_str=db_conn_str)
+
+        print(f'{ROW_CT} rows in student_section')
+        print(f'{"probe":<42} {"ms":>9}')
+        print(f'{"rows_exist: materialized count":<42} '
+              f'{best_ms(lambda: query.count(materialize=True) != 0):>9.2f}')
+        print(f'{"rows_exist: count(*)":<42} {best_ms(lambda: query.count() != 0):>9.2f}')
+        print(f'{"rows_exist: exists":<42} {best_ms(query.rows_exist):>9.2f}')
+        print(f'{"rows_unique(term_id): count(*)":<42} '
+              f'{best_ms(lambda: duplicates.count() == 0):>9.2f}')
+        print(f'{"rows_unique(term_id): exists":<42} '
+              f'{best_ms(lambda: table.rows_unique(["term_id"])):>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Benchmarks Query construction time and memory for wide select lists
+
+Run from the repository root:
+    python -m benchmarks.bench_fields
+"""
+
+import timeit
+import tracemalloc
+
+from sqlpt.sql import Query
+
+REPEAT = 5
+
+
+def build_sql(field_ct):
+    """Returns a select statement with field_ct plain and function fields"""
+    fields = []
+
+    for i in range(field_ct):
+        field = f'count(col_{i})' if i % 10 == 0 else f'col_{i} alias_{i}'
+        fields.append(field)
+
+    sql_str = f'select {", ".join(fields)} from tbl where col_0 = 1'
+
+    return sql_str
+
+
+def measure(sql_str):
+    """Returns the best construction time and the peak traced memory of one Query"""
+    seconds = min(timeit.repeat(lambda: Query(sql_str), number=1, repeat=REPEAT))
+
+    tracemalloc.start()
+    query = Query(sql_str)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del query
+
+    return seconds, peak_bytes
+
+
+def main():
+    print(f'{"fields":>7} {"ms":>9} {"peak KiB":>10}')
+
+    for field_ct in (10, 100, 1000):
+        seconds, peak_bytes = measure(build_sql(field_ct))
+
+        print(f'{field_ct:>7} {seconds * 1000:>9.2f} {peak_bytes / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmarks Query parsing cost against statement length, clause count and field count,
+and eager against lazy construction
+
+Run from the repository root:
+    python -m benchmarks.bench_parse
+"""
+
+import timeit
+
+import sqlparse
+
+from sqlpt.sql import Query
+
+REPEAT = 5
+
+
+def build_sql(field_ct, join_ct, comparison_ct):
+    """Returns a select statement with the given numbers of fields, joins and filters"""
+    fields = ', '.join(f't0.col_{i} alias_{i}' for i in range(field_ct))
+    joins = ' '.join(f'join t{i} on t{i - 1}.id = t{i}.parent_id'
+                     for i in range(1, join_ct + 1))
+    comparisons = ' and '.join(f't0.col_{i} = {i}' for i in range(comparison_ct))
+    where = f' where {comparisons}' if comparisons else ''
+
+    sql_str = f'select {fields} from t0 {joins}{where}'
+
+    return sql_str
+
+
+def measure(sql_str):
+    """Returns the best construction time and the characters handed to sqlparse.parse"""
+    parsed_chars = []
+    parse = sqlparse.parse
+
+    def counting_parse(sql, *args, **kwargs):
+        parsed_chars.append(len(sql))
+        return parse(sql, *args, **kwargs)
+
+    sqlparse.parse = counting_parse
+
+    try:
+        Query(sql_str)
+    finally:
+        sqlparse.parse = parse
+
+    seconds = min(timeit.repeat(lambda: Query(sql_str), number=1, repeat=REPEAT))
+
+    return seconds, sum(parsed_chars)
+
+
+def report(title, shapes):
+    """Prints one benchmark table"""
+    print(title)
+    print(f'{"fields":>7} {"joins":>6} {"filters":>8} {"chars":>8} '
+          f'{"ms":>9} {"us/char":>8} {"parsed/char":>12}')
+
+    for field_ct, join_ct, comparison_ct in shapes:
+        sql_str = build_sql(field_ct, join_ct, comparison_ct)
+        seconds, parsed_chars = measure(sql_str)
+
+        print(f'{field_ct:>7} {join_ct:>6} {comparison_ct:>8} {len(sql_str):>8} '
+              f'{seconds * 1000:>9.2f} {seconds * 1e6 / len(sql_str):>8.2f} '
+              f'{parsed_chars / len(sql_str):>12.2f}')
+
+    print()
+
+
+def report_lazy(field_ct):
+    """Prints eager vs lazy construction time for a wide report query"""
+    sql_str = build_sql(field_ct, 2, 2)
+
+    eager_seconds = min(timeit.repeat(lambda: Query(sql_str), number=1, repeat=REPEAT))
+    lazy_seconds = min(timeit.repeat(
+        lambda: Query(sql_str, lazy=True), number=1, repeat=REPEAT))
+    probe_seconds = min(timeit.repeat(
+        lambda: Query(sql_str, lazy=True).from_clause, number=1, repeat=REPEAT))
+
+    print(f'Lazy construction ({field_ct} fields)')
+    print(f'{"eager ms":>10} {"lazy ms":>10} {"lazy + from_clause ms":>22}')
+    print(f'{eager_seconds * 1000:>10.2f} {lazy_seconds * 1000:>10.2f} '
+          f'{probe_seconds * 1000:>22.2f}')
+    print()
+
+
+def main():
+    report('Growing select list', [(n, 2, 2) for n in (10, 100, 1000)])
+    report('Growing join count', [(10, n, 2) for n in (1, 10, 50)])
+    report('Growing filter count', [(10, 2, n) for n in (1, 10, 100)])
+    report_lazy(300)
+
+
+if __name__ == '__main__':
+    main()
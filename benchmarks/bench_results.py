@@ -0,0 +1,99 @@
+"""Benchmarks Query.run result formats on a wide, many-row result
+
+Run from the repository root:
+    python -m benchmarks.bench_results
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from sqlpt.sql import Query
+
+ROW_CT = 100_000
+COLUMN_CT = 20
+FORMATS = ('dict', 'compact', 'columnar')
+
+
+def build_db(directory):
+    """Creates a sqlite database with one ROW_CT x COLUMN_CT table of small integers
+
+    Small integers are interned by Python, so the memory figures show the per-row
+    container overhead of each format rather than the values themselves.
+    """
+    db_path = os.path.join(directory, 'wide.db')
+    column_names = [f'col_{i}' for i in range(COLUMN_CT)]
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f'create table wide ({", ".join(column_names)})')
+        conn.executemany(
+            f'insert into wide values ({", ".join("?" * COLUMN_CT)})',
+            (tuple((i + j) % 100 for j in range(COLUMN_CT)) for i in range(ROW_CT)))
+
+    db_conn_str = f'sqlite:///{db_path}'
+
+    return db_conn_str
+
+
+def measure(query, result_format):
+    """Returns the run time and the memory held by the result for one format"""
+    start = time.perf_counter()
+    query.run(result_format=result_format)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = query.run(result_format=result_format)
+    held_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del result
+
+    return seconds, held_bytes
+
+
+def measure_mean(query):
+    """Returns the time to average one column through row dicts and through a
+    columnar result, or None for the columnar figure if numpy isn't installed"""
+    rows = query.run()
+    start = time.perf_counter()
+    sum(row['col_1'] for row in rows) / len(rows)
+    dict_seconds = time.perf_counter() - start
+
+    try:
+        numpy_columns = query.run(result_format='numpy')
+    except Exception:
+        return dict_seconds, None
+
+    start = time.perf_counter()
+    numpy_columns['col_1'].mean()
+    numpy_seconds = time.perf_counter() - start
+
+    return dict_seconds, numpy_seconds
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        query = Query('select * from wide', db_conn_str=build_db(directory))
+        query.run(result_format='compact')
+
+        print(f'{ROW_CT} rows x {COLUMN_CT} columns')
+        print(f'{"format":<10} {"ms":>9} {"held MiB":>10}')
+
+        for result_format in FORMATS:
+            seconds, held_bytes = measure(query, result_format)
+
+            print(f'{result_format:<10} {seconds * 1000:>9.1f} {held_bytes / 2 ** 20:>10.1f}')
+
+        dict_seconds, numpy_seconds = measure_mean(query)
+
+        print()
+        print(f'mean of one column, dict rows: {dict_seconds * 1000:.2f} ms')
+
+        if numpy_seconds is not None:
+            print(f'mean of one column, numpy:     {numpy_seconds * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
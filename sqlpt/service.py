@@ -1,13 +1,35 @@
 """ docstring tbd """
 
+import asyncio
+import functools
+import json
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import sqlparse
 import ttg
+from sqlparse import lexer
+from sqlparse import tokens as ttypes
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlparse.sql import Comparison as SQLParseComparison
 from sqlparse.sql import Function, Identifier, IdentifierList, Token
 
 
+CLAUSE_KEYWORDS = ('select', 'from', 'where', 'group by', 'having', 'order by', 'limit')
+
+# Keywords that complete a value and keywords that need a value after them; neither
+# can be an alias
+VALUE_KEYWORDS = ('end', 'null', 'true', 'false')
+CONNECTING_KEYWORDS = (
+    'select', 'distinct', 'all', 'and', 'or', 'not', 'case', 'when', 'then', 'else', 'is',
+    'in', 'like', 'between')
+
+
 # FUTURE: See if these are needed and move them to class or static methods
 def remove_whitespace(item_list, addl_chars=()):
     """ docstring tbd """
@@ -33,6 +55,205 @@ def tokenize(sql_str):
     return tokens
 
 
+def split_clauses(sql_str):
+    """Splits a select statement into its clause segments in a single lexer pass
+
+    Only top-level keywords start a new segment, so subqueries stay inside the
+    segment they appear in. Each clause can then be parsed from its own segment
+    instead of re-parsing the whole statement.
+
+    Args:
+        sql_str (str): A sql select statement
+
+    Returns:
+        segments (dict): Clause segment strings keyed by their leading keyword
+            ('select', 'from', 'where', 'group by', 'having', 'order by', 'limit')
+    """
+
+    segments = {}
+    segment_values = None
+    depth = 0
+
+    for ttype, value in lexer.tokenize(sql_str):
+        if ttype in ttypes.Punctuation:
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+            elif value == ';' and depth == 0:
+                break
+
+        if depth == 0 and ttype in ttypes.Keyword:
+            keyword = ' '.join(value.lower().split())
+
+            if keyword in CLAUSE_KEYWORDS and keyword not in segments:
+                segment_values = []
+                segments[keyword] = segment_values
+
+        if segment_values is not None:
+            segment_values.append(value)
+
+    for keyword, segment_values in segments.items():
+        segments[keyword] = ''.join(segment_values).strip()
+
+    return segments
+
+
+def split_fields(select_clause_str):
+    """Splits a select clause into its field strings in a single lexer pass
+
+    Only top-level commas separate fields, so function arguments and subqueries stay
+    whole, and the split stops at the first top-level clause keyword after select.
+
+    Args:
+        select_clause_str (str): A select clause, or a full select statement
+
+    Returns:
+        field_strs (list): The field strings, aliases included
+    """
+
+    field_strs = []
+    field_values = None
+    depth = 0
+
+    for ttype, value in lexer.tokenize(select_clause_str):
+        if field_values is None:
+            if ttype in ttypes.Whitespace or ttype in ttypes.Newline:
+                continue
+
+            # Anything other than a select clause has no fields
+            if ttype not in ttypes.Keyword.DML or value.lower() != 'select':
+                break
+
+            field_values = []
+
+            continue
+
+        if ttype in ttypes.Punctuation:
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+            elif depth == 0 and value in (',', ';'):
+                field_strs.append(''.join(field_values).strip())
+                field_values = []
+
+                if value == ';':
+                    break
+
+                continue
+
+        if depth == 0 and ttype in ttypes.Keyword:
+            if ' '.join(value.lower().split()) in CLAUSE_KEYWORDS:
+                break
+
+        field_values.append(value)
+
+    if field_values:
+        field_strs.append(''.join(field_values).strip())
+
+    field_strs = [field_str for field_str in field_strs if field_str]
+
+    return field_strs
+
+
+def split_alias(field_str):
+    """Splits a field string into its expression and alias
+
+    A trailing name is an alias when whitespace (or "as") separates it from a complete
+    value such as a column, literal, function call or case expression.
+
+    Args:
+        field_str (str): A select-clause field, e.g. "fn(id, dob) age"
+
+    Returns:
+        expression (str): The field's expression
+        alias (str): The field's alias, or '' if it has none
+    """
+
+    tokens = list(lexer.tokenize(field_str.strip()))
+    expression = field_str.strip()
+    alias = ''
+
+    word_positions = [
+        i for i, (ttype, _) in enumerate(tokens)
+        if ttype not in ttypes.Whitespace and ttype not in ttypes.Newline]
+
+    if len(word_positions) >= 2:
+        last_position = word_positions[-1]
+        previous_position = word_positions[-2]
+        last_ttype, last_value = tokens[last_position]
+        previous_ttype, previous_value = tokens[previous_position]
+
+        separated = last_position - previous_position > 1
+
+        # Unreserved keywords (e.g. column_name) are valid names too
+        is_name = (
+            last_ttype in ttypes.Name
+            or last_ttype in ttypes.String.Symbol
+            or (last_ttype in ttypes.Keyword
+                and last_value.lower() not in VALUE_KEYWORDS + CONNECTING_KEYWORDS))
+        follows_value = (
+            previous_ttype in ttypes.Name
+            or previous_ttype in ttypes.Literal
+            or previous_ttype in ttypes.Wildcard
+            or previous_value == ')'
+            or (previous_ttype in ttypes.Keyword
+                and previous_value.lower() not in CONNECTING_KEYWORDS))
+
+        if separated and is_name and follows_value:
+            alias = last_value
+
+            # Leave an "as" keyword out of the expression
+            if previous_value.lower() == 'as':
+                expression_end = previous_position
+            else:
+                expression_end = previous_position + 1
+
+            expression = ''.join(value for _, value in tokens[:expression_end]).strip()
+
+    return expression, alias
+
+
+def split_column_references(term_str):
+    """Returns the column references in a term or expression
+
+    Function names, bind parameters, literals, keywords and builtin type names are
+    not column references.
+
+    Args:
+        term_str (str): A term or expression, e.g. "lower(s.name) || :suffix"
+
+    Returns:
+        column_references (list): (qualifier, column_name) tuples; qualifier is None
+            for unqualified columns and column_name is '*' for a qualified wildcard
+    """
+
+    tokens = [
+        (ttype, value) for ttype, value in lexer.tokenize(term_str)
+        if ttype not in ttypes.Whitespace and ttype not in ttypes.Newline]
+
+    column_references = []
+    i = 0
+
+    while i < len(tokens):
+        ttype, value = tokens[i]
+        next_value = tokens[i + 1][1] if i + 1 < len(tokens) else None
+
+        if ttype is ttypes.Name and next_value != '(':
+            if next_value == '.' and i + 2 < len(tokens):
+                column_references.append((value, tokens[i + 2][1]))
+                i += 3
+
+                continue
+
+            column_references.append((None, value))
+
+        i += 1
+
+    return column_references
+
+
 def remove_whitespace_from_str(string):
     """ docstring tbd """
     string = ' '.join(string.split())
@@ -179,3 +400,752 @@ def get_truth_table_result(expr):
         truth_table_result.append(condition_result[-1])
 
     return truth_table_result
+
+
+class EngineRegistry:
+    """A process-wide registry of sqlalchemy engines keyed by connection string
+
+    Engines (and their connection pools) are created once per connection string and
+    reused by every dataset and statement built against that connection string.
+    """
+
+    def __init__(self, pool_size=5, max_overflow=10, pool_pre_ping=False):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_pre_ping = pool_pre_ping
+        self.hits = 0
+        self.misses = 0
+        self._engines = {}
+        self._async_engines = {}
+        self._lock = threading.Lock()
+
+    def configure(self, pool_size=None, max_overflow=None, pool_pre_ping=None):
+        """Changes the pool settings used for engines created from now on
+
+        Args:
+            pool_size (int): The number of connections to keep open per engine
+            max_overflow (int): The number of connections allowed beyond pool_size
+            pool_pre_ping (bool): Whether to test connections before handing them out
+
+        Returns:
+            None
+        """
+
+        if pool_size is not None:
+            self.pool_size = pool_size
+
+        if max_overflow is not None:
+            self.max_overflow = max_overflow
+
+        if pool_pre_ping is not None:
+            self.pool_pre_ping = pool_pre_ping
+
+    def get_engine(self, db_conn_str):
+        """Returns the shared engine for a connection string, creating it if needed
+
+        Args:
+            db_conn_str (str): A sqlalchemy database url
+
+        Returns:
+            engine (Engine): A sqlalchemy database Engine instance
+        """
+
+        with self._lock:
+            engine = self._engines.get(db_conn_str)
+
+            if engine is None:
+                self.misses += 1
+                engine = create_engine(db_conn_str, **self._engine_kwargs(db_conn_str))
+                self._engines[db_conn_str] = engine
+
+            else:
+                self.hits += 1
+
+        return engine
+
+    def get_async_engine(self, db_conn_str):
+        """Returns the shared asyncio engine for a connection string with an async
+            driver (e.g. postgresql+asyncpg or sqlite+aiosqlite), creating it if needed
+
+        Args:
+            db_conn_str (str): A sqlalchemy database url with an async driver
+
+        Returns:
+            engine (AsyncEngine): A sqlalchemy AsyncEngine instance
+        """
+
+        # Imported here so the asyncio extension is only loaded when it's used
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        with self._lock:
+            engine = self._async_engines.get(db_conn_str)
+
+            if engine is None:
+                self.misses += 1
+                engine = create_async_engine(db_conn_str,
+                                             **self._engine_kwargs(db_conn_str, is_async=True))
+                self._async_engines[db_conn_str] = engine
+
+            else:
+                self.hits += 1
+
+        return engine
+
+    def dispose(self, db_conn_str=None):
+        """Disposes of one engine (or all engines) and removes it from the registry
+
+        Args:
+            db_conn_str (str): The connection string of the engine to dispose; all
+                engines are disposed if not given
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            if db_conn_str is None:
+                engines = list(self._engines.values())
+                engines += [engine.sync_engine for engine in self._async_engines.values()]
+                self._engines.clear()
+                self._async_engines.clear()
+
+            else:
+                engine = self._engines.pop(db_conn_str, None)
+                async_engine = self._async_engines.pop(db_conn_str, None)
+                engines = [engine] if engine else []
+
+                if async_engine:
+                    engines.append(async_engine.sync_engine)
+
+        for engine in engines:
+            engine.dispose()
+
+    def stats(self):
+        """Returns usage statistics for the registry
+
+        Returns:
+            stats_dict (dict): Registry hits and misses, the number of live engines and
+                the number of connections currently checked out of their pools
+        """
+
+        with self._lock:
+            engines = list(self._engines.values())
+            engines += [engine.sync_engine for engine in self._async_engines.values()]
+
+        checked_out = 0
+
+        for engine in engines:
+            if hasattr(engine.pool, 'checkedout'):
+                checked_out += engine.pool.checkedout()
+
+        stats_dict = {
+            'hits': self.hits,
+            'misses': self.misses,
+            'engines': len(engines),
+            'checked_out': checked_out,
+        }
+
+        return stats_dict
+
+    def _engine_kwargs(self, db_conn_str, is_async=False):
+        """Returns the create_engine keyword arguments for a connection string
+
+        In-memory sqlite databases keep sqlalchemy's default single-connection pool,
+        since every new connection would otherwise see a different empty database.
+        Async sqlite engines also keep their default pool.
+        """
+
+        url = make_url(db_conn_str)
+        engine_kwargs = {'pool_pre_ping': self.pool_pre_ping}
+
+        if url.get_backend_name() == 'sqlite':
+            if url.database in (None, '', ':memory:') or is_async:
+                return engine_kwargs
+
+            # File-based sqlite defaults to NullPool; pool it like other backends and
+            # let pooled connections move between threads
+            engine_kwargs['poolclass'] = QueuePool
+            engine_kwargs['connect_args'] = {'check_same_thread': False}
+
+        engine_kwargs['pool_size'] = self.pool_size
+        engine_kwargs['max_overflow'] = self.max_overflow
+
+        return engine_kwargs
+
+
+engine_registry = EngineRegistry()
+
+
+@functools.lru_cache(maxsize=256)
+def is_async_db_conn_str(db_conn_str):
+    """Returns whether a connection string names an asyncio driver; the answer is
+        cached per connection string, since loading the dialect isn't free
+
+    Args:
+        db_conn_str (str): A sqlalchemy database url
+
+    Returns:
+        is_async (bool): Whether the url's dialect is an asyncio dialect
+    """
+
+    is_async = False
+
+    if db_conn_str:
+        is_async = getattr(make_url(db_conn_str).get_dialect(), 'is_async', False)
+
+    return is_async
+
+
+def merge_params(params, kwargs):
+    """Returns the bind parameters passed to a method as a params mapping and as
+        keyword arguments
+
+    A method's own options (e.g. cached or batch_size) share its keyword arguments with
+    bind parameters, so a parameter named like an option has to be passed in params.
+
+    Args:
+        params (dict): Bind parameter values, or None
+        kwargs (dict): Bind parameter values passed as keyword arguments
+
+    Returns:
+        merged_params (dict): Both sets of values; params wins where both name one
+    """
+
+    merged_params = {**kwargs, **(params or {})}
+
+    return merged_params
+
+
+class AsyncExecutor:
+    """A bounded thread pool that runs blocking calls for asyncio callers
+
+    At most max_workers calls run at once; the rest wait in the pool's queue, so many
+    probes can be awaited together without starving the event loop or the database.
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None):
+        """Changes the number of worker threads; the pool is recreated on next use
+
+        Args:
+            max_workers (int): The maximum number of calls to run at once
+
+        Returns:
+            None
+        """
+
+        if max_workers is not None:
+            self.shutdown()
+            self.max_workers = max_workers
+
+    async def run(self, func, *args, **kwargs):
+        """Runs a blocking function in the pool and awaits its result
+
+        Args:
+            func (callable): The blocking function to run
+            args (args): Positional arguments to pass to func
+            kwargs (kwargs): Keyword arguments to pass to func
+
+        Returns:
+            value (object): The function's return value
+        """
+
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(self._get_executor(),
+                                           functools.partial(func, *args, **kwargs))
+
+        return value
+
+    def shutdown(self):
+        """Shuts the pool down, waiting for running calls to finish
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='sqlpt')
+
+            executor = self._executor
+
+        return executor
+
+
+async_executor = AsyncExecutor()
+
+
+def run_timed(calls, max_workers=8):
+    """Runs named calls in a bounded thread pool and times each one
+
+    Args:
+        calls (dict): Names mapped to callables taking no arguments
+        max_workers (int): The maximum number of calls to run at once; 1 runs them
+            one after another in the calling thread
+
+    Returns:
+        values (dict): Names mapped to the calls' return values
+        timings (dict): Names mapped to the seconds each call took
+    """
+
+    def timed(call):
+        start = time.perf_counter()
+        value = call()
+        seconds = time.perf_counter() - start
+
+        return value, seconds
+
+    if max_workers == 1 or len(calls) < 2:
+        timed_values = {name: timed(call) for name, call in calls.items()}
+
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix='sqlpt') as executor:
+            futures = {name: executor.submit(timed, call) for name, call in calls.items()}
+            timed_values = {name: future.result() for name, future in futures.items()}
+
+    values = {name: value for name, (value, _) in timed_values.items()}
+    timings = {name: seconds for name, (_, seconds) in timed_values.items()}
+
+    return values, timings
+
+
+class LRUCache:
+    """A thread-safe, size-bounded cache that evicts the least recently used entries"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns a cached value and marks it as most recently used
+
+        Args:
+            key (hashable): The cache key
+            default (object): The value to return on a cache miss
+
+        Returns:
+            value (object): The cached value, or default on a miss
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                value = self._entries[key]
+
+            else:
+                self.misses += 1
+                value = default
+
+        return value
+
+    def put(self, key, value):
+        """Caches a value, evicting the least recently used entries beyond maxsize
+
+        Args:
+            key (hashable): The cache key
+            value (object): The value to cache
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the hit and miss counters
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns usage statistics for the cache
+
+        Returns:
+            stats_dict (dict): Cache hits, misses, current size and maximum size
+        """
+
+        stats_dict = {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
+
+        return stats_dict
+
+
+class SchemaCatalog:
+    """The reflected tables, columns, keys, indexes and foreign keys of one database
+
+    The whole schema is reflected in one pass on first lookup and kept until the
+    database's schema version changes (sqlite's PRAGMA schema_version; other databases
+    keep it until invalidate() is called). get_schema_catalog checks the version on
+    every lookup, so schema changes are seen straight away; setting version_ttl trades
+    that for at most one check every version_ttl seconds. A catalog can be saved to a json file and loaded back so later runs skip
+    reflection. Names are matched case-insensitively.
+    """
+
+    def __init__(self, db_conn_str=None, tables=None, version=None, version_ttl=None):
+        self.db_conn_str = db_conn_str
+        self.version = version
+        self.version_ttl = version_ttl
+        self._tables = tables
+        self._checked_at = None
+        self._lock = threading.RLock()
+
+    def reflect(self):
+        """Reflects every table and view of the database
+
+        Returns:
+            None
+        """
+
+        engine = engine_registry.get_engine(self.db_conn_str)
+
+        with engine.connect() as db_conn:
+            version = self.read_version(db_conn)
+            insp = inspect(db_conn)
+            tables = {}
+
+            for table_name in insp.get_table_names():
+                # Copy the columns; sqlite's get_pk_constraint sorts the inspector's
+                # cached column list in place
+                tables[table_name.lower()] = {
+                    'name': table_name,
+                    'columns': list(insp.get_columns(table_name)),
+                    'primary_key': insp.get_pk_constraint(table_name)['constrained_columns'],
+                    'indexes': insp.get_indexes(table_name),
+                    'foreign_keys': insp.get_foreign_keys(table_name),
+                    'unique_constraints': insp.get_unique_constraints(table_name),
+                }
+
+            for view_name in insp.get_view_names():
+                tables[view_name.lower()] = {
+                    'name': view_name,
+                    'columns': insp.get_columns(view_name),
+                    'primary_key': [],
+                    'indexes': [],
+                    'foreign_keys': [],
+                    'unique_constraints': [],
+                }
+
+        with self._lock:
+            self._tables = tables
+            self.version = version
+            self._checked_at = time.monotonic()
+
+    @staticmethod
+    def read_version(db_conn):
+        """Returns the database's schema version
+
+        Args:
+            db_conn (Connection): A sqlalchemy connection
+
+        Returns:
+            version (int): A number that changes whenever the schema changes, or None if
+                the database has none
+        """
+
+        version = None
+
+        if db_conn.dialect.name == 'sqlite':
+            version = db_conn.exec_driver_sql('PRAGMA schema_version').scalar()
+
+        return version
+
+    def is_current(self):
+        """Returns whether the catalog still matches the database's schema
+
+        Returns:
+            current (bool): False if the schema version has changed since reflection
+        """
+
+        engine = engine_registry.get_engine(self.db_conn_str)
+
+        with engine.connect() as db_conn:
+            version = self.read_version(db_conn)
+
+        with self._lock:
+            current = version == self.version
+            self._checked_at = time.monotonic()
+
+        return current
+
+    def version_check_due(self):
+        """Returns whether the version should be read again: always without a
+            version_ttl, otherwise once version_ttl seconds have passed since the last read
+
+        Returns:
+            due (bool): Whether the schema version should be checked again
+        """
+
+        due = (self._checked_at is None or self.version_ttl is None
+               or time.monotonic() - self._checked_at >= self.version_ttl)
+
+        return due
+
+    def invalidate(self):
+        """Forgets the reflected schema so the next lookup reflects it again
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._tables = None
+            self.version = None
+
+    def table_names(self):
+        """Returns the names of the database's tables and views
+
+        Returns:
+            table_names (set): Lowercase table and view names
+        """
+
+        table_names = set(self._get_tables())
+
+        return table_names
+
+    def get_table(self, table_name):
+        """Returns everything reflected about a table
+
+        Args:
+            table_name (str): A table or view name
+
+        Returns:
+            table (dict): The table's name, columns, primary_key, indexes, foreign_keys
+                and unique_constraints, or None if the database has no such table
+        """
+
+        table = self._get_tables().get(table_name.lower())
+
+        return table
+
+    def get_columns(self, table_name):
+        """Returns a table's columns metadata
+
+        Args:
+            table_name (str): A table or view name
+
+        Returns:
+            columns (list): A list of dicts containing the columns metadata, or None
+                if the database has no such table
+        """
+
+        table = self.get_table(table_name)
+        columns = table['columns'] if table else None
+
+        return columns
+
+    def get_column_names(self, table_name):
+        """Returns a table's lowercase column names
+
+        Args:
+            table_name (str): A table or view name
+
+        Returns:
+            column_names (list): The lowercase column names in table order, or None if
+                the database has no such table
+        """
+
+        columns = self.get_columns(table_name)
+        column_names = None
+
+        if columns is not None:
+            column_names = [column['name'].lower() for column in columns]
+
+        return column_names
+
+    def get_indexes(self, table_name):
+        """Returns a table's indexes
+
+        Args:
+            table_name (str): A table name
+
+        Returns:
+            indexes (list): Dicts with each index's name, column_names and unique flag
+        """
+
+        table = self.get_table(table_name)
+        indexes = table['indexes'] if table else []
+
+        return indexes
+
+    def get_foreign_keys(self, table_name):
+        """Returns a table's foreign keys
+
+        Args:
+            table_name (str): A table name
+
+        Returns:
+            foreign_keys (list): Dicts with each foreign key's constrained_columns,
+                referred_table and referred_columns
+        """
+
+        table = self.get_table(table_name)
+        foreign_keys = table['foreign_keys'] if table else []
+
+        return foreign_keys
+
+    def get_unique_keys(self, table_name):
+        """Returns the column sets that are unique in a table
+
+        Args:
+            table_name (str): A table name
+
+        Returns:
+            unique_keys (list): Lists of lowercase column names from the primary key,
+                unique constraints and unique indexes
+        """
+
+        table = self.get_table(table_name)
+        unique_keys = []
+
+        if table:
+            column_name_lists = [table['primary_key']]
+            column_name_lists += [
+                constraint['column_names'] for constraint in table['unique_constraints']]
+            column_name_lists += [
+                index['column_names'] for index in table['indexes'] if index['unique']]
+
+            for column_names in column_name_lists:
+                unique_key = [column_name.lower() for column_name in column_names
+                              if column_name]
+
+                if unique_key and unique_key not in unique_keys:
+                    unique_keys.append(unique_key)
+
+        return unique_keys
+
+    def save(self, path):
+        """Saves the catalog to a json file; column types are saved as their sql text
+
+        The connection string isn't saved, since it may hold credentials.
+
+        Args:
+            path (str): The file path
+
+        Returns:
+            None
+        """
+
+        tables = self._get_tables()
+        catalog_dict = {'version': self.version, 'tables': tables}
+
+        with open(path, 'w') as catalog_file:
+            json.dump(catalog_dict, catalog_file, default=str, indent=1)
+
+    @classmethod
+    def load(cls, path, db_conn_str=None):
+        """Loads a catalog saved with save()
+
+        Args:
+            path (str): The file path
+            db_conn_str (str): The sqlalchemy database url the catalog describes
+
+        Returns:
+            catalog (SchemaCatalog): The loaded catalog
+        """
+
+        with open(path) as catalog_file:
+            catalog_dict = json.load(catalog_file)
+
+        catalog = cls(db_conn_str=db_conn_str, tables=catalog_dict['tables'],
+                      version=catalog_dict['version'])
+
+        return catalog
+
+    def _get_tables(self):
+        # Concurrent first lookups wait for a single reflection
+        with self._lock:
+            if self._tables is None:
+                self.reflect()
+
+            tables = self._tables
+
+        return tables
+
+
+_schema_catalogs = {}
+_schema_catalogs_lock = threading.Lock()
+
+
+def get_schema_catalog(db_conn_str, check_version=True):
+    """Returns the shared schema catalog for a connection string
+
+    Args:
+        db_conn_str (str): A sqlalchemy database url
+        check_version (bool): Whether to check the database's schema version (see
+            SchemaCatalog.version_check_due) and reflect the schema again if it has
+            changed
+
+    Returns:
+        catalog (SchemaCatalog): The database's schema catalog, or None without a
+            connection string
+    """
+
+    catalog = None
+
+    if db_conn_str:
+        with _schema_catalogs_lock:
+            catalog = _schema_catalogs.get(db_conn_str)
+
+            if catalog is None:
+                catalog = SchemaCatalog(db_conn_str)
+                _schema_catalogs[db_conn_str] = catalog
+
+        if (check_version and catalog._tables is not None and catalog.version_check_due()
+                and not catalog.is_current()):
+            catalog.invalidate()
+
+    return catalog
+
+
+def set_schema_catalog(catalog):
+    """Makes a catalog (e.g. one loaded from a file) the shared catalog for its
+        connection string
+
+    Args:
+        catalog (SchemaCatalog): A catalog with a db_conn_str
+
+    Returns:
+        None
+    """
+
+    with _schema_catalogs_lock:
+        _schema_catalogs[catalog.db_conn_str] = catalog
@@ -1,714 +1,966 @@
 """ docstring tbd """
 
+import functools
+import os
 import re
-from copy import deepcopy
+import sys
+import time
+from array import array
+from copy import copy, deepcopy
 from dataclasses import dataclass
 from dataclasses import field as dataclass_field
 
 import sqlparse
-from sqlalchemy import create_engine, exc, inspect, text as sqltext
+from sqlalchemy import create_engine, exc, text as sqltext
+from sqlalchemy.engine import make_url
 from sqlparse.sql import Comparison as SqlParseComparison
 from sqlparse.sql import Identifier, IdentifierList, Parenthesis, Token, Where
 
-from sqlpt.service import (get_join_clause_kind, get_truth_table_result, is_join_clause,
-                           remove_whitespace)
+from sqlpt.service import (LRUCache, async_executor, engine_registry, get_join_clause_kind,
+                           get_schema_catalog, get_truth_table_result,
+                           is_async_db_conn_str, is_join_clause, merge_params,
+                           remove_whitespace, run_timed, split_alias, split_clauses,
+                           split_column_references, split_fields)
 
 # FUTURE: Allow all classes to accept a single s_str argument or keyword args
 
 
+QUERY_CLAUSE_NAMES = (
+    'select_clause', 'from_clause', 'where_clause', 'group_by_clause', 'having_clause')
+
+# The split_clauses segment each query clause is parsed from
+QUERY_CLAUSE_SEGMENTS = {
+    'select_clause': 'select',
+    'from_clause': 'from',
+    'where_clause': 'where',
+    'group_by_clause': 'group by',
+    'having_clause': 'having',
+}
+
+# Columns every (rowid) table has without declaring them
+IMPLICIT_COLUMN_NAMES = ('rowid', 'oid', '_rowid_')
+
+# Comparison operators that are never true for a null, with the operator to use when
+# the comparison's terms are swapped
+NULL_REJECTING_OPERATORS = {
+    '=': '=', '==': '==', '<>': '<>', '!=': '!=', '<': '>', '>': '<', '<=': '>=',
+    '>=': '<=', 'like': None, 'in': None}
+
+# A call to an aggregate function, or a window (over ...), in a select field
+AGGREGATE_PATTERN = re.compile(
+    r'\b(count|sum|avg|min|max|total|group_concat|string_agg|array_agg|listagg|'
+    r'stddev|variance|bool_and|bool_or|every)\s*\(|\bover\b', re.IGNORECASE)
+
+# A literal or bind parameter, or a parenthesized list of them
+LITERAL_PATTERN = re.compile(
+    r"\s*(:\w+|-?\d+(\.\d+)?|'([^']|'')*')\s*"
+    r"|\(\s*(:\w+|-?\d+(\.\d+)?|'([^']|'')*')(\s*,\s*(:\w+|-?\d+(\.\d+)?|'([^']|'')*'))*\s*\)")
+
+
 class QueryResult(list):
     """ docstring tbd """
     def count(self):
         return len(self)
 
 
-@dataclass
-class DataSet:
-    """An abstract dataset; can be a table or query"""
-
-    @property
-    def db_conn(self):
-        """Returns the database connection engine based on a connection string
+class CountsResult(dict):
+    """Row counts keyed by 'query' and dataset name, with the seconds each count took
+        in timings"""
 
-        Returns:
-            db_conn (Engine): A sqlalchemy database Engine instance
-        """
+    def __init__(self, counts=(), timings=None):
+        super().__init__(counts)
+        self.timings = timings or {}
 
-        db_conn = create_engine(self.db_conn_str) if self.db_conn_str else None
 
-        return db_conn
+@dataclass
+class JoinProfileStep:
+    """One step of a join profile: the row count after joining one more dataset"""
+    step: int
+    dataset: str
+    join_clause: str
+    row_count: int
+    fan_out: float
+    seconds: float
 
-    def rows_unique(self, field_names):
-        """Returns the dataset's row-uniqueness based on field_names
 
-        Args:
-            field_names (list): A list of the dataset's field names 
-        
-        Returns:
-            unique (bool): A dataset's row-uniqueness
+@dataclass
+class PredicateProfile:
+    """How much one where-clause predicate narrows a query's rows"""
+    predicate: str
+    total_row_count: int
+    row_count: int
+    selectivity: float
+    row_count_without: int
+    marginal_selectivity: float
 
-        Raises:
-            Exception: If type is DataSet; an abstract DataSet has no rows
-        """
 
-        if type(self) == DataSet:
-            raise Exception('Cannot check uniqueness of rows on an abstract DataSet')
+@dataclass
+class JoinEliminationReport:
+    """The left joins Query.eliminate_unused_joins dropped, and the seconds the query
+        took before and after (None if untimed)"""
+    dropped_join_clauses: list
+    seconds_before: float = None
+    seconds_after: float = None
+    query: object = dataclass_field(default=None, repr=False)
 
-        fields = [Field(field_name) for field_name in field_names]
-        select_clause = SelectClause(fields=fields)
-        select_clause.add_field('count(*)')
 
-        from_clause = FromClause(from_dataset=self)
+@dataclass
+class PlanNode:
+    """A step of a database's query plan
 
-        group_by_clause = GroupByClause(field_names=field_names)
+    kind is 'scan', 'search' (an index or primary-key lookup), 'temp_btree', 'subquery',
+    'compound' or 'other'; dataset and join_clause are the query's Table (or subquery)
+    and JoinClause the step reads, when it reads one.
+    """
+    detail: str
+    kind: str
+    table: str = None
+    index: str = None
+    covering: bool = False
+    correlated: bool = False
+    children: list = dataclass_field(default_factory=list)
+    dataset: object = dataclass_field(default=None, repr=False)
+    join_clause: object = dataclass_field(default=None, repr=False)
+
+    def walk(self):
+        """Yields this node and then every node below it, depth first
+
+        Yields:
+            node (PlanNode): A plan node
+        """
 
-        having_clause = HavingClause(s_str='having count(*) > 1')
+        yield self
 
-        query = Query(select_clause=select_clause,
-                      from_clause=from_clause,
-                      group_by_clause=group_by_clause,
-                      having_clause=having_clause,
-                      db_conn_str=self.db_conn_str)
+        for child in self.children:
+            yield from child.walk()
 
-        unique = not query.rows_exist()
 
-        return unique
+class QueryPlan(list):
+    """A query plan as a list of root PlanNodes"""
 
+    def __str__(self):
+        lines = []
 
-@dataclass
-class Table(DataSet):
-    """A database table"""
+        def add_lines(node, depth):
+            lines.append(f'{"  " * depth}{node.detail}')
 
-    name: str
-    db_conn_str: str = None
+            for child in node.children:
+                add_lines(child, depth + 1)
 
-    def __hash__(self):
-        return hash(str(self))
+        for node in self:
+            add_lines(node, 0)
 
-    def __str__(self):
-        string = self.name if hasattr(self, 'name') else ''
+        string = '\n'.join(lines)
 
         return string
 
-    def count(self):
-        """Returns the row count for the table
+    def walk(self):
+        """Yields every node of the plan, depth first
 
-        Returns:
-            row_count (int): The table's row count
+        Yields:
+            node (PlanNode): A plan node
         """
 
-        query = Query(sql_str=f'select rowid from {self.name}', db_conn_str=self.db_conn_str)
-        row_count = query.count()
+        for node in self:
+            yield from node.walk()
 
-        return row_count
+    def scans(self):
+        """Returns the nodes that scan a whole table (or subquery) without an index
 
-    def get_columns(self):
-        """Returns the columns metadata for the table
-        
         Returns:
-            columns (list): A list of dicts containing the columns metadata
+            scan_nodes (list): The full-scan plan nodes
         """
 
-        insp = inspect(self.db_conn)
-        columns = insp.get_columns(self.name)
+        scan_nodes = [node for node in self.walk() if node.kind == 'scan' and not node.index]
 
-        return columns
+        return scan_nodes
 
-    def get_column_names(self):
-        """Returns the column names for the table
-        
-        Returns:
-            column_names (list): A list of column names
-        """
 
-        columns = self.get_columns()
-        column_names = [col_dict['name'] for col_dict in columns]
+@dataclass
+class IndexSuggestion:
+    """A suggested index: equality columns first, then at most one range column
 
-        return column_names
+    plan_before and plan_after are the table's plan steps without and with the index,
+    from a scratch copy of the schema; turns_scan_into_search is None if unverified.
+    """
+    table: str
+    columns: list
+    index_name: str
+    create_sql: str
+    plan_before: str = None
+    plan_after: str = None
+    turns_scan_into_search: bool = None
 
-    def is_equivalent_to(self, other):
-        """Returns equivalence of the tables; this is different
-            than checking for equality (__eq__)
 
-        Args:
-            other (Table): Another table to compare to
-            
-        Returns:
-            equivalent (bool): Whether the table are logically equivalent
-        """
+class CompactRow(tuple):
+    """A result row stored as a plain tuple that also allows access by column name"""
+    __slots__ = ()
 
-        equivalent = False
+    # Column positions by name; set on the per-columns subclass (see compact_row_class)
+    _index = {}
 
-        if isinstance(other, self.__class__):
-            equivalent = self.name == other.name
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
 
-        return equivalent
+        return tuple.__getitem__(self, key)
 
+    def keys(self):
+        """Returns the row's column names"""
+        return list(self._index)
 
-@dataclass
-class SelectClause:
-    """A select clause of a sql query"""
-    fields: list
+    def as_dict(self):
+        """Returns the row as a column-name-to-value dictionary"""
+        return dict(zip(self._index, self))
 
-    def __init__(self, s_str=None, fields=None):
-        self.fields = parse_select_clause(s_str) if s_str else fields
+    def __reduce__(self):
+        # The per-columns subclass can't be pickled by reference, so rebuild it
+        return make_compact_row, (tuple(self._index), tuple(self))
 
-    def __hash__(self):
-        return hash(str(self))
 
-    def __bool__(self):
-        if self.fields:
-            return True
+@functools.lru_cache(maxsize=1024)
+def compact_row_class(columns):
+    """Returns the CompactRow subclass for a tuple of column names
 
-        return False
+    Results with the same columns share one class, so repeated queries don't each
+    create a class of their own.
 
-    def __str__(self):
-        field_names_str = ', '.join(self.field_names)
-        select_clause_str = f"select {field_names_str}"
+    Args:
+        columns (tuple): The column names
 
-        return select_clause_str
+    Returns:
+        row_class (type): A CompactRow subclass that maps the column names to positions
+    """
 
-    @property
-    def field_names(self):
-        """Returns a list of field names from the select clause
+    index = {column: i for i, column in enumerate(columns)}
+    row_class = type('CompactRow', (CompactRow,), {'__slots__': (), '_index': index})
 
-        Returns:
-            field_names
-        """
+    return row_class
 
-        field_names = [str(field) for field in self.fields]
 
-        return field_names
+def make_compact_row(columns, values):
+    """Returns a CompactRow of the given values (used to unpickle rows)
 
-    def add_field(self, s_str=None, field=None):
-        """Adds a field to the select clause and returns the resulting field list
-        
-        Args:
-            s_str (str): A short sql string representing a field to be added
-            field (Field): A field to be added
-            
-        Returns:
-            self.fields (list): The resulting field list after the field has been added
-        
-        Raises:
-            Exception: If neither s_str or field are provided
-        """
+    Args:
+        columns (tuple): The column names
+        values (tuple): The column values
 
-        if s_str is None and field is None:
-            raise Exception('Either s_str or field need to have values')
+    Returns:
+        row (CompactRow): The row
+    """
 
-        field = Field(s_str) if s_str else field
+    row = compact_row_class(columns)(values)
 
-        self.fields.append(field)
+    return row
 
-        return self.fields
 
-    def remove_field(self, s_str=None, field=None):
-        """Removes a field from the select clause and returns the resulting fields list
-        
+class CompactQueryResult(QueryResult):
+    """A query result that stores the column names once and each row as a tuple
+
+    Rows are CompactRow tuples, so they don't carry their own keys and hash table the
+    way dict rows do, but still support row['column'] and row.as_dict().
+    """
+
+    def __init__(self, columns=(), rows=()):
+        self.columns = tuple(columns)
+        self.row_class = compact_row_class(self.columns)
+
+        super().__init__(self.row_class(row) for row in rows)
+
+    def __reduce__(self):
+        return CompactQueryResult, (self.columns, [tuple(row) for row in self])
+
+    def extend_rows(self, rows):
+        """Appends raw rows (any sequences of column values) to the result
+
         Args:
-            s_str (str): A short sql string representing a field to be removed
-            field (Field): A field to be removed
-            
+            rows (iterable): The rows to append
+
         Returns:
-            self.fields (list): The resulting field list after the field has been
-                removed
-        
-        Raises:
-            Exception: If neither s_str or field are provided
+            None
         """
 
-        if s_str is None and field is None:
-            raise Exception('Either s_str or field need to have values')
+        self.extend(self.row_class(row) for row in rows)
 
-        field = Field(s_str) if s_str else field
+    def dicts(self):
+        """Yields each row as a dictionary
 
-        self.fields.remove(field)
+        Yields:
+            row_dict (dict): A row as a column-name-to-value dictionary
+        """
 
-        return self.fields
+        for row in self:
+            yield row.as_dict()
+
+    def column(self, name):
+        """Returns the values of one column
 
-    def locate_field(self, s_str):
-        """Returns a field's "location" in the select clause
-        
         Args:
-            s_str (str): A short sql string representing a field to be located
-            
+            name (str): The column name
+
         Returns:
-            locations (list): The resulting list of field locations
+            values (list): The column's values, one per row
         """
 
-        locations = []
+        position = self.row_class._index[name]
+        values = [row[position] for row in self]
 
-        for i, field in enumerate(self.fields):
-            if s_str in field.expression:
-                locations.append(('select_clause', 'fields', i))
+        return values
 
-            if field.query:
-                locations.extend(field.query.locate_field(s_str))
 
-        return locations
+class ColumnarQueryResult(dict):
+    """A query result stored column by column
+
+    Maps each column name to an array.array of its values (int64 for integer columns
+    and float64 for real columns), or a list for any other or mixed column, so column
+    statistics never need per-row objects.
+    """
+
+    def __init__(self, columns=()):
+        self.columns = list(columns)
+        self.row_ct = 0
+
+        super().__init__((column, []) for column in self.columns)
+
+    def count(self):
+        return self.row_ct
+
+    def extend_rows(self, rows):
+        """Appends a batch of raw rows (any sequences of column values) to the columns
 
-    def is_equivalent_to(self, other):
-        """Returns equivalence ignoring the sort order of the fields; this is different
-            than checking for equality (__eq__), which considers field order
         Args:
-            other (SelectClause): Another select clause to compare to
-            
+            rows (list): The rows to append
+
         Returns:
-            equivalent (bool): Whether the select clauses are logically equivalent
+            None
         """
 
-        equivalent = False
+        if not rows:
+            return
 
-        if isinstance(other, self.__class__):
-            equivalent = set(self.fields) == set(other.fields)
+        for column_name, values in zip(self.columns, zip(*rows)):
+            column = self[column_name]
 
-        return equivalent
+            # Type each column by its first batch
+            if isinstance(column, list) and not column:
+                column = self._new_column(values)
 
-    # FUTURE: fuse()
+            start = len(column)
 
-@dataclass
-class Expression:
-    """An expression as a list of a = b comparisons"""
-    comparisons: list
+            try:
+                column.extend(values)
 
-    def __init__(self, s_str=None, comparisons=None):
-        if s_str:
-            comparisons = []
-            statement = sqlparse.parse(s_str)
+            # Fall back to a list once a value doesn't fit the column's array type
+            except (TypeError, OverflowError):
+                del column[start:]
+                column = list(column)
+                column.extend(values)
 
-            expression_tokens = (
-                remove_whitespace(statement[0].tokens))
-            comparison_token_list = []
-            comparison_token_lists = []
+            self[column_name] = column
 
-            for token in expression_tokens:
-                if not isinstance(token, SqlParseComparison):
-                    comparison_token_list.append(token)
+        self.row_ct += len(rows)
 
-                elif isinstance(token, SqlParseComparison):
-                    comparison_token_list.append(token)
-                    comparison_token_lists.append(
-                        comparison_token_list)  # deepcopy?
-                    comparison_token_list = []
+    def to_numpy(self):
+        """Returns the columns as numpy arrays; typed columns are converted without
+            copying
 
-            for comparison_token_list in comparison_token_lists:
-                comparison = Comparison(token_list=comparison_token_list)
-                comparisons.append(comparison)
+        Returns:
+            numpy_columns (dict): Column names mapped to numpy arrays
 
-        self.comparisons = comparisons
+        Raises:
+            Exception: If numpy isn't installed
+        """
 
-    def __str__(self):
-        string = ''
+        try:
+            import numpy
+        except ImportError as e:
+            raise Exception('numpy is required for to_numpy(); pip install numpy') from e
 
-        for comparison in self.comparisons:
-            string += f'{str(comparison)} '
+        numpy_columns = {}
 
-        string = string[:-1]
+        for column_name, column in self.items():
+            if isinstance(column, array):
+                numpy_column = numpy.frombuffer(column, dtype=column.typecode)
+            else:
+                numpy_column = numpy.array(column, dtype=object)
 
-        return string
+            numpy_columns[column_name] = numpy_column
 
+        return numpy_columns
 
-@dataclass
-class ExpressionClause:
-    """An abstract expression clause; can be an on, where, having, or set clause"""
+    @staticmethod
+    def _new_column(values):
+        """Returns an empty column typed by the first non-null value"""
 
-    leading_word: str  #  = dataclass_field(repr=False)
-    expression: Expression
+        first_value = next((value for value in values if value is not None), None)
 
-    def __init__(self, s_str=None, leading_word=None, expression=None, token_list=None):
-        if s_str:
-            token_list = self.parse_expression_clause(s_str)
-            leading_word, expression = self.get_expression_clause_parts(token_list)
+        if type(first_value) == int:
+            column = array('q')
+        elif type(first_value) == float:
+            column = array('d')
+        else:
+            column = []
 
-        elif token_list:
-            leading_word, expression = self.get_expression_clause_parts(token_list)
+        return column
 
-        self.leading_word = leading_word
-        self.expression = expression
 
-    def __hash__(self):
-        return hash(str(self))
+class ParseCache(LRUCache):
+    """An opt-in cache of parsed queries keyed by normalized sql text and db_conn_str
 
-    def __bool__(self):
-        if self.expression.comparisons:
-            return True
+    Cached query trees are shared between the queries built from them. Each query
+    gets a deep copy of a clause (fields, comparisons and all) the first time it
+    accesses it, which costs a small fraction of parsing, and query-level
+    modifications copy the query first, so no change through a query, however deep,
+    shows up in another caller's query.
+    """
 
-        return False
+    def __init__(self, maxsize=512, enabled=False):
+        super().__init__(maxsize=maxsize)
+        self.enabled = enabled
 
-    def __str__(self):
-        string = f'{self.leading_word} {self.expression}' if self else ''
+    @staticmethod
+    def make_key(sql_str, db_conn_str=None):
+        """Returns the cache key for a sql string and connection string
 
-        return string
+        Args:
+            sql_str (str): A sql query string
+            db_conn_str (str): A sqlalchemy database url
 
-    def parse_expression_clause(self, sql_str):
-        """Parses and returns a token list of the expression parts of an string"""
-        raise NotImplementedError
-
-    def is_equivalent_to(self, other):
-        """Returns equivalence of the expression logic; this is different than checking
-            for equality (__eq__)
-        Args:
-            other (ExpressionClause): Another expression clause to compare to
-            
         Returns:
-            equivalent (bool): Whether the expression clauses are logically equivalent
+            key (tuple): The whitespace-normalized sql string and db_conn_str
         """
 
-        equivalent = (get_truth_table_result(str(self.expression)) ==
-                      get_truth_table_result(str(other.expression)))
+        normalized_sql_str = ' '.join(sql_str.split()).rstrip(';').rstrip()
+        key = (normalized_sql_str, db_conn_str)
+
+        return key
+
+
+parse_cache = ParseCache()
 
-        return equivalent
+
+class ResultCache(LRUCache):
+    """An opt-in cache of query results keyed by rendered sql, bind params and
+        db_conn_str
+
+    Entries are evicted least recently used first once there are more than maxsize of
+    them or they hold more than maxbytes. A file-based sqlite entry is dropped as soon
+    as the database file (or its write-ahead log) changes size or modification time;
+    entries for any other database expire after ttl seconds. A write that leaves the
+    file the same size within the file system's modification-time granularity goes
+    unnoticed, so call invalidate() after writes whose results must be seen at once.
+    Every caller gets its own copy of a cached result, so changing one can't change
+    what later callers get.
+    """
+
+    def __init__(self, maxsize=256, maxbytes=64 * 2 ** 20, ttl=60, enabled=False):
+        super().__init__(maxsize=maxsize)
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.nbytes = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._db_paths = {}
 
     @staticmethod
-    def get_expression_clause_parts(token_list):
-        """Returns an expression based on the given token list
-        
+    def make_key(kind, sql_str, params, db_conn_str=None):
+        """Returns the cache key for a result
+
         Args:
-            token_list (list): A list of sqlparse.sql Token instances
+            kind (str): What produced the result (e.g. 'scalar' or a run format)
+            sql_str (str): The rendered sql string
+            params (dict): The bind parameters
+            db_conn_str (str): A sqlalchemy database url
 
         Returns:
-            expression (Expression): An Expression instance based on the token list
+            key (tuple): The kind, sql string, sorted params and db_conn_str
         """
 
-        expression = ''
+        key = (kind, sql_str, tuple(sorted((name, repr(value))
+                                           for name, value in params.items())),
+               db_conn_str)
 
-        for sql_token in token_list:
-            trimmed_sql_token = ' '.join(str(sql_token).split())
-            expression += f'{trimmed_sql_token} '
+        return key
 
-        expression = expression[:-1]
+    def data_version(self, db_conn_str):
+        """Returns a cheap signal that changes whenever the database's data changes
 
-        full_expression_words = expression.split(' ')
+        Args:
+            db_conn_str (str): A sqlalchemy database url
 
-        leading_word = None
+        Returns:
+            version (tuple): The sizes and modification times of a sqlite database file
+                and its write-ahead log, or None if the database has no such signal
+        """
 
-        if full_expression_words[0] in ('on', 'where', 'having', 'set'):
-            leading_word = full_expression_words.pop(0)
+        if db_conn_str not in self._db_paths:
+            url = make_url(db_conn_str)
+            db_path = None
 
-        expression = Expression(s_str=' '.join(full_expression_words))
+            if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+                db_path = url.database
 
-        return leading_word, expression
+            self._db_paths[db_conn_str] = db_path
 
+        db_path = self._db_paths[db_conn_str]
+        version = None
 
-class OnClause(ExpressionClause):
-    """A sql join clause's on clause"""
+        if db_path:
+            version = ()
 
-    def __init__(self, s_str=None, expression=None, token_list=None):
-        super().__init__(s_str=s_str, leading_word='on', expression=expression, token_list=token_list)
+            for path in (db_path, f'{db_path}-wal'):
+                try:
+                    stat = os.stat(path)
+                    version += (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    version += (None, None)
+
+        return version
+
+    def fetch(self, key, db_conn_str, compute):
+        """Returns a cached result that's still current, or computes and caches it
 
-    @staticmethod
-    def parse_on_clause(s_str):
-        """Parses and returns an on-clause token list based on the given string
-        
         Args:
-            s_str (str): A short sql string representing an on clause
+            key (tuple): The cache key (see make_key)
+            db_conn_str (str): The sqlalchemy database url the result comes from
+            compute (callable): Returns the result on a cache miss
 
         Returns:
-            token_list (list): A token list
+            value (object): The cached or computed result
         """
 
-        sql_tokens = (
-            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+        version = self.data_version(db_conn_str)
+        now = time.monotonic()
 
-        token_list = []
+        with self._lock:
+            entry = self._entries.get(key)
 
-        for sql_token in sql_tokens:
-            token_list.append(sql_token)
+            if entry:
+                entry_version, expires_at, nbytes, value = entry
 
-        return token_list
+                if entry_version == version and (expires_at is None or expires_at > now):
+                    self.hits += 1
+                    self._entries.move_to_end(key)
 
-    def parse_expression_clause(self, s_str):
-        """Returns an on-clause token list based on the given string
-        
-        Args:
-            s_str (str): A short sql string representing an on clause
+                    return deepcopy(value)
 
-        Returns:
-            token_list (list): A token list
-        """
+                del self._entries[key]
+                self.nbytes -= nbytes
+                self.invalidations += 1
 
-        token_list = self.parse_on_clause(s_str)
+            self.misses += 1
 
-        return token_list
+        value = compute()
 
+        # Without a data version, entries can only be trusted for ttl seconds
+        expires_at = now + self.ttl if version is None and self.ttl is not None else None
+        nbytes = estimate_size(value)
 
-@dataclass
-class JoinClause:
-    """ docstring tbd """
-    kind: str
-    dataset: DataSet
-    on_clause: OnClause
+        if nbytes <= self.maxbytes:
+            with self._lock:
+                previous_entry = self._entries.pop(key, None)
 
-    def __init__(self, s_str=None, kind=None, dataset=None, on_clause=None):
-        if s_str:
-            # FUTURE: Implement this
-            pass
+                if previous_entry:
+                    self.nbytes -= previous_entry[2]
 
-        self.kind = kind
-        self.dataset = dataset
-        self.on_clause = on_clause
+                self._entries[key] = (version, expires_at, nbytes, deepcopy(value))
+                self.nbytes += nbytes
 
-    def __hash__(self):
-        return hash(str(self))
+                while len(self._entries) > self.maxsize or self.nbytes > self.maxbytes:
+                    _, (_, _, evicted_nbytes, _) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted_nbytes
+                    self.evictions += 1
 
-    def __str__(self):
-        if isinstance(self.dataset, Query):
-            dataset_str = f'({self.dataset})'
-        else:
-            dataset_str = self.dataset
+        return value
 
-        join_clause_str = f'{self.simple_kind} {dataset_str} {self.on_clause}'
+    def invalidate(self, db_conn_str=None):
+        """Drops the cached results of one database, or of every database
 
-        return join_clause_str
+        Args:
+            db_conn_str (str): The sqlalchemy database url whose results to drop; None
+                drops them all
 
-    @property
-    def simple_kind(self):
-        """Returns a simplified join kind (inner join to just join, or left/right join)
-        
         Returns:
-            kind (str): The simplified join kind
+            None
         """
 
-        kind = 'join' if self.kind == 'inner' else f'{self.kind} join'
-
-        return kind
+        with self._lock:
+            for key in list(self._entries):
+                if db_conn_str is None or key[3] == db_conn_str:
+                    self.nbytes -= self._entries.pop(key)[2]
+                    self.invalidations += 1
 
-    def is_equivalent_to(self, other):
-        """Returns equivalence of the join-clause logic; this is different than checking
-            for equality (__eq__)
+    def clear(self):
+        """Removes every entry and resets the counters
 
-        Args:
-            other (JoinClause): Another join clause to compare to
-            
         Returns:
-            equivalent (bool): Whether the join clauses are logically equivalent
+            None
         """
 
-        equivalent = (self.kind == other.kind
-                      and
-                      self.dataset.is_equivalent_to(other.dataset)
-                      and
-                      self.on_clause.is_equivalent_to(other.on_clause))
+        super().clear()
 
-        return equivalent
+        with self._lock:
+            self.nbytes = 0
+            self.evictions = 0
+            self.invalidations = 0
 
-    # FUTURE: drives_population()
+    def stats(self):
+        """Returns usage statistics for the cache
 
+        Returns:
+            stats_dict (dict): Cache hits, misses, evictions and invalidations, and the
+                current and maximum entry counts and bytes
+        """
 
-# FUTURE: Align the dataclass attributes with what's in __init__ in all methods
-@dataclass
-class FromClause:
-    """ docstring tbd """
-    from_dataset: DataSet
-    join_clauses: list
+        stats_dict = super().stats()
+        stats_dict.update({
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'bytes': self.nbytes,
+            'maxbytes': self.maxbytes,
+        })
 
-    # Can either have s_str and optional db_conn_str, or from_dataset and join clauses
-    # FUTURE: Raise exception if args aren't passed in properly (do this for other methods too)
-    def __init__(self, s_str=None, from_dataset=None, join_clauses=None, db_conn_str=None):
-        if s_str:
-            token_list = self._parse_from_clause_from_str(s_str)
+        return stats_dict
 
-            from_dataset, join_clauses = self._parse_from_clause_from_tokens(
-                token_list, db_conn_str)
 
-        self.from_dataset = from_dataset
-        self.join_clauses = join_clauses or []
+result_cache = ResultCache()
 
-    def __hash__(self):
-        return hash(str(self))
 
-    def __bool__(self):
-        if self.from_dataset:
-            return True
+def estimate_size(value):
+    """Returns the approximate memory, in bytes, held by a query result
 
-        return False
+    Row dict keys are shared between rows, so only their values are counted.
 
-    def __str__(self):
-        from_clause_str = ''
+    Args:
+        value (object): A query result or value
 
-        if self.from_dataset:
-            if isinstance(self.from_dataset, Query):
-                dataset_str = f'({self.from_dataset})'
+    Returns:
+        size (int): The approximate size in bytes
+    """
 
-            else:
-                dataset_str = str(self.from_dataset)
+    size = sys.getsizeof(value)
 
-            from_clause_str = f'from {dataset_str}'
+    if isinstance(value, dict):
+        size += sum(estimate_size(item) for item in value.values())
 
-            for join_clause in self.join_clauses:
-                from_clause_str += f' {join_clause}'
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
 
-        return from_clause_str
+    return size
 
-    @staticmethod
-    def _parse_from_clause_from_str(s_str):
-        """Parses and returns a from-clause token list based on the given string
-        
-        Args:
-            s_str (str): A short sql string representing a from clause
 
-        Returns:
-            token_list (list): A token list
-        """
+@dataclass
+class DataSet:
+    """An abstract dataset; can be a table or query"""
 
-        sql_tokens = remove_whitespace(sqlparse.parse(s_str)[0].tokens)
+    @property
+    def db_conn(self):
+        """Returns the shared database connection engine based on a connection string
 
-        token_list = []
+        Engines are pooled in the process-wide engine registry, so every dataset built
+        with the same connection string reuses the same connection pool.
 
-        start_appending = False
+        Returns:
+            db_conn (Engine): A sqlalchemy database Engine instance
+        """
 
-        for sql_token in sql_tokens:
-            if isinstance(sql_token, Token):
-                if sql_token.value.lower() == 'from':
-                    start_appending = True
+        db_conn = engine_registry.get_engine(self.db_conn_str) if self.db_conn_str else None
 
-            elif isinstance(sql_token, Where):
-                break
+        return db_conn
 
-            if start_appending:
-                token_list.append(sql_token)
+    def rows_unique(self, field_names):
+        """Returns the dataset's row-uniqueness based on field_names
 
-        return token_list
+        The check stops at the first duplicate group rather than counting them all.
 
-    @staticmethod
-    def _parse_from_clause_from_tokens(token_list, db_conn_str=None):
-        """Parses and returns a from-dataset and join clauses based on the given token_list
-        
         Args:
-            s_str (str): A short sql string representing a from clause
-
+            field_names (list): A list of the dataset's field names 
+        
         Returns:
-            token_list (list): A token list
+            unique (bool): A dataset's row-uniqueness
+
+        Raises:
+            Exception: If type is DataSet; an abstract DataSet has no rows
         """
 
-        from_dataset = None
-        join_clauses = []
+        if type(self) == DataSet:
+            raise Exception('Cannot check uniqueness of rows on an abstract DataSet')
 
-        if token_list:
-            # Remove 'from' keyword for now
-            token_list.pop(0)
+        fields = [Field(field_name) for field_name in field_names]
+        select_clause = SelectClause(fields=fields)
+        select_clause.add_field('count(*)')
 
-            # Get from_dataset
-            token = token_list.pop(0)
-            from_dataset = get_dataset(token, db_conn_str)
+        from_clause = FromClause(from_dataset=self)
 
-            # Construct join_clauses
-            kind = None
-            dataset = None
-            on_tokens = []
+        group_by_clause = GroupByClause(field_names=field_names)
 
-            for token in token_list:
-                # Parse join_clause token
-                if is_join_clause(token):
-                    # Create join_clause object with previously populated values
-                    # if applicable, and clear out values for a next one
-                    if kind and dataset and on_tokens:
-                        join_clause_kind = deepcopy(str(kind))
-                        join_clause_dataset = deepcopy(str(dataset))
-                        join_clause_on_clause = OnClause(token_list=on_tokens)
+        having_clause = HavingClause(s_str='having count(*) > 1')
 
-                        join_clause = JoinClause(kind=join_clause_kind,
-                                                 dataset=join_clause_dataset,
-                                                 on_clause=join_clause_on_clause)
+        query = Query(select_clause=select_clause,
+                      from_clause=from_clause,
+                      group_by_clause=group_by_clause,
+                      having_clause=having_clause,
+                      db_conn_str=self.db_conn_str)
 
-                        join_clauses.append(join_clause)
+        unique = not query.rows_exist()
 
-                        kind = None
-                        dataset = None
-                        on_tokens = []
+        return unique
 
-                    kind = get_join_clause_kind(token)
 
-                    continue
+@dataclass
+class Table(DataSet):
+    """A database table"""
 
-                # Parse dataset token
-                if isinstance(token, (Identifier, Parenthesis)):
-                    dataset = get_dataset(token, db_conn_str)
+    name: str
+    db_conn_str: str = None
 
-                    continue
+    def __hash__(self):
+        return hash(str(self))
 
-                # Parse comparison token
-                on_tokens.append(token)
+    def __str__(self):
+        string = self.name if hasattr(self, 'name') else ''
 
-            # Create the last join_clause
-            if kind and dataset and on_tokens:
-                on_clause = OnClause(token_list=on_tokens)
+        return string
 
-                join_clause = JoinClause(kind=kind, dataset=dataset, on_clause=on_clause)
-                join_clauses.append(join_clause)
+    def count(self, mode='exact'):
+        """Returns the row count for the table
 
-        return from_dataset, join_clauses
+        Args:
+            mode (str): 'exact' runs count(*) in the database; 'estimate' reads the
+                planner statistics without scanning the table and returns None when
+                there are none; 'fast' uses the estimate when there is one and falls
+                back to an exact count otherwise
+
+        Returns:
+            row_count (int): The table's row count
+
+        Raises:
+            Exception: If mode is not 'exact', 'fast' or 'estimate'
+        """
+
+        if mode not in ('exact', 'fast', 'estimate'):
+            raise Exception(f"Unknown count mode '{mode}'; use 'exact', 'fast' or 'estimate'")
+
+        row_count = None
+
+        if mode in ('fast', 'estimate'):
+            row_count = self.estimate_count()
+
+        if mode == 'exact' or (mode == 'fast' and row_count is None):
+            query = Query(sql_str=f'select count(*) from {self.name}',
+                          db_conn_str=self.db_conn_str)
+            row_count = query.scalar()
+
+        return row_count
+
+    async def count_async(self, mode='exact'):
+        """Returns the row count for the table without blocking the event loop
+
+        Estimates on an asyncio driver run on its async engine; any other estimate runs
+        in the bounded thread pool of service.async_executor.
+
+        Args:
+            mode (str): 'exact', 'fast' or 'estimate' (see Table.count)
+
+        Returns:
+            row_count (int): The table's row count
+
+        Raises:
+            Exception: If mode is not 'exact', 'fast' or 'estimate'
+        """
+
+        if mode not in ('exact', 'fast', 'estimate'):
+            raise Exception(f"Unknown count mode '{mode}'; use 'exact', 'fast' or 'estimate'")
+
+        row_count = None
+
+        if mode in ('fast', 'estimate'):
+            row_count = await self.estimate_count_async()
+
+        if mode == 'exact' or (mode == 'fast' and row_count is None):
+            query = Query(sql_str=f'select count(*) from {self.name}',
+                          db_conn_str=self.db_conn_str)
+            row_count = await query.scalar_async()
+
+        return row_count
+
+    async def estimate_count_async(self):
+        """Returns the table's row count from the database's planner statistics without
+            blocking the event loop
+
+        Returns:
+            row_count (int): The estimated row count, or None (see Table.estimate_count)
+        """
+
+        if is_async_db_conn_str(self.db_conn_str):
+            row_count = None
+            engine = engine_registry.get_async_engine(self.db_conn_str)
+            estimator = ROW_COUNT_ESTIMATORS.get(engine.dialect.name)
+
+            if estimator:
+                async with engine.connect() as db_conn:
+                    row_count = await db_conn.run_sync(estimator, self.name.split()[0])
+
+        else:
+            row_count = await async_executor.run(self.estimate_count)
+
+        return row_count
+
+    def estimate_count(self):
+        """Returns the table's row count from the database's planner statistics
+
+        Returns:
+            row_count (int): The estimated row count, or None if the database has no
+                statistics for the table (or no estimator for its dialect)
+        """
+
+        row_count = None
+        table_name = self.name.split()[0]
+        estimator = ROW_COUNT_ESTIMATORS.get(self.db_conn.dialect.name)
+
+        if estimator:
+            with self.db_conn.connect() as db_conn:
+                row_count = estimator(db_conn, table_name)
+
+        return row_count
+
+    def get_columns(self):
+        """Returns the columns metadata for the table from the shared schema catalog
+        
+        Returns:
+            columns (list): A list of dicts containing the columns metadata
+
+        Raises:
+            NoSuchTableError: If the database has no such table
+        """
+
+        table_name = split_alias(self.name)[0]
+        columns = get_schema_catalog(self.db_conn_str).get_columns(table_name)
+
+        if columns is None:
+            raise exc.NoSuchTableError(table_name)
+
+        return columns
+
+    def get_column_names(self):
+        """Returns the column names for the table
+        
+        Returns:
+            column_names (list): A list of column names
+        """
+
+        columns = self.get_columns()
+        column_names = [col_dict['name'] for col_dict in columns]
+
+        return column_names
 
     def is_equivalent_to(self, other):
-        """Returns equivalence of the from-clause logic; this is different than checking
-            for equality (__eq__)
+        """Returns equivalence of the tables; this is different
+            than checking for equality (__eq__)
 
         Args:
-            other (FromClause): Another from clause to compare to
+            other (Table): Another table to compare to
             
         Returns:
-            equivalent (bool): Whether the from clauses are logically equivalent
+            equivalent (bool): Whether the table are logically equivalent
         """
 
         equivalent = False
 
         if isinstance(other, self.__class__):
-            # FUTURE: Allow for equivalence if tables and comparisons are out
-            # of order
-            equivalent = (self.from_dataset == other.from_dataset
-                          or
-                          (self.from_dataset == other.get_first_join_clause_dataset()
-                           and
-                           other.from_dataset == self.get_first_join_clause_dataset()))
+            equivalent = self.name == other.name
 
-            # FUTURE: Work this out
-            if equivalent:
-                for self_join_clause in self.join_clauses:
-                    for other_join_clause in other.join_clauses:
-                        if not self_join_clause.is_equivalent_to(other_join_clause):
-                            equivalent = False
-                            break
+        return equivalent
 
-                for other_join_clause in other.join_clauses:
-                    for self_join_clause in self.join_clauses:
-                        if not other_join_clause.is_equivalent_to(self_join_clause):
-                            equivalent = False
-                            break
 
-        return equivalent
+@dataclass
+class SelectClause:
+    """A select clause of a sql query"""
+    fields: list
 
-    def get_first_join_clause_dataset(self):
-        """Returns the first join_clause's dataset for inner joins but None for left/right
-            join_clauses
+    def __init__(self, s_str=None, fields=None):
+        self.fields = parse_select_clause(s_str) if s_str else fields
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __bool__(self):
+        if self.fields:
+            return True
+
+        return False
+
+    def __str__(self):
+        field_names_str = ', '.join(self.field_names)
+        select_clause_str = f"select {field_names_str}"
+
+        return select_clause_str
+
+    @property
+    def field_names(self):
+        """Returns a list of field names from the select clause
 
         Returns:
-            first_join_clause_dataset (DataSet): The first join's dataset
+            field_names
         """
 
-        first_join_clause = self.join_clauses[0]
+        field_names = [str(field) for field in self.fields]
 
-        if first_join_clause.kind in ('inner', 'join_clause'):
-            first_join_clause_dataset = first_join_clause.dataset
-        else:
-            first_join_clause_dataset = None
+        return field_names
 
-        return first_join_clause_dataset
+    def add_field(self, s_str=None, field=None):
+        """Adds a field to the select clause and returns the resulting field list
+        
+        Args:
+            s_str (str): A short sql string representing a field to be added
+            field (Field): A field to be added
+            
+        Returns:
+            self.fields (list): The resulting field list after the field has been added
+        
+        Raises:
+            Exception: If neither s_str or field are provided
+        """
 
-    def locate_field(self, s_str):
-        """Returns a field's "location" in the where clause
+        if s_str is None and field is None:
+            raise Exception('Either s_str or field need to have values')
+
+        field = Field(s_str) if s_str else field
+
+        self.fields.append(field)
+
+        return self.fields
+
+    def remove_field(self, s_str=None, field=None):
+        """Removes a field from the select clause and returns the resulting fields list
         
         Args:
-            s_str (str): A short sql string representing a field to be located
+            s_str (str): A short sql string representing a field to be removed
+            field (Field): A field to be removed
             
         Returns:
-            locations (list): The resulting list of field locations
+            self.fields (list): The resulting field list after the field has been
+                removed
+        
+        Raises:
+            Exception: If neither s_str or field are provided
         """
 
-        """Returns a from clause's "location" in the sql query
+        if s_str is None and field is None:
+            raise Exception('Either s_str or field need to have values')
+
+        field = Field(s_str) if s_str else field
+
+        self.fields.remove(field)
+
+        return self.fields
+
+    def locate_field(self, s_str):
+        """Returns a field's "location" in the select clause
         
         Args:
-            s_str (str): A short sql string representing a from clause to be located
+            s_str (str): A short sql string representing a field to be located
             
         Returns:
             locations (list): The resulting list of field locations
@@ -716,611 +968,2550 @@ class FromClause:
 
         locations = []
 
-        for i, join_clause in enumerate(self.join_clauses):
-            enumerated_comparisons = enumerate(
-                join_clause.on_clause.expression.comparisons)
+        for i, field in enumerate(self.fields):
+            if s_str in field.expression:
+                locations.append(('select_clause', 'fields', i))
 
-            for j, comparison in enumerated_comparisons:
-                if s_str in comparison.left_term:
-                    location_tuple = (
-                        'from_clause', 'join_clauses', i, 'on_clause', 'expression',
-                        'comparisons', j, 'left_term')
-                    locations.append(location_tuple)
-                elif s_str in comparison.right_term:
-                    location_tuple = (
-                        'from_clause', 'join_clauses', i, 'on_clause', 'expression',
-                        'comparisons', j, 'right_term')
-                    locations.append(location_tuple)
+            if field.query:
+                locations.extend(('select_clause', 'fields', i, 'query') + location
+                                 for location in field.query.locate_field(s_str))
 
         return locations
 
-    def remove_join_clause(self, join_clause):
-        """Removes a join_clause from the from clause
-        
+    def is_equivalent_to(self, other):
+        """Returns equivalence ignoring the sort order of the fields; this is different
+            than checking for equality (__eq__), which considers field order
         Args:
-            join_clause (Join): A join
-        
+            other (SelectClause): Another select clause to compare to
+            
         Returns:
-            None
+            equivalent (bool): Whether the select clauses are logically equivalent
         """
 
-        self.join_clauses.remove(join_clause)
+        equivalent = False
 
-    # FUTURE: fuse()
+        if isinstance(other, self.__class__):
+            equivalent = set(self.fields) == set(other.fields)
+
+        return equivalent
+
+    @property
+    def is_distinct(self):
+        """Returns whether the select clause is a select distinct
+
+        Returns:
+            distinct (bool): Whether the first field starts with distinct
+        """
+
+        distinct = bool(self.fields) and bool(
+            re.match(r'\s*distinct\b', self.fields[0].expression, re.IGNORECASE))
+
+        return distinct
+
+    def fuse(self, select_clause):
+        """Adds the other select clause's fields that this one lacks and returns the
+            resulting field list
+
+        Args:
+            select_clause (SelectClause): Another select clause to fuse into this one
+
+        Returns:
+            self.fields (list): The resulting field list after the fields have been added
+        """
+
+        field_strs = [str(field) for field in self.fields]
+        new_fields = [deepcopy(field) for field in select_clause.fields
+                      if str(field) not in field_strs]
+
+        self.fields.extend(new_fields)
+
+        return self.fields
 
 
 @dataclass
-class Comparison:
-    """ docstring tbd """
+class Expression:
+    """An expression as a list of a = b comparisons
+
+    An item can also be a nested Expression: a parenthesized group joined to the item
+    before it by the group's bool_conjunction, e.g. the or in "(a = 1) or (b = 2)".
+    """
     bool_conjunction: str = dataclass_field(repr=False)
-    bool_sign: str = dataclass_field(repr=False)
-    left_term: str
-    operator: str
-    right_term: str
+    comparisons: list
 
-    def __init__(self, s_str=None, token_list=None, left_term=None, operator=None, right_term=None):
+    def __init__(self, s_str=None, comparisons=None, bool_conjunction=''):
         if s_str:
+            comparisons = []
             statement = sqlparse.parse(s_str)
-            sqlparse_comparison = statement[0].tokens[0]
-            comparison_tokens = (
-                remove_whitespace(sqlparse_comparison.tokens))
-
-            elements = [comparison_token.value
-                        for comparison_token in comparison_tokens]
 
-        # FUTURE: De-support token_list arg?
+            expression_tokens = (
+                remove_whitespace(statement[0].tokens))
+            comparison_token_list = []
+            comparison_token_lists = []
+
+            for token in expression_tokens:
+                if not isinstance(token, SqlParseComparison):
+                    comparison_token_list.append(token)
+
+                elif isinstance(token, SqlParseComparison):
+                    comparison_token_list.append(token)
+                    comparison_token_lists.append(
+                        comparison_token_list)  # deepcopy?
+                    comparison_token_list = []
+
+            for comparison_token_list in comparison_token_lists:
+                comparison = Comparison(token_list=comparison_token_list)
+                comparisons.append(comparison)
+
+        self.bool_conjunction = bool_conjunction
+        self.comparisons = comparisons
+
+    def __str__(self):
+        string = ''
+
+        for comparison in self.comparisons:
+            if isinstance(comparison, Expression):
+                conjunction = f'{comparison.bool_conjunction} ' if comparison.bool_conjunction else ''
+                string += f'{conjunction}({comparison}) '
+            else:
+                string += f'{str(comparison)} '
+
+        string = string[:-1]
+
+        return string
+
+    def walk_comparisons(self):
+        """Yields every comparison, including those in nested groups, with its
+            coordinates relative to the expression
+
+        Yields:
+            coordinate (tuple): e.g. ('comparisons', 1), or ('comparisons', 1,
+                'comparisons', 0) for the first comparison of a group
+            comparison (Comparison): The comparison
+        """
+
+        for i, comparison in enumerate(self.comparisons):
+            if isinstance(comparison, Expression):
+                for coordinate, nested_comparison in comparison.walk_comparisons():
+                    yield ('comparisons', i) + coordinate, nested_comparison
+            else:
+                yield ('comparisons', i), comparison
+
+    def tidy(self):
+        """Drops empty groups and the and/or of each level's leading item, e.g. after
+            comparisons have been deleted
+
+        Returns:
+            None
+        """
+
+        for comparison in self.comparisons:
+            if isinstance(comparison, Expression):
+                comparison.tidy()
+
+        self.comparisons = [
+            comparison for comparison in self.comparisons
+            if not (isinstance(comparison, Expression) and not comparison.comparisons)]
+
+        if self.comparisons and self.comparisons[0].bool_conjunction:
+            self.comparisons[0].bool_conjunction = ''
+
+
+@dataclass
+class ExpressionClause:
+    """An abstract expression clause; can be an on, where, having, or set clause"""
+
+    leading_word: str  #  = dataclass_field(repr=False)
+    expression: Expression
+
+    def __init__(self, s_str=None, leading_word=None, expression=None, token_list=None):
+        if s_str:
+            token_list = self.parse_expression_clause(s_str)
+            leading_word, expression = self.get_expression_clause_parts(token_list)
+
         elif token_list:
-            sqlparse_comparison = token_list[0]
+            leading_word, expression = self.get_expression_clause_parts(token_list)
 
-            elements = []
+        self.leading_word = leading_word
+        self.expression = expression
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __bool__(self):
+        if self.expression.comparisons:
+            return True
+
+        return False
+
+    def __str__(self):
+        string = f'{self.leading_word} {self.expression}' if self else ''
+
+        return string
+
+    def parse_expression_clause(self, sql_str):
+        """Parses and returns a token list of the expression parts of an string"""
+        raise NotImplementedError
+
+    def is_equivalent_to(self, other):
+        """Returns equivalence of the expression logic; this is different than checking
+            for equality (__eq__)
+        Args:
+            other (ExpressionClause): Another expression clause to compare to
+            
+        Returns:
+            equivalent (bool): Whether the expression clauses are logically equivalent
+        """
+
+        equivalent = (get_truth_table_result(str(self.expression)) ==
+                      get_truth_table_result(str(other.expression)))
+
+        return equivalent
+
+    @staticmethod
+    def get_expression_clause_parts(token_list):
+        """Returns an expression based on the given token list
+        
+        Args:
+            token_list (list): A list of sqlparse.sql Token instances
+
+        Returns:
+            expression (Expression): An Expression instance based on the token list
+        """
+
+        expression = ''
+
+        for sql_token in token_list:
+            trimmed_sql_token = ' '.join(str(sql_token).split())
+            expression += f'{trimmed_sql_token} '
+
+        expression = expression[:-1]
+
+        full_expression_words = expression.split(' ')
+
+        leading_word = None
+
+        if full_expression_words[0] in ('on', 'where', 'having', 'set'):
+            leading_word = full_expression_words.pop(0)
+
+        expression = Expression(s_str=' '.join(full_expression_words))
+
+        return leading_word, expression
+
+
+class OnClause(ExpressionClause):
+    """A sql join clause's on clause"""
+
+    def __init__(self, s_str=None, expression=None, token_list=None):
+        super().__init__(s_str=s_str, leading_word='on', expression=expression, token_list=token_list)
+
+    @staticmethod
+    def parse_on_clause(s_str):
+        """Parses and returns an on-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing an on clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        sql_tokens = (
+            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+
+        token_list = []
+
+        for sql_token in sql_tokens:
+            token_list.append(sql_token)
+
+        return token_list
+
+    def parse_expression_clause(self, s_str):
+        """Returns an on-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing an on clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        token_list = self.parse_on_clause(s_str)
+
+        return token_list
+
+
+@dataclass
+class JoinClause:
+    """ docstring tbd """
+    kind: str
+    dataset: DataSet
+    on_clause: OnClause
+
+    def __init__(self, s_str=None, kind=None, dataset=None, on_clause=None):
+        if s_str:
+            # FUTURE: Implement this
+            pass
+
+        self.kind = kind
+        self.dataset = dataset
+        self.on_clause = on_clause
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __str__(self):
+        if isinstance(self.dataset, Query):
+            dataset_str = self.dataset.subquery_str(alias=True)
+        else:
+            dataset_str = self.dataset
+
+        join_clause_str = f'{self.simple_kind} {dataset_str} {self.on_clause}'
+
+        return join_clause_str
+
+    @property
+    def simple_kind(self):
+        """Returns a simplified join kind (inner join to just join, or left/right join)
+        
+        Returns:
+            kind (str): The simplified join kind
+        """
+
+        kind = 'join' if self.kind == 'inner' else f'{self.kind} join'
+
+        return kind
+
+    def is_equivalent_to(self, other):
+        """Returns equivalence of the join-clause logic; this is different than checking
+            for equality (__eq__)
+
+        Args:
+            other (JoinClause): Another join clause to compare to
+            
+        Returns:
+            equivalent (bool): Whether the join clauses are logically equivalent
+        """
+
+        equivalent = (self.kind == other.kind
+                      and
+                      self.dataset.is_equivalent_to(other.dataset)
+                      and
+                      self.on_clause.is_equivalent_to(other.on_clause))
+
+        return equivalent
+
+    # FUTURE: drives_population()
+
+
+# FUTURE: Align the dataclass attributes with what's in __init__ in all methods
+@dataclass
+class FromClause:
+    """ docstring tbd """
+    from_dataset: DataSet
+    join_clauses: list
+
+    # Can either have s_str and optional db_conn_str, or from_dataset and join clauses
+    # FUTURE: Raise exception if args aren't passed in properly (do this for other methods too)
+    def __init__(self, s_str=None, from_dataset=None, join_clauses=None, db_conn_str=None):
+        if s_str:
+            token_list = self._parse_from_clause_from_str(s_str)
+
+            from_dataset, join_clauses = self._parse_from_clause_from_tokens(
+                token_list, db_conn_str)
+
+        self.from_dataset = from_dataset
+        self.join_clauses = join_clauses or []
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __bool__(self):
+        if self.from_dataset:
+            return True
+
+        return False
+
+    def __str__(self):
+        from_clause_str = ''
+
+        if self.from_dataset:
+            if isinstance(self.from_dataset, Query):
+                dataset_str = self.from_dataset.subquery_str(alias=True)
+
+            else:
+                dataset_str = str(self.from_dataset)
+
+            from_clause_str = f'from {dataset_str}'
+
+            for join_clause in self.join_clauses:
+                from_clause_str += f' {join_clause}'
+
+        return from_clause_str
+
+    @staticmethod
+    def _parse_from_clause_from_str(s_str):
+        """Parses and returns a from-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing a from clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        sql_tokens = remove_whitespace(sqlparse.parse(s_str)[0].tokens)
+
+        token_list = []
+
+        start_appending = False
+
+        for sql_token in sql_tokens:
+            if isinstance(sql_token, Token):
+                if sql_token.value.lower() == 'from':
+                    start_appending = True
+
+            elif isinstance(sql_token, Where):
+                break
+
+            if start_appending:
+                token_list.append(sql_token)
+
+        return token_list
+
+    @staticmethod
+    def _parse_from_clause_from_tokens(token_list, db_conn_str=None):
+        """Parses and returns a from-dataset and join clauses based on the given token_list
+        
+        Args:
+            s_str (str): A short sql string representing a from clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        from_dataset = None
+        join_clauses = []
+
+        if token_list:
+            # Remove 'from' keyword for now
+            token_list.pop(0)
+
+            # Get from_dataset
+            token = token_list.pop(0)
+            from_dataset = get_dataset(token, db_conn_str)
+
+            # A table named like a keyword (e.g. section) is a keyword token, and its
+            # alias a separate identifier
+            if (token.ttype in sqlparse.tokens.Keyword and token_list
+                    and isinstance(token_list[0], Identifier)):
+                from_dataset.name += f' {token_list.pop(0)}'
+
+            # Construct join_clauses
+            kind = None
+            dataset = None
+            keyword_dataset = False
+            on_tokens = []
+
+            for token in token_list:
+                # Parse join_clause token
+                if is_join_clause(token):
+                    # Create join_clause object with previously populated values
+                    # if applicable, and clear out values for a next one
+                    if kind and dataset and on_tokens:
+                        join_clause_kind = deepcopy(str(kind))
+                        join_clause_dataset = dataset
+                        join_clause_on_clause = OnClause(token_list=on_tokens)
+
+                        join_clause = JoinClause(kind=join_clause_kind,
+                                                 dataset=join_clause_dataset,
+                                                 on_clause=join_clause_on_clause)
+
+                        join_clauses.append(join_clause)
+
+                        kind = None
+                        dataset = None
+                        on_tokens = []
+
+                    kind = get_join_clause_kind(token)
+                    keyword_dataset = False
+
+                    continue
+
+                # Parse dataset token
+                if isinstance(token, (Identifier, Parenthesis)):
+                    if keyword_dataset and not on_tokens:
+                        dataset.name += f' {token}'
+                    else:
+                        dataset = get_dataset(token, db_conn_str)
+
+                    keyword_dataset = False
+
+                    continue
+
+                if (kind and dataset is None and token.ttype in sqlparse.tokens.Keyword
+                        and token.value.lower() != 'on'):
+                    dataset = Table(name=token.value, db_conn_str=db_conn_str)
+                    keyword_dataset = True
+
+                    continue
+
+                # Parse comparison token
+                on_tokens.append(token)
+
+            # Create the last join_clause
+            if kind and dataset and on_tokens:
+                on_clause = OnClause(token_list=on_tokens)
+
+                join_clause = JoinClause(kind=kind, dataset=dataset, on_clause=on_clause)
+                join_clauses.append(join_clause)
+
+        return from_dataset, join_clauses
+
+    def is_equivalent_to(self, other):
+        """Returns equivalence of the from-clause logic; this is different than checking
+            for equality (__eq__)
+
+        Args:
+            other (FromClause): Another from clause to compare to
+            
+        Returns:
+            equivalent (bool): Whether the from clauses are logically equivalent
+        """
+
+        equivalent = False
+
+        if isinstance(other, self.__class__):
+            # FUTURE: Allow for equivalence if tables and comparisons are out
+            # of order
+            equivalent = (self.from_dataset == other.from_dataset
+                          or
+                          (self.from_dataset == other.get_first_join_clause_dataset()
+                           and
+                           other.from_dataset == self.get_first_join_clause_dataset()))
+
+            # FUTURE: Work this out
+            if equivalent:
+                for self_join_clause in self.join_clauses:
+                    for other_join_clause in other.join_clauses:
+                        if not self_join_clause.is_equivalent_to(other_join_clause):
+                            equivalent = False
+                            break
+
+                for other_join_clause in other.join_clauses:
+                    for self_join_clause in self.join_clauses:
+                        if not other_join_clause.is_equivalent_to(self_join_clause):
+                            equivalent = False
+                            break
+
+        return equivalent
+
+    def get_first_join_clause_dataset(self):
+        """Returns the first join_clause's dataset for inner joins but None for left/right
+            join_clauses
+
+        Returns:
+            first_join_clause_dataset (DataSet): The first join's dataset
+        """
+
+        first_join_clause = self.join_clauses[0]
+
+        if first_join_clause.kind in ('inner', 'join_clause'):
+            first_join_clause_dataset = first_join_clause.dataset
+        else:
+            first_join_clause_dataset = None
+
+        return first_join_clause_dataset
+
+    def locate_field(self, s_str):
+        """Returns a field's "location" in the where clause
+        
+        Args:
+            s_str (str): A short sql string representing a field to be located
+            
+        Returns:
+            locations (list): The resulting list of field locations
+        """
+
+        """Returns a from clause's "location" in the sql query
+        
+        Args:
+            s_str (str): A short sql string representing a from clause to be located
+            
+        Returns:
+            locations (list): The resulting list of field locations
+        """
+
+        locations = []
+
+        for i, join_clause in enumerate(self.join_clauses):
+            walked_comparisons = join_clause.on_clause.expression.walk_comparisons()
+
+            for coordinate, comparison in walked_comparisons:
+                if s_str in comparison.left_term:
+                    location_tuple = (
+                        ('from_clause', 'join_clauses', i, 'on_clause', 'expression')
+                        + coordinate + ('left_term',))
+                    locations.append(location_tuple)
+                elif s_str in comparison.right_term:
+                    location_tuple = (
+                        ('from_clause', 'join_clauses', i, 'on_clause', 'expression')
+                        + coordinate + ('right_term',))
+                    locations.append(location_tuple)
+
+        return locations
+
+    def remove_join_clause(self, join_clause):
+        """Removes a join_clause from the from clause
+        
+        Args:
+            join_clause (Join): A join
+        
+        Returns:
+            None
+        """
+
+        self.join_clauses.remove(join_clause)
+
+    # FUTURE: fuse()
+
+
+@dataclass
+class Comparison:
+    """ docstring tbd """
+    bool_conjunction: str = dataclass_field(repr=False)
+    bool_sign: str = dataclass_field(repr=False)
+    left_term: str
+    operator: str
+    right_term: str
+
+    def __init__(self, s_str=None, token_list=None, left_term=None, operator=None, right_term=None):
+        if s_str:
+            statement = sqlparse.parse(s_str)
+            sqlparse_comparison = statement[0].tokens[0]
+            comparison_tokens = (
+                remove_whitespace(sqlparse_comparison.tokens))
+
+            elements = [comparison_token.value
+                        for comparison_token in comparison_tokens]
+
+        # FUTURE: De-support token_list arg?
+        elif token_list:
+            sqlparse_comparison = token_list[0]
+
+            elements = []
+
+            for sqlparse_comparison in token_list:
+                if isinstance(sqlparse_comparison, SqlParseComparison):
+                    comparison_tokens = remove_whitespace(sqlparse_comparison.tokens)
+
+                    els = [comparison_token.value
+                           for comparison_token in comparison_tokens]
+
+                    elements.extend(els)
+
+                else:
+                    elements.append(sqlparse_comparison.value)
+
+        else:
+            elements = [left_term, operator, right_term]
+
+        if elements[0] in ('and', 'or'):
+            bool_conjunction = elements.pop(0)
+        elif elements[0] == 'not':
+            bool_sign = elements.pop(0)
+        else:
+            bool_conjunction = ''
+
+        if elements[0] == 'not':
+            bool_sign = elements.pop(0)
+        else:
+            bool_sign = ''
+
+        left_term = left_term or elements[0]
+        operator = operator or elements[1]
+        right_term = right_term or elements[2]
+
+        self.bool_conjunction = bool_conjunction
+        self.bool_sign = bool_sign
+        self.left_term = left_term
+        self.operator = operator
+        self.right_term = right_term
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __str__(self):
+        string = ''
+
+        if self.bool_conjunction:
+            string += f'{self.bool_conjunction} '
+
+        if self.bool_sign:
+            string += f'{self.bool_sign} '
+
+        string += f'{self.left_term} '
+        string += f'{self.operator} '
+        string += f'{self.right_term}'
+
+        return string
+
+    def is_equivalent_to(self, other):
+        """Returns equivalence of the comparison logic; this is different than checking
+            for equality (__eq__)
+
+        Args:
+            other (Comparison): Another comparison to compare to
+            
+        Returns:
+            equivalent (bool): Whether the comparisons are logically equivalent
+        """
+
+        equivalent = False
+
+        if isinstance(other, self.__class__):
+            if self.operator == '=':
+                operator_equivalent = self.operator == other.operator
+
+                expressions_equivalent = (
+                    {self.left_term, self.right_term} ==
+                    {other.left_term, other.right_term})
+
+            if operator_equivalent and expressions_equivalent:
+                equivalent = True
+
+        return equivalent
+
+
+class WhereClause(ExpressionClause):
+    """A where clause of a sql query"""
+
+    def __init__(self, s_str=None, expression=None, token_list=None):
+        super().__init__(s_str=s_str, leading_word='where', expression=expression, token_list=token_list)
+
+    # FUTURE: Test this in test_classes
+    @staticmethod
+    def _parse_where_clause(s_str):
+        """Parses and returns a where-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing a where clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        sql_tokens = (
+            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+
+        token_list = []
+
+        start_appending = False
+
+        for sql_token in sql_tokens:
+            if type(sql_token) == Token:
+                if sql_token.value.lower() == 'from':
+                    continue
+
+            elif isinstance(sql_token, Where):
+                start_appending = True
+
+            if start_appending:
+                token_list.append(sql_token)
+
+        return token_list
+
+    # FUTURE: Test this in test_classes
+    def parse_expression_clause(self, sql_str):
+        """Returns a where-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing a where clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        token_list = self._parse_where_clause(sql_str)
+
+        return token_list
+
+    def locate_field(self, s_str):
+        """Returns a field's "location" in the where clause
+        
+        Args:
+            s_str (str): A short sql string representing a field to be located
+            
+        Returns:
+            locations (list): The resulting list of field locations
+        """
+
+        locations = []
+
+        for coordinate, comparison in self.expression.walk_comparisons():
+            if s_str in comparison.left_term:
+                location_tuple = ('where_clause', 'expression') + coordinate + ('left_term',)
+                locations.append(location_tuple)
+            elif s_str in comparison.right_term:
+                location_tuple = ('where_clause', 'expression') + coordinate + ('right_term',)
+                locations.append(location_tuple)
+
+        return locations
+
+    def fuse(self, where_clause):
+        """Ors the other where clause into this one and returns the resulting expression
+
+        Each clause's comparisons become a group, so the result reads (a) or (b); a
+        clause that's already an or of groups gets the new group added to the end. The
+        result keeps the rows either clause keeps, so if either has no comparisons the
+        result has none either.
+
+        Args:
+            where_clause (WhereClause): Another where clause to fuse into this one
+
+        Returns:
+            self.expression (Expression): The resulting expression
+        """
+
+        if self and where_clause:
+            comparisons = self.expression.comparisons
+            new_group = Expression(comparisons=deepcopy(where_clause.expression.comparisons),
+                                   bool_conjunction='or')
+
+            if not all(isinstance(comparison, Expression)
+                       and (i == 0 or comparison.bool_conjunction.lower() == 'or')
+                       for i, comparison in enumerate(comparisons)):
+                comparisons = [Expression(comparisons=comparisons)]
+
+            self.expression = Expression(comparisons=comparisons + [new_group])
+
+        else:
+            self.expression = Expression(comparisons=[])
+
+        return self.expression
+
+    # FUTURE: parameterize()
+
+
+class GroupByClause:
+    """ docstring tbd """
+    field_names: list
+
+    def __init__(self, s_str=None, field_names=None):
+        if s_str:
+            field_names = self.parse_group_by_clause(s_str)
+
+        self.field_names = field_names
+
+    def __bool__(self):
+        if self.field_names:
+            return True
+
+        return False
+
+    def __str__(self):
+        string = ''
+
+        if self.field_names:
+            string = 'group by '
+
+            for field_name in self.field_names:
+                string += f'{field_name}, '
+
+            # Remove trailing comma and space
+            string = string[:-2]
+
+        return string
+
+    @staticmethod
+    def parse_group_by_clause(s_str):
+        """Parses and returns the field names of a group-by clause
+
+        Args:
+            s_str (str): A short sql string representing a group-by clause
+
+        Returns:
+            field_names (list): The grouped field names
+        """
+
+        sql_tokens = remove_whitespace(sqlparse.parse(s_str)[0].tokens)
+
+        field_names = []
+
+        for sql_token in sql_tokens:
+            if isinstance(sql_token, IdentifierList):
+                field_names.extend(
+                    str(identifier) for identifier in sql_token.get_identifiers())
+
+            elif sql_token.ttype not in sqlparse.tokens.Keyword:
+                field_names.append(str(sql_token))
+
+        return field_names
+
+
+class HavingClause(ExpressionClause):
+    """A having clause of a sql query"""
+
+    def __init__(self, s_str=None, expression=None, token_list=None):
+        super().__init__(s_str=s_str, leading_word='having', expression=expression, token_list=token_list)
+
+    @staticmethod
+    def parse_having_clause(s_str):
+        """Parses and returns a having-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing a having clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        sql_tokens = (
+            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+
+        token_list = []
+
+        for sql_token in sql_tokens:
+            token_list.append(sql_token)
+
+        return token_list
+
+    def parse_expression_clause(self, s_str):
+        """Returns a having-clause token list based on the given string
+        
+        Args:
+            s_str (str): A short sql string representing a having clause
+
+        Returns:
+            token_list (list): A token list
+        """
+
+        token_list = self.parse_having_clause(s_str)
+
+        return token_list
+
+
+class OrderByClause:
+    """ docstring tbd """
+    order_columns: list
+
+    def __init__(self, s_str=None, order_columns=None):
+        order_columns = order_columns or []
+
+        self.order_columns = order_columns
+
+    def __str__(self):
+        if self.order_columns:
+            string = 'order by '
+
+            for order_column in self.order_columns:
+                string += f'{order_column["column"]} {order_column["direction"]}, '
+
+            # Remove trailing comma and space
+            string = string[:-2]
+
+        return string
+
+
+@dataclass
+class Query(DataSet):
+    """A sql query"""
+    sql_str: str = dataclass_field(repr=False)
+    select_clause: SelectClause
+    from_clause: FromClause
+    where_clause: WhereClause
+    group_by_clause: GroupByClause
+    having_clause: HavingClause
+
+    def __init__(self, sql_str=None, select_clause=None, from_clause=None,
+                 where_clause=None, group_by_clause=None, having_clause=None,
+                 db_conn_str=None, cached=None, lazy=False, alias=None):
+
+        # Drop clauses left over from a previous initialization (see bind_params)
+        for clause_name in QUERY_CLAUSE_NAMES:
+            self.__dict__.pop(clause_name, None)
+
+        self.__dict__.pop('_shared_clauses', None)
+        self.__dict__.pop('_lazy_segments', None)
+
+        # The name a subquery goes by in a from clause, e.g. t in (select ...) t
+        self.alias = alias
+
+        use_cache = parse_cache.enabled if cached is None else cached
+
+        if sql_str and use_cache:
+            key = ParseCache.make_key(sql_str, db_conn_str)
+            shared_query = parse_cache.get(key)
+
+            if shared_query is None:
+                shared_query = Query(sql_str=sql_str, db_conn_str=db_conn_str, cached=False)
+                shared_query._freeze()
+                parse_cache.put(key, shared_query)
+
+            # Clauses are copied from the shared query on first access (see __getattr__)
+            self.sql_str = shared_query.sql_str
+            self.db_conn_str = db_conn_str
+            self._shared_clauses = shared_query._shared_clauses
+
+            return
+
+        if sql_str:
+            # Accommodate subqueries surrounded by parens
+            sql_str = sql_str[1:-1] if sql_str[:7].lower() == '(select' else sql_str
+
+            # Tokenize the statement once and hand each clause only its own segment
+            segments = split_clauses(sql_str)
+
+            if lazy:
+                # Clauses are parsed from their segments on first access (see
+                # __getattr__)
+                self.sql_str = sql_str
+                self.db_conn_str = db_conn_str
+                self._lazy_segments = segments
+
+                return
+
+            select_clause = self._parse_clause('select_clause', segments, db_conn_str)
+            from_clause = self._parse_clause('from_clause', segments, db_conn_str)
+            where_clause = self._parse_clause('where_clause', segments, db_conn_str)
+            group_by_clause = self._parse_clause('group_by_clause', segments, db_conn_str)
+            having_clause = self._parse_clause('having_clause', segments, db_conn_str)
+
+        self.sql_str = sql_str
+        self.select_clause = select_clause
+        self.from_clause = from_clause
+        self.where_clause = where_clause
+        self.group_by_clause = group_by_clause
+        self.having_clause = having_clause
+        self.db_conn_str = db_conn_str
+
+    def __getattr__(self, name):
+        # Only reached for attributes missing from __dict__, which for clauses means
+        # either they haven't been parsed yet (lazy queries) or they're shared with a
+        # cached query, in which case a private deep copy is handed out
+        lazy_segments = self.__dict__.get('_lazy_segments')
+
+        if lazy_segments is not None and name in QUERY_CLAUSE_NAMES:
+            clause = self._parse_clause(name, lazy_segments, self.db_conn_str)
+            self.__dict__[name] = clause
+
+            return clause
+
+        shared_clauses = self.__dict__.get('_shared_clauses')
+
+        if shared_clauses is None or name not in shared_clauses:
+            raise AttributeError(name)
+
+        clause = deepcopy(shared_clauses[name])
+
+        # A cached query itself is never written to, so only its users memoize copies
+        if not self.__dict__.get('_shared'):
+            self.__dict__[name] = clause
+
+        return clause
+
+    def __deepcopy__(self, memo):
+        query = self.__class__.__new__(self.__class__)
+        memo[id(self)] = query
+
+        for name, value in self.__dict__.items():
+            if name not in ('_shared', '_shared_clauses'):
+                query.__dict__[name] = deepcopy(value, memo)
+
+        for name, clause in (self.__dict__.get('_shared_clauses') or {}).items():
+            if name not in query.__dict__:
+                query.__dict__[name] = deepcopy(clause, memo)
+
+        return query
+
+    def __hash__(self):
+        return hash(str(self))
+
+    # FUTURE: Also implement is_equivalent_to
+    def __eq__(self, other):
+        query_equal = False
+
+        if isinstance(other, Query):
+            select_clauses_equal = self.select_clause == other.select_clause
+            from_clauses_equal = self._optional_clause_equal(other, 'from')
+            where_clauses_equal = self._optional_clause_equal(other, 'where')
+
+            query_equal = (
+                select_clauses_equal and
+                from_clauses_equal and
+                where_clauses_equal)
+
+        return query_equal
+
+    def __bool__(self):
+        if self.select_clause:
+            return True
+
+        return False
+
+    def __str__(self):
+        # Lazy queries render clauses nobody has touched from their original text
+        lazy_segments = self.__dict__.get('_lazy_segments')
+
+        if lazy_segments is not None:
+            clause_strs = []
+
+            for clause_name in QUERY_CLAUSE_NAMES:
+                if clause_name in self.__dict__:
+                    clause = self.__dict__[clause_name]
+                    clause_str = str(clause) if clause else ''
+                else:
+                    segment = lazy_segments.get(QUERY_CLAUSE_SEGMENTS[clause_name], '')
+                    clause_str = ' '.join(segment.split())
+
+                if clause_str:
+                    clause_strs.append(clause_str)
+
+            string = ' '.join(clause_strs)
+
+            return string
+
+        string = str(self.select_clause)
+
+        if self.from_clause:
+            if str(self.from_clause):
+                string += f' {self.from_clause}'
+
+        if hasattr(self, 'where_clause'):
+            if self.where_clause:
+                string += f' {self.where_clause}'
+
+        if hasattr(self, 'group_by_clause'):
+            if self.group_by_clause:
+                string += f' {self.group_by_clause}'
+
+        if hasattr(self, 'having_clause'):
+            if self.having_clause:
+                string += f' {self.having_clause}'
+
+        return string
+
+    @staticmethod
+    def _parse_clause(clause_name, segments, db_conn_str=None):
+        """Parses and returns one clause from the statement's clause segments
+
+        Args:
+            clause_name (str): The query attribute name of the clause
+            segments (dict): Clause segment strings from split_clauses
+            db_conn_str (str): A sqlalchemy database url
+
+        Returns:
+            clause (object): The parsed clause, or None if the statement has no such
+                clause
+        """
+
+        segment = segments.get(QUERY_CLAUSE_SEGMENTS[clause_name])
+        clause = None
+
+        # FUTURE: Do away with these "or None"s?
+        if segment:
+            if clause_name == 'select_clause':
+                clause = SelectClause(segment) or None
+
+            elif clause_name == 'from_clause':
+                clause = FromClause(s_str=segment, db_conn_str=db_conn_str) or None
+
+            elif clause_name == 'where_clause':
+                clause = WhereClause(s_str=segment) or None
+
+            elif clause_name == 'group_by_clause':
+                clause = GroupByClause(segment)
+
+            elif clause_name == 'having_clause':
+                clause = HavingClause(s_str=segment) or None
+
+        return clause
+
+    def _subqueries(self):
+        """Returns the queries nested directly in the select and from clauses
+
+        Returns:
+            subqueries (list): The nested Query instances
+        """
+
+        subqueries = []
+
+        if self.select_clause:
+            for field in self.select_clause.fields:
+                if field.query:
+                    subqueries.append(field.query)
+
+        if self.from_clause:
+            datasets = [self.from_clause.from_dataset]
+            datasets.extend(
+                join_clause.dataset for join_clause in self.from_clause.join_clauses)
+
+            for dataset in datasets:
+                if isinstance(dataset, Query):
+                    subqueries.append(dataset)
+
+        return subqueries
+
+    def _freeze(self):
+        """Marks the query and its subqueries as shared, read-only parse-cache entries
+
+        Returns:
+            None
+        """
+
+        for subquery in self._subqueries():
+            subquery._freeze()
+
+        # Subqueries may themselves be lazy or built from the parse cache, so go
+        # through getattr to materialize their clauses first
+        shared_clauses = {
+            clause_name: getattr(self, clause_name) for clause_name in QUERY_CLAUSE_NAMES}
+
+        for clause_name in QUERY_CLAUSE_NAMES:
+            self.__dict__.pop(clause_name, None)
+
+        self.__dict__.pop('_lazy_segments', None)
+        self._shared_clauses = shared_clauses
+        self._shared = True
+
+    def _writable(self):
+        """Returns a query that is safe to modify in place
+
+        A query built from the parse cache gets private copies of its clauses first; a
+        cached query itself is never modified, so a modified copy is returned instead.
+
+        Returns:
+            query (Query): This query, or a private copy of it
+        """
+
+        if self.__dict__.get('_shared'):
+            query = deepcopy(self)
+
+        else:
+            query = self
+            shared_clauses = self.__dict__.get('_shared_clauses')
+
+            if shared_clauses:
+                # Clauses already accessed are private copies; copy the rest
+                for clause_name in shared_clauses:
+                    getattr(self, clause_name)
+
+                self.__dict__.pop('_shared_clauses')
+
+        return query
+
+    def _optional_clause_equal(self, other, kind):
+        """Returns whether two optional clauses are equal
+
+        Args:
+            other (Query): Another query to compare clauses against 
+            kind (str): The kind of clause to compare against
+        
+        Returns:
+            clauses_equal (bool): True/False whether the clauses are equal
+        """
+
+        clauses_equal = False
+
+        self_has_clause = hasattr(self, f'{kind}_clause')
+        other_has_clause = hasattr(other, f'{kind}_clause')
+
+        if self_has_clause and other_has_clause:
+            clauses_equal = (getattr(self, f'{kind}_clause') ==
+                             getattr(other, f'{kind}_clause'))
+        elif self_has_clause and not other_has_clause:
+            clauses_equal = False
+        elif not self_has_clause and other_has_clause:
+            clauses_equal = False
+        else:
+            clauses_equal = True
+
+        return clauses_equal
+
+
+    def locate_field(self, s_str):
+        """Returns a columns's "location" in the query
+        
+        Args:
+            s_str (str): A short sql string representing a column to be located
+            
+        Returns:
+            locations (list): The resulting list of column locations
+        """
+
+        locations = self.select_clause.locate_field(s_str)
+
+        if self.from_clause:
+            locations.extend(self.from_clause.locate_field(s_str))
+
+        if self.where_clause:
+            locations.extend(self.where_clause.locate_field(s_str))
+
+        return locations
+
+    def delete_node(self, coordinates):
+        """Deletes a node from the sql query
+        
+        Args:
+            coordinates (list): A list of coordinate tuples
+        
+        Returns:
+            query (Query): The resulting query
+        """
+
+        query = self._writable()
+
+        # Delete the innermost nth node (e.g. a comparison), not just the part of the
+        # node, which would break the query; several coordinates can point into the
+        # same node (e.g. both terms of a comparison), and later nodes go first so
+        # earlier indexes stay valid
+        node_paths = set()
+
+        for coordinate in coordinates:
+            last_index = max(i for i, component in enumerate(coordinate)
+                             if not isinstance(component, str))
+            node_paths.add(tuple(coordinate[:last_index + 1]))
+
+        for node_path in sorted(node_paths, reverse=True):
+            node = query
+
+            for component in node_path[:-1]:
+                if isinstance(component, str):
+                    node = getattr(node, component)
+                else:
+                    node = node[component]
+
+            node.pop(node_path[-1])
+
+        query._tidy()
+
+        return query
+
+    def locate_invalid_columns(self, catalog=None):
+        """Locates and returns coordinates of invalid columns
+
+        Column references are checked against the reflected schema catalog instead of
+        running the query, so every invalid column is found in one pass, including
+        those in subquery fields. Columns of tables missing from the catalog (or of a
+        query without a db_conn_str) can't be checked and are assumed valid.
+
+        Args:
+            catalog (SchemaCatalog): The catalog to check against; defaults to the
+                shared catalog for the query's db_conn_str
+
+        Returns:
+            invalid_column_coordinates (list): A list of invalid coordinate tuples
+        """
+
+        invalid_column_coordinates = self._locate_invalid_columns(catalog=catalog)
+
+        return invalid_column_coordinates
+
+    def _locate_invalid_columns(self, outer_scope=None, db_conn_str=None, catalog=None):
+        """Locates invalid columns, resolving correlated references in outer_scope
+
+        Args:
+            outer_scope (dict): The column scope of the enclosing query, if any
+            db_conn_str (str): The connection string to use if the query has none
+            catalog (SchemaCatalog): The catalog to use instead of the shared one
+
+        Returns:
+            invalid_column_coordinates (list): A list of invalid coordinate tuples
+        """
+
+        invalid_column_coordinates = []
+        db_conn_str = self.db_conn_str or db_conn_str
+        catalog = catalog or get_schema_catalog(db_conn_str)
+        scope = {**(outer_scope or {}), **self._column_scope(db_conn_str, catalog)}
+
+        # Select-clause aliases can be referenced outside the select clause
+        select_aliases = [
+            field.alias.lower() for field in self.select_clause.fields if field.alias]
+
+        for coordinate, term_str in self._column_terms():
+            aliases = select_aliases if coordinate[0] != 'select_clause' else []
+
+            for qualifier, column_name in split_column_references(term_str):
+                if not self._column_valid(qualifier, column_name, scope, aliases):
+                    invalid_column_coordinates.append(coordinate)
+                    break
+
+        # Subquery fields see this query's datasets as well as their own
+        for i, field in enumerate(self.select_clause.fields):
+            if field.is_subquery:
+                invalid_column_coordinates.extend(
+                    ('select_clause', 'fields', i, 'query') + coordinate
+                    for coordinate in field.query._locate_invalid_columns(
+                        scope, db_conn_str, catalog))
+
+        return invalid_column_coordinates
+
+    def get_column_names(self, catalog=None):
+        """Returns the names of the query's result columns without running it
+
+        Args:
+            catalog (SchemaCatalog): The catalog to use instead of the shared one
+
+        Returns:
+            column_names (list): The result column names, or None if a wildcard covers
+                a dataset whose columns aren't known
+        """
+
+        scope = self._column_scope(catalog=catalog)
+        column_names = []
+
+        for field in self.select_clause.fields:
+            expression = field.expression.strip()
+            references = split_column_references(expression)
+
+            if field.alias:
+                column_names.append(field.alias)
+                continue
+
+            if expression == '*':
+                covered_column_names = list(scope.values())
+
+            elif len(references) == 1 and references[0][1] == '*':
+                covered_column_names = [scope.get(references[0][0].lower(), [])]
+
+            else:
+                # A plain column is named after the column and anything else after
+                # its expression
+                is_column = re.fullmatch(r'[\w.]+', expression) and references
+                column_names.append(expression.split('.')[-1] if is_column else expression)
+                continue
+
+            if None in covered_column_names:
+                return None
+
+            for dataset_column_names in covered_column_names:
+                column_names.extend(dataset_column_names)
+
+        return column_names
+
+    def _column_scope(self, db_conn_str=None, catalog=None):
+        """Returns the columns visible to the query's clauses
+
+        Args:
+            db_conn_str (str): The connection string to use if the query has none
+            catalog (SchemaCatalog): The catalog to use instead of the shared one
+
+        Returns:
+            scope (dict): Each from-clause dataset's qualifier (its alias or name, or ''
+                for an unaliased subquery) mapped to its lowercase column names, or to
+                None if they aren't known
+        """
+
+        scope = {}
+
+        if not self.from_clause:
+            return scope
+
+        catalog = catalog or get_schema_catalog(self.db_conn_str or db_conn_str)
+        datasets = [self.from_clause.from_dataset]
+        datasets += [join_clause.dataset for join_clause in self.from_clause.join_clauses]
+
+        for dataset in datasets:
+            if isinstance(dataset, Query):
+                qualifier = dataset.alias or ''
+                column_names = dataset.get_column_names(catalog)
+
+                if column_names is not None:
+                    column_names = [column_name.lower() for column_name in column_names]
+
+            else:
+                table_name, alias = split_alias(str(dataset))
+                qualifier = alias or table_name.split('.')[-1]
+                column_names = catalog.get_column_names(table_name) if catalog else None
+
+            scope[qualifier.lower()] = column_names
+
+        return scope
+
+    def _column_terms(self):
+        """Yields every column-bearing term of the query with its coordinates
+
+        Subqueries are skipped; they're checked against their own datasets.
+
+        Yields:
+            coordinate (tuple): The term's coordinates (see locate_field)
+            term_str (str): The term
+        """
+
+        terms = []
+
+        for i, field in enumerate(self.select_clause.fields):
+            terms.append((('select_clause', 'fields', i), field.expression))
+
+        if self.from_clause:
+            for i, join_clause in enumerate(self.from_clause.join_clauses):
+                for coordinate, comparison in join_clause.on_clause.expression.walk_comparisons():
+                    for term_name in ('left_term', 'right_term'):
+                        term_coordinate = (('from_clause', 'join_clauses', i, 'on_clause',
+                                            'expression') + coordinate + (term_name,))
+                        terms.append((term_coordinate, getattr(comparison, term_name)))
+
+        for clause_name in ('where_clause', 'having_clause'):
+            clause = getattr(self, clause_name, None)
+
+            if clause:
+                for coordinate, comparison in clause.expression.walk_comparisons():
+                    for term_name in ('left_term', 'right_term'):
+                        term_coordinate = (clause_name, 'expression') + coordinate + (term_name,)
+                        terms.append((term_coordinate, getattr(comparison, term_name)))
+
+        if getattr(self, 'group_by_clause', None):
+            for i, field_name in enumerate(self.group_by_clause.field_names):
+                terms.append((('group_by_clause', 'field_names', i), field_name))
+
+        for coordinate, term_str in terms:
+            if not re.search(r'\bselect\b', term_str, re.IGNORECASE):
+                yield coordinate, term_str
+
+    @staticmethod
+    def _column_valid(qualifier, column_name, scope, aliases=()):
+        """Returns whether a column reference resolves in a column scope
+
+        Args:
+            qualifier (str): The reference's table name or alias, or None
+            column_name (str): The referenced column name, or '*'
+            scope (dict): A column scope (see _column_scope)
+            aliases (list): Additional valid unqualified names, e.g. select aliases
+
+        Returns:
+            valid (bool): Whether the reference resolves
+        """
+
+        column_name = column_name.lower()
+
+        if qualifier:
+            qualifier = qualifier.lower()
+            column_names = scope.get(qualifier, [])
+
+            valid = qualifier in scope and (
+                column_name == '*'
+                or column_names is None
+                or column_name in column_names
+                or column_name in IMPLICIT_COLUMN_NAMES)
+
+        else:
+            valid = (
+                column_name in aliases
+                or column_name in IMPLICIT_COLUMN_NAMES
+                or any(column_names is None or column_name in column_names
+                       for column_names in scope.values()))
+
+        return valid
+
+    def crop(self, check=False):
+        """Removes every node that references an invalid column
+
+        Invalid nodes are located offline and deleted until none are left, since
+        deleting a join clause's last condition drops the join clause, which can leave
+        more columns invalid. The schema catalog is fetched once for all passes, so the
+        database sees at most one schema-version check (or the first reflection) and,
+        with check, the one check query.
+
+        Args:
+            check (bool): Also run the cropped query once, returning no rows, to
+                confirm the database accepts it
+
+        Returns:
+            cropped_query (Query): The resulting query
+
+        Raises:
+            DBAPIError: With check, the database's error if it rejects the cropped query
+                (e.g. a function or table the offline catalog can't vouch for)
+        """
+
+        cropped_query = self._writable()
+        catalog = get_schema_catalog(cropped_query.db_conn_str)
+        invalid_column_coordinates = cropped_query.locate_invalid_columns(catalog)
+
+        while invalid_column_coordinates:
+            sql_str = str(cropped_query)
+            cropped_query = cropped_query.delete_node(invalid_column_coordinates)
+
+            # Stop if nothing more could be deleted
+            if str(cropped_query) == sql_str:
+                break
+
+            invalid_column_coordinates = cropped_query.locate_invalid_columns(catalog)
+
+        if check and cropped_query.db_conn_str:
+            cropped_query._check_in_database()
+
+        return cropped_query
+
+    def _check_in_database(self):
+        """Has the database compile and run the query without returning any rows
+
+        Raises:
+            DBAPIError: If the database rejects the query
+        """
+
+        check_sql_text = sqltext(f'select * from {self.subquery_str()} sqlpt_check where 1 = 0')
+        params = check_sql_text.compile().params
+
+        with self.db_conn.connect() as db_conn:
+            db_conn.execute(statement=check_sql_text, **params).fetchall()
+
+    def _tidy(self):
+        """Repairs the query after nodes have been deleted or changed
+
+        Empty groups and join clauses left without on-clause conditions are dropped, a
+        leading condition loses its and/or, and subquery fields are re-rendered from
+        their queries.
+
+        Returns:
+            None
+        """
+
+        expressions = []
+
+        if self.from_clause:
+            expressions += [join_clause.on_clause.expression
+                            for join_clause in self.from_clause.join_clauses]
+
+        for clause_name in ('where_clause', 'having_clause'):
+            clause = getattr(self, clause_name, None)
+
+            if clause:
+                expressions.append(clause.expression)
+
+        for expression in expressions:
+            expression.tidy()
+
+        if self.from_clause:
+            for join_clause in list(self.from_clause.join_clauses):
+                if not join_clause.on_clause:
+                    self.from_clause.remove_join_clause(join_clause)
+
+        for field in self.select_clause.fields:
+            subquery = field.__dict__.get('query')
+
+            if subquery is not None and field.is_subquery:
+                subquery._tidy()
+                field.expression = f'({subquery})'
+
+    def parameterize_node(self, coordinates):
+        """Parameterizes a node in the query
+        
+        Args:
+            coordinates (list): A list of coordinate tuples
+
+        Returns:
+            query (Query): The resulting query
+        """
+
+        query = self._writable()
+
+        for coordinate in coordinates:
+            node = query
+            leaf_node = None
+
+            for component in coordinate:
+                if isinstance(component, str):
+                    node = getattr(node, component)
+
+                else:
+                    node = node[component]
+                    leaf_node = node
+
+            # To parameterize a comparison, use a standard approach where the bind
+            # parameter is the right_term, so if the invalid column is the
+            # left_term, swap them first and then give the right_term a standard
+            # bind-parameter name of :[left_term] (replacing . with _)
+            if isinstance(leaf_node, Comparison):
+                if component == 'left_term':
+                    leaf_node.left_term = leaf_node.right_term
+
+                leaf_node.right_term = f":{leaf_node.left_term.replace('.', '_')}"
+
+        query._tidy()
+
+        return query
+
+    def parameterize(self):
+        """Parameterizes a the query
+        
+        Returns:
+            parameterized_query (Query): The resulting query
+        """
+
+        # self.where_clause.parameterize(parameter_fields)
+        invalid_column_coordinates = self.locate_invalid_columns()
+        parameterized_query = self.parameterize_node(
+            invalid_column_coordinates)
+
+        return parameterized_query
+
+    def run(self, result_format='dict', cached=None, params=None, **kwargs):
+        """Runs (executes) the query
+
+        Args:
+            result_format (str): 'dict' for a list of row dictionaries, 'compact' for a
+                CompactQueryResult that stores each row as a tuple, 'columnar' for a
+                ColumnarQueryResult of one array per column, or 'numpy' for a dict of
+                one numpy array per column
+            cached (bool): Whether to use the result cache; defaults to
+                result_cache.enabled. A cached sqlite result is reused until the file
+                changes size or modification time, which can miss a same-size write
+                within the modification-time granularity; call
+                result_cache.invalidate() after such writes
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
+        Returns:
+            row_dicts (list): The resulting list of dictionaries (or compact rows) from
+                running the query
+
+        Raises:
+            Exception: If result_format is not a supported result format
+        """
+
+        params = merge_params(params, kwargs)
+        use_cache = result_cache.enabled if cached is None else cached
+
+        if use_cache:
+            key = result_cache.make_key(result_format, str(self), params, self.db_conn_str)
+            row_dicts = result_cache.fetch(
+                key, self.db_conn_str,
+                lambda: self.run(result_format, cached=False, params=params))
+
+        elif result_format == 'dict':
+            row_dicts = QueryResult(self.iter_rows(params=params))
+
+        else:
+            row_dicts = self._collect_result(self._iter_row_batches(params=params),
+                                             result_format)
+
+        return row_dicts
+
+    async def run_async(self, result_format='dict', params=None, **kwargs):
+        """Runs (executes) the query without blocking the event loop
+
+        Queries on an asyncio driver run on its async engine; any other query runs in
+        the bounded thread pool of service.async_executor.
+
+        Args:
+            result_format (str): The result format (see Query.run)
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
+        Returns:
+            row_dicts (list): The resulting rows, as returned by Query.run
+        """
+
+        params = merge_params(params, kwargs)
+
+        if is_async_db_conn_str(self.db_conn_str):
+            engine = engine_registry.get_async_engine(self.db_conn_str)
+
+            async with engine.connect() as db_conn:
+                rows = await db_conn.execute(sqltext(str(self)), params)
+                row_batches = [(list(rows.keys()), rows.fetchall())]
+
+            row_dicts = self._collect_result(row_batches, result_format)
+
+        else:
+            row_dicts = await async_executor.run(self.run, result_format=result_format,
+                                                 params=params)
+
+        return row_dicts
+
+    @staticmethod
+    def _collect_result(row_batches, result_format='dict'):
+        """Collects batches of raw rows into a result of the given format
+
+        Args:
+            row_batches (iterable): (column_names, row_batch) pairs, as yielded by
+                Query._iter_row_batches
+            result_format (str): The result format (see Query.run)
+
+        Returns:
+            row_dicts (list): The collected result
+
+        Raises:
+            Exception: If result_format is not a supported result format
+        """
+
+        result_classes = {
+            'dict': QueryResult,
+            'compact': CompactQueryResult,
+            'columnar': ColumnarQueryResult,
+            'numpy': ColumnarQueryResult,
+        }
+
+        if result_format not in result_classes:
+            raise Exception(f"Unknown result format '{result_format}'")
+
+        row_dicts = None
+
+        for column_names, row_batch in row_batches:
+            if result_format == 'dict':
+                row_dicts = row_dicts if row_dicts is not None else QueryResult()
+                row_dicts.extend(dict(row._mapping.items()) for row in row_batch)
+
+            else:
+                if row_dicts is None:
+                    row_dicts = result_classes[result_format](columns=column_names)
+
+                row_dicts.extend_rows(row_batch)
+
+        if result_format == 'numpy':
+            row_dicts = row_dicts.to_numpy()
+
+        return row_dicts
+
+    def iter_rows(self, batch_size=1000, batches=False, params=None, **kwargs):
+        """Runs the query and yields its rows while they're fetched
+
+        Rows are fetched batch_size at a time (with a server-side cursor where the
+        driver supports one), so memory stays flat however large the result is.
+
+        Args:
+            batch_size (int): The number of rows to fetch per round trip
+            batches (bool): Yield lists of up to batch_size rows instead of single rows
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
+        Yields:
+            row_dict (dict): A row (or, with batches, a list of rows) as dictionaries
+        """
+
+        params = merge_params(params, kwargs)
+
+        for _, row_batch in self._iter_row_batches(batch_size, params):
+            if not row_batch:
+                continue
+
+            row_dicts = [dict(row._mapping.items()) for row in row_batch]
+
+            if batches:
+                yield row_dicts
+            else:
+                yield from row_dicts
+
+    def _iter_row_batches(self, batch_size=1000, params=None):
+        """Runs the query and yields its raw rows batch_size at a time
+
+        Args:
+            batch_size (int): The number of rows to fetch per round trip
+            params (dict): Parameters to pass when executing
+
+        Yields:
+            column_names (list): The result's column names
+            row_batch (list): Up to batch_size sqlalchemy Row instances; a single empty
+                batch is yielded for an empty result so the column names are known
+        """
+
+        with self.db_conn.connect() as db_conn:
+            if db_conn.dialect.supports_server_side_cursors:
+                db_conn = db_conn.execution_options(stream_results=True)
+
+            rows = db_conn.execute(sqltext(str(self)), params or {})
+            column_names = list(rows.keys())
+            batch_ct = 0
+
+            while True:
+                row_batch = rows.fetchmany(batch_size)
+
+                if not row_batch:
+                    break
+
+                batch_ct += 1
+
+                yield column_names, row_batch
+
+            if not batch_ct:
+                yield column_names, []
+
+    def count(self, materialize=False, cached=None, params=None, **kwargs):
+        """Counts the rows from running the query
+
+        The count runs as select count(*) in the database, so no rows are fetched.
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead
+            cached (bool): Whether to use the result cache (see Query.scalar)
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
+        Returns:
+            ct (int): The count of resulting rows from running the query
+        """
+
+        params = merge_params(params, kwargs)
+
+        if materialize:
+            ct = len(self.run(cached=cached, params=params))
+
+        else:
+            ct = self.scalar(f'select count(*) from {self.subquery_str()} sqlpt_count',
+                             cached=cached, params=params)
+
+        return ct
+
+    async def count_async(self, materialize=False, params=None, **kwargs):
+        """Counts the rows from running the query without blocking the event loop
 
-            for sqlparse_comparison in token_list:
-                if isinstance(sqlparse_comparison, SqlParseComparison):
-                    comparison_tokens = remove_whitespace(sqlparse_comparison.tokens)
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
-                    els = [comparison_token.value
-                           for comparison_token in comparison_tokens]
+        Returns:
+            ct (int): The count of resulting rows from running the query
+        """
 
-                    elements.extend(els)
+        params = merge_params(params, kwargs)
 
-                else:
-                    elements.append(sqlparse_comparison.value)
+        if materialize:
+            ct = len(await self.run_async(params=params))
 
-        if elements[0] in ('and', 'or'):
-            bool_conjunction = elements.pop(0)
-        elif elements[0] == 'not':
-            bool_sign = elements.pop(0)
         else:
-            bool_conjunction = ''
+            ct = await self.scalar_async(
+                f'select count(*) from {self.subquery_str()} sqlpt_count', params=params)
 
-        if elements[0] == 'not':
-            bool_sign = elements.pop(0)
-        else:
-            bool_sign = ''
+        return ct
 
-        left_term = left_term or elements[0]
-        operator = operator or elements[1]
-        right_term = right_term or elements[2]
+    def scalar(self, sql_str=None, cached=None, params=None, **kwargs):
+        """Runs the query (or a sql string against the query's database) and returns
+            the first column of the first row
 
-        self.bool_conjunction = bool_conjunction
-        self.bool_sign = bool_sign
-        self.left_term = left_term
-        self.operator = operator
-        self.right_term = right_term
+        Args:
+            sql_str (str): A sql string to run instead of the query itself
+            cached (bool): Whether to use the result cache; defaults to
+                result_cache.enabled. A cached sqlite result is reused until the file
+                changes size or modification time, which can miss a same-size write
+                within the modification-time granularity; call
+                result_cache.invalidate() after such writes
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
-    def __hash__(self):
-        return hash(str(self))
+        Returns:
+            value (object): The first column of the first row, or None if no rows
+        """
 
-    def __str__(self):
-        string = ''
+        sql_str = sql_str or str(self)
+        params = merge_params(params, kwargs)
 
-        if self.bool_conjunction:
-            string += f'{self.bool_conjunction} '
+        use_cache = result_cache.enabled if cached is None else cached
 
-        if self.bool_sign:
-            string += f'{self.bool_sign} '
+        if use_cache:
+            key = result_cache.make_key('scalar', sql_str, params, self.db_conn_str)
+            value = result_cache.fetch(key, self.db_conn_str,
+                                       lambda: self.scalar(sql_str, cached=False, params=params))
 
-        string += f'{self.left_term} '
-        string += f'{self.operator} '
-        string += f'{self.right_term}'
+        else:
+            with self.db_conn.connect() as db_conn:
+                value = db_conn.execute(sqltext(sql_str), params).scalar()
 
-        return string
+        return value
 
-    def is_equivalent_to(self, other):
-        """Returns equivalence of the comparison logic; this is different than checking
-            for equality (__eq__)
+    async def scalar_async(self, sql_str=None, params=None, **kwargs):
+        """Returns the first column of the first row (see Query.scalar) without
+            blocking the event loop
 
         Args:
-            other (Comparison): Another comparison to compare to
-            
+            sql_str (str): A sql string to run instead of the query itself
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
         Returns:
-            equivalent (bool): Whether the comparisons are logically equivalent
+            value (object): The first column of the first row, or None if no rows
         """
 
-        equivalent = False
-
-        if isinstance(other, self.__class__):
-            if self.operator == '=':
-                operator_equivalent = self.operator == other.operator
+        params = merge_params(params, kwargs)
 
-                expressions_equivalent = (
-                    {self.left_term, self.right_term} ==
-                    {other.left_term, other.right_term})
+        if is_async_db_conn_str(self.db_conn_str):
+            engine = engine_registry.get_async_engine(self.db_conn_str)
 
-            if operator_equivalent and expressions_equivalent:
-                equivalent = True
+            async with engine.connect() as db_conn:
+                rows = await db_conn.execute(sqltext(sql_str or str(self)), params)
+                value = rows.scalar()
 
-        return equivalent
+        else:
+            value = await async_executor.run(self.scalar, sql_str, params=params)
 
+        return value
 
-class WhereClause(ExpressionClause):
-    """A where clause of a sql query"""
+    def counts(self, mode='exact', max_workers=8, union_all=False):
+        """Counts the rows from running the query and tables within the query
 
-    def __init__(self, s_str=None, expression=None, token_list=None):
-        super().__init__(s_str=s_str, leading_word='where', expression=expression, token_list=token_list)
+        The counts run in parallel, and a table that appears more than once (e.g. a
+        self join) is counted once.
 
-    # FUTURE: Test this in test_classes
-    @staticmethod
-    def _parse_where_clause(s_str):
-        """Parses and returns a where-clause token list based on the given string
-        
         Args:
-            s_str (str): A short sql string representing a where clause
+            mode (str): How to count the tables ('exact', 'fast' or 'estimate'; see
+                Table.count); the query itself is always counted exactly
+            max_workers (int): The maximum number of counts to run at once; 1 runs
+                them one after another
+            union_all (bool): Count every dataset in one union all round trip
+                instead of one query per dataset (exact mode only)
 
         Returns:
-            token_list (list): A token list
+            counts_dict (CountsResult): The count of rows from running the query and its
+                datasets, with the seconds each count took in counts_dict.timings (with
+                union_all, every dataset shares the union's time)
+
+        Raises:
+            Exception: If union_all is requested with a mode other than 'exact'
         """
 
-        sql_tokens = (
-            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+        if union_all and mode != 'exact':
+            raise Exception("union_all counts are only available in 'exact' mode")
 
-        token_list = []
+        datasets = [self.from_clause.from_dataset]
+        datasets += [join_clause.dataset for join_clause in self.from_clause.join_clauses]
 
-        start_appending = False
+        # Map each distinct count target to the dataset names that share it
+        dataset_names = {}
+        count_targets = {}
 
-        for sql_token in sql_tokens:
-            if type(sql_token) == Token:
-                if sql_token.value.lower() == 'from':
-                    continue
+        for dataset in datasets:
+            if isinstance(dataset, Table):
+                count_target = dataset.name.split()[0]
+                dataset_name = dataset.name
+            else:
+                count_target = f'{dataset.subquery_str()} sqlpt_count'
+                dataset_name = str(dataset)
 
-            elif isinstance(sql_token, Where):
-                start_appending = True
+            count_targets.setdefault(count_target, dataset)
+            dataset_names.setdefault(count_target, []).append(dataset_name)
 
-            if start_appending:
-                token_list.append(sql_token)
+        calls = {'query': self.count}
 
-        return token_list
+        if union_all:
+            calls['union_all'] = lambda: self._count_union_all(list(count_targets))
 
-    # FUTURE: Test this in test_classes
-    def parse_expression_clause(self, sql_str):
-        """Returns a where-clause token list based on the given string
-        
-        Args:
-            s_str (str): A short sql string representing a where clause
+        else:
+            for count_target, dataset in count_targets.items():
+                if isinstance(dataset, Table):
+                    table = Table(name=count_target, db_conn_str=dataset.db_conn_str)
+                    calls[count_target] = functools.partial(table.count, mode=mode)
+                else:
+                    calls[count_target] = dataset.count
 
-        Returns:
-            token_list (list): A token list
-        """
+        values, timings = run_timed(calls, max_workers=max_workers)
 
-        token_list = self._parse_where_clause(sql_str)
+        if union_all:
+            values.update(values.pop('union_all'))
 
-        return token_list
+        counts_dict = CountsResult({'query': values['query']})
+        counts_dict.timings['query'] = timings['query']
+
+        for count_target, names in dataset_names.items():
+            for dataset_name in names:
+                counts_dict[dataset_name] = values[count_target]
+                counts_dict.timings[dataset_name] = timings.get(count_target,
+                                                                timings.get('union_all'))
+
+        return counts_dict
+
+    def profile_joins(self, max_workers=1, cached=None, params=None, **kwargs):
+        """Counts the rows of the from-clause dataset and then of each successive join,
+            to show which join multiplies (or drops) rows
+
+        The where clause is left out, so each count is the joins' own effect.
 
-    def locate_field(self, s_str):
-        """Returns a field's "location" in the where clause
-        
         Args:
-            s_str (str): A short sql string representing a field to be located
-            
+            max_workers (int): The maximum number of step counts to run at once
+            cached (bool): Whether to use the result cache (see Query.scalar)
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+
         Returns:
-            locations (list): The resulting list of field locations
+            steps (list): A JoinProfileStep per step, starting with the from-clause
+                dataset alone; fan_out is the step's row count over the previous step's
+                (None for the first step or after an empty step)
         """
 
-        locations = []
-
-        for i, comparison in enumerate(self.expression.comparisons):
-            if s_str in comparison.left_term:
-                location_tuple = ('where_clause', 'expression', 'comparisons',
-                                  i, 'left_term')
-                locations.append(location_tuple)
-            elif s_str in comparison.right_term:
-                location_tuple = ('where_clause', 'expression', 'comparisons',
-                                  i, 'right_term')
-                locations.append(location_tuple)
+        params = merge_params(params, kwargs)
+        join_clauses = self.from_clause.join_clauses
+        calls = {}
 
-        return locations
+        for step in range(len(join_clauses) + 1):
+            from_clause = FromClause(from_dataset=self.from_clause.from_dataset,
+                                     join_clauses=join_clauses[:step])
+            step_query = Query(select_clause=SelectClause('select count(*)'),
+                               from_clause=from_clause,
+                               db_conn_str=self.db_conn_str)
 
-    # FUTURE: fuse()
-    # FUTURE: parameterize()
+            calls[step] = functools.partial(step_query.scalar, cached=cached, params=params)
 
+        row_counts, timings = run_timed(calls, max_workers=max_workers)
 
-class GroupByClause:
-    """ docstring tbd """
-    field_names: list
+        steps = []
+        previous_row_count = None
 
-    def __init__(self, s_str=None, field_names=None):
-        self.field_names = field_names
+        for step, row_count in row_counts.items():
+            if step:
+                join_clause = join_clauses[step - 1]
+                dataset = join_clause.dataset
+                join_clause_str = str(join_clause)
+            else:
+                dataset = self.from_clause.from_dataset
+                join_clause_str = None
 
-    def __str__(self):
-        if self.field_names:
-            string = 'group by '
+            if isinstance(dataset, Query):
+                dataset_name = dataset.subquery_str(alias=True)
+            else:
+                dataset_name = str(dataset)
 
-            for field_name in self.field_names:
-                string += f'{field_name}, '
+            fan_out = row_count / previous_row_count if previous_row_count else None
 
-            # Remove trailing comma and space
-            string = string[:-2]
+            steps.append(JoinProfileStep(step=step,
+                                         dataset=dataset_name,
+                                         join_clause=join_clause_str,
+                                         row_count=row_count,
+                                         fan_out=fan_out,
+                                         seconds=timings[step]))
 
-        return string
+            previous_row_count = row_count
 
+        return steps
 
-class HavingClause(ExpressionClause):
-    """A having clause of a sql query"""
+    def profile_filters(self, params=None, **kwargs):
+        """Measures the selectivity of each where-clause predicate in a single scan
 
-    def __init__(self, s_str=None, expression=None, token_list=None):
-        super().__init__(s_str=s_str, leading_word='having', expression=expression, token_list=token_list)
+        One query counts, as sum(case when ... then 1 else 0 end) columns, the rows
+        matching all predicates, each predicate alone and all the other predicates, so
+        no predicate needs a query of its own. Group by and having are left out.
 
-    @staticmethod
-    def parse_having_clause(s_str):
-        """Parses and returns a having-clause token list based on the given string
-        
         Args:
-            s_str (str): A short sql string representing a having clause
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
         Returns:
-            token_list (list): A token list
+            profiles (list): A PredicateProfile per predicate; selectivity is the share
+                of all rows the predicate keeps alone, and marginal_selectivity the
+                share of the other predicates' rows it keeps (None if there are none)
         """
 
-        sql_tokens = (
-            remove_whitespace(sqlparse.parse(s_str)[0].tokens))
+        comparisons = self.where_clause.expression.comparisons if self.where_clause else []
+        predicate_strs = ['1 = 1', self._predicate_str(comparisons)]
 
-        token_list = []
+        for i, comparison in enumerate(comparisons):
+            other_comparisons = comparisons[:i] + comparisons[i + 1:]
 
-        for sql_token in sql_tokens:
-            token_list.append(sql_token)
+            predicate_strs.append(self._predicate_str([comparison]))
+            predicate_strs.append(self._predicate_str(other_comparisons))
 
-        return token_list
+        counts = self._count_matches(predicate_strs, params=merge_params(params, kwargs))
+
+        total_row_count = counts[0]
+        filtered_row_count = counts[1]
+        profiles = []
+
+        for i, comparison in enumerate(comparisons):
+            row_count = counts[2 + 2 * i]
+            row_count_without = counts[3 + 2 * i]
+
+            profiles.append(PredicateProfile(
+                predicate=self._predicate_str([comparison]),
+                total_row_count=total_row_count,
+                row_count=row_count,
+                selectivity=row_count / total_row_count if total_row_count else None,
+                row_count_without=row_count_without,
+                marginal_selectivity=(filtered_row_count / row_count_without
+                                      if row_count_without else None)))
+
+        return profiles
+
+    def count_variants(self, variants, params=None, **kwargs):
+        """Counts the query's rows under many where-clause variants in a single scan
+
+        Each variant becomes a sum(case when ... then 1 else 0 end) column over the
+        shared from clause, so N counts cost one query. The query's own where clause,
+        if any, still filters the scan; group by and having are left out.
 
-    def parse_expression_clause(self, s_str):
-        """Returns a having-clause token list based on the given string
-        
         Args:
-            s_str (str): A short sql string representing a having clause
+            variants (dict): Where clauses (WhereClause objects or strings, with or
+                without the leading where) by name; None counts every row
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
         Returns:
-            token_list (list): A token list
+            counts (dict): The row count by variant name
         """
 
-        token_list = self.parse_having_clause(s_str)
+        if not variants:
+            return {}
 
-        return token_list
+        predicate_strs = []
 
+        for where_clause in variants.values():
+            if where_clause is None:
+                predicate_str = '1 = 1'
+            else:
+                if isinstance(where_clause, str):
+                    if not where_clause.strip().lower().startswith('where'):
+                        where_clause = f'where {where_clause}'
 
-class OrderByClause:
-    """ docstring tbd """
-    order_columns: list
+                    where_clause = WhereClause(where_clause)
 
-    def __init__(self, s_str=None, order_columns=None):
-        order_columns = order_columns or []
+                predicate_str = self._predicate_str(where_clause.expression.comparisons)
 
-        self.order_columns = order_columns
+            predicate_strs.append(predicate_str)
 
-    def __str__(self):
-        if self.order_columns:
-            string = 'order by '
+        row_counts = self._count_matches(predicate_strs, where_clause=self.where_clause,
+                                         params=merge_params(params, kwargs))
+        counts = dict(zip(variants, row_counts))
 
-            for order_column in self.order_columns:
-                string += f'{order_column["column"]} {order_column["direction"]}, '
+        return counts
 
-            # Remove trailing comma and space
-            string = string[:-2]
+    def _count_matches(self, predicate_strs, where_clause=None, params=None):
+        """Counts the rows matching each predicate in a single scan of the from clause
 
-        return string
+        Each predicate becomes a sum(case when ... then 1 else 0 end) column, so any
+        number of counts cost one query.
 
+        Args:
+            predicate_strs (list): Predicate strings to count the matching rows of
+            where_clause (WhereClause): A where clause to filter the scan by, if any
+            params (dict): Parameters to pass when executing
 
-@dataclass
-class Query(DataSet):
-    """A sql query"""
-    sql_str: str = dataclass_field(repr=False)
-    select_clause: SelectClause
-    from_clause: FromClause
-    where_clause: WhereClause
-    group_by_clause: GroupByClause
-    having_clause: HavingClause
+        Returns:
+            counts (list): The matching row count per predicate, in order
+        """
 
-    def __init__(self, sql_str=None, select_clause=None, from_clause=None,
-                 where_clause=None, group_by_clause=None, having_clause=None,
-                 db_conn_str=None):
+        count_strs = [f'sum(case when ({predicate_str}) then 1 else 0 end) sqlpt_count_{i}'
+                      for i, predicate_str in enumerate(predicate_strs)]
 
-        if sql_str:
-            # Accommodate subqueries surrounded by parens
-            sql_str = sql_str[1:-1] if sql_str[:7] == '(select' else sql_str
+        count_query = Query(select_clause=SelectClause(f'select {", ".join(count_strs)}'),
+                            from_clause=self.from_clause,
+                            where_clause=where_clause,
+                            db_conn_str=self.db_conn_str)
 
-            # FUTURE: Do away with these "or None"s?
-            select_clause = SelectClause(sql_str) or None
-            from_clause = FromClause(s_str=sql_str, db_conn_str=db_conn_str) or None
-            where_clause = WhereClause(s_str=sql_str) or None
-            group_by_clause = None
-            having_clause = None
+        with self.db_conn.connect() as db_conn:
+            row = db_conn.execute(sqltext(str(count_query)), params or {}).one()
 
-        self.sql_str = sql_str
-        self.select_clause = select_clause
-        self.from_clause = from_clause
-        self.where_clause = where_clause
-        self.group_by_clause = group_by_clause
-        self.having_clause = having_clause
-        self.db_conn_str = db_conn_str
+        counts = [ct or 0 for ct in row]
 
-    def __hash__(self):
-        return hash(str(self))
+        return counts
 
-    # FUTURE: Also implement is_equivalent_to
-    def __eq__(self, other):
-        query_equal = False
+    def explain(self, params=None, **kwargs):
+        """Returns the database's plan for running the query
 
-        if isinstance(other, Query):
-            select_clauses_equal = self.select_clause == other.select_clause
-            from_clauses_equal = self._optional_clause_equal(other, 'from')
-            where_clauses_equal = self._optional_clause_equal(other, 'where')
+        Args:
+            params (dict): Parameters to pass when explaining, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when explaining
 
-            query_equal = (
-                select_clauses_equal and
-                from_clauses_equal and
-                where_clauses_equal)
+        Returns:
+            query_plan (QueryPlan): The plan's nodes, mapped to the query's datasets
+                and join clauses
+        """
 
-        return query_equal
+        query_plan = get_query_plan(self.db_conn_str, str(self), self._plan_datasets(),
+                                    merge_params(params, kwargs))
 
-    def __bool__(self):
-        if self.select_clause:
-            return True
+        return query_plan
 
-        return False
+    def advise_indexes(self, verify=True, params=None, **kwargs):
+        """Suggests composite indexes from the join on-clause and where-clause
+            comparisons
 
-    def __str__(self):
-        string = str(self.select_clause)
+        For each table, columns compared with = (or is) come first and then the first
+        column compared with a range operator. A table's join columns lead its index
+        only when it's the inner side of the join, so each table gets a candidate with
+        and one without them; verification keeps the first that turns a scan into a
+        search. Candidates an existing index or unique key already serves are left
+        out. Where clauses with or are skipped, since their predicates can't share an
+        index.
 
-        if self.from_clause:
-            if str(self.from_clause):
-                string += f' {self.from_clause}'
+        Args:
+            verify (bool): Explain the query on an in-memory copy of the schema (and
+                its statistics) with and without each suggested index (sqlite only)
+            params (dict): Parameters to pass when explaining, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when explaining
+
+        Returns:
+            suggestions (list): An IndexSuggestion per table that would benefit; once
+                verified, only those that turn a scan of the table into a search
+        """
+
+        catalog = get_schema_catalog(self.db_conn_str)
+        tables = {}
+
+        for dataset, _ in self._plan_datasets()[:len(self.from_clause.join_clauses) + 1]:
+            if isinstance(dataset, Table):
+                table_name, alias = split_alias(dataset.name)
+                tables[(alias or table_name).lower()] = table_name
+
+        comparisons = []
+
+        for join_clause in self.from_clause.join_clauses:
+            comparisons += join_clause.on_clause.expression.comparisons
+
+        if self.where_clause:
+            where_comparisons = self.where_clause.expression.comparisons
+
+            if not any(comparison.bool_conjunction.lower() == 'or'
+                       for comparison in where_comparisons):
+                comparisons += where_comparisons
+
+        # Parenthesized groups are left out
+        comparisons = [comparison for comparison in comparisons
+                       if isinstance(comparison, Comparison)]
+
+        join_columns = {qualifier: [] for qualifier in tables}
+        equality_columns = {qualifier: [] for qualifier in tables}
+        range_columns = {qualifier: [] for qualifier in tables}
 
-        if hasattr(self, 'where_clause'):
-            if self.where_clause:
-                string += f' {self.where_clause}'
+        for comparison in comparisons:
+            operator = comparison.operator.lower()
+            columns = [self._index_column(term_str, tables, catalog)
+                       for term_str in (comparison.left_term, comparison.right_term)]
 
-        if hasattr(self, 'group_by_clause'):
-            if self.group_by_clause:
-                string += f' {self.group_by_clause}'
+            if operator in ('=', '==', 'is'):
+                columns_by_kind = join_columns if all(columns) else equality_columns
+            elif operator in ('<', '>', '<=', '>=', 'like'):
+                columns_by_kind = range_columns
+            else:
+                continue
 
-        if hasattr(self, 'having_clause'):
-            if self.having_clause:
-                string += f' {self.having_clause}'
+            for column in filter(None, columns):
+                if column[1] not in columns_by_kind[column[0]]:
+                    columns_by_kind[column[0]].append(column[1])
 
-        return string
+        candidates = []
 
-    def _optional_clause_equal(self, other, kind):
-        """Returns whether two optional clauses are equal
+        for qualifier, table_name in tables.items():
+            filter_columns = [column for column in equality_columns[qualifier]
+                              if column not in join_columns[qualifier]]
+            table_candidates = []
 
-        Args:
-            other (Query): Another query to compare clauses against 
-            kind (str): The kind of clause to compare against
-        
-        Returns:
-            clauses_equal (bool): True/False whether the clauses are equal
-        """
+            for columns in (join_columns[qualifier] + filter_columns, filter_columns):
+                range_column = next((column for column in range_columns[qualifier]
+                                     if column not in columns), None)
 
-        clauses_equal = False
+                if ((not columns and not range_column)
+                        or self._index_exists(catalog, table_name, columns, range_column)):
+                    continue
 
-        self_has_clause = hasattr(self, f'{kind}_clause')
-        other_has_clause = hasattr(other, f'{kind}_clause')
+                columns = columns + ([range_column] if range_column else [])
+                index_name = f'sqlpt_{table_name}_{"_".join(columns)}'
+                create_sql = f'create index {index_name} on {table_name} ({", ".join(columns)})'
+                suggestion = IndexSuggestion(table=table_name, columns=columns,
+                                             index_name=index_name, create_sql=create_sql)
 
-        if self_has_clause and other_has_clause:
-            clauses_equal = (getattr(self, f'{kind}_clause') ==
-                             getattr(other, f'{kind}_clause'))
-        elif self_has_clause and not other_has_clause:
-            clauses_equal = False
-        elif not self_has_clause and other_has_clause:
-            clauses_equal = False
-        else:
-            clauses_equal = True
+                if suggestion not in table_candidates:
+                    table_candidates.append(suggestion)
 
-        return clauses_equal
+            if table_candidates:
+                candidates.append((qualifier, table_candidates))
 
+        verified = bool(verify and candidates and engine_registry.get_engine(
+            self.db_conn_str).dialect.name == 'sqlite')
 
-    def locate_field(self, s_str):
-        """Returns a columns's "location" in the query
-        
-        Args:
-            s_str (str): A short sql string representing a column to be located
-            
-        Returns:
-            locations (list): The resulting list of column locations
-        """
+        if verified:
+            self._verify_index_suggestions(candidates, merge_params(params, kwargs))
 
-        locations = self.select_clause.locate_field(s_str)
+        suggestions = []
 
-        if self.from_clause:
-            locations.extend(self.from_clause.locate_field(s_str))
+        for _, table_candidates in candidates:
+            suggestion = next((suggestion for suggestion in table_candidates
+                               if suggestion.turns_scan_into_search),
+                              None if verified else table_candidates[0])
 
-        if self.where_clause:
-            locations.extend(self.where_clause.locate_field(s_str))
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
 
-        return locations
+        return suggestions
 
-    def delete_node(self, coordinates):
-        """Deletes a node from the sql query
-        
-        Args:
-            coordinates (list): A list of coordinate tuples
-        
-        Returns:
-            self (Query): The resulting query
-        """
+    @staticmethod
+    def _index_column(term_str, tables, catalog):
+        """Returns the (qualifier, column_name) a term refers to if it's a plain column
+            of one of the tables, or None"""
 
-        node = self
+        column = None
+        references = split_column_references(term_str)
 
-        for coordinate in coordinates:
-            for component in coordinate:
-                if isinstance(component, str):
-                    node = getattr(node, component)
+        if re.fullmatch(r'[\w.]+', term_str.strip()) and len(references) == 1:
+            qualifier, column_name = references[0]
+            column_name = column_name.lower()
 
-                else:
-                    # Delete the nth node, not just the part of the node, which
-                    # would break the query (hence the `break`)
-                    node.pop(component)
-                    break
+            if qualifier:
+                qualifier = qualifier.lower()
+                qualifiers = [qualifier] if qualifier in tables else []
+            else:
+                qualifiers = [
+                    qualifier for qualifier, table_name in tables.items()
+                    if column_name in (catalog.get_column_names(table_name) or [])]
 
-        return self
+            if len(qualifiers) == 1 and column_name != '*':
+                column = (qualifiers[0], column_name)
 
-    def locate_invalid_columns(self):
-        """Locates and returns coordinates of invalid columns
-        
-        Returns:
-            invalid_column_coordinates (list): A list of invalid coordinate tuples
-        """
+        return column
 
-        invalid_column_coordinates = []
+    @staticmethod
+    def _index_exists(catalog, table_name, equality_columns, range_column):
+        """Returns whether an existing index or unique key already serves the columns"""
 
-        try:
-            self.run()
+        index_exists = False
 
-        except exc.OperationalError as e:
-            if 'no such column' in str(e):
-                error_msg = str(e).split('\n')[0]
-                invalid_column_name = error_msg.split(': ')[1]
-                invalid_column_coordinates = self.locate_field(
-                    invalid_column_name)
+        for unique_key in catalog.get_unique_keys(table_name):
+            if equality_columns and set(unique_key) <= set(equality_columns):
+                index_exists = True
 
-        return invalid_column_coordinates
+        key_column_lists = [[column_name.lower() for column_name in index['column_names']
+                             if column_name]
+                            for index in catalog.get_indexes(table_name)]
+        key_column_lists += catalog.get_unique_keys(table_name)
 
-    def crop(self):
-        """Removes a node from the query
-        
-        Returns:
-            cropped_query (Query): The resulting query
-        """
+        for key_columns in key_column_lists:
+            leading_columns = key_columns[:len(equality_columns)]
+            next_column = key_columns[len(equality_columns):len(equality_columns) + 1]
 
-        invalid_column_coordinates = self.locate_invalid_columns()
-        cropped_query = self.delete_node(invalid_column_coordinates)
+            if (set(leading_columns) == set(equality_columns)
+                    and (range_column is None or next_column == [range_column])):
+                index_exists = True
 
-        return cropped_query
+        return index_exists
 
-    def parameterize_node(self, coordinates):
-        """Parameterizes a node in the query
-        
-        Args:
-            coordinates (list): A list of coordinate tuples
+    def _verify_index_suggestions(self, candidates, params=None):
+        """Explains the query on a scratch in-memory copy of the schema, without and
+            then with each candidate index, and records the plans on the candidates"""
 
-        Returns:
-            self (Query): The resulting query
-        """
+        sql_str = str(self)
+        params = {**sqltext(sql_str).compile().params, **(params or {})}
+        scratch_engine = create_engine('sqlite://')
 
-        node = self
-        leaf_node = None
+        with self.db_conn.connect() as db_conn, scratch_engine.connect() as scratch_conn:
+            copy_sqlite_schema(db_conn, scratch_conn)
+            plan_before = explain_sqlite_query(scratch_conn, sql_str, params)
 
-        for coordinate in coordinates:
-            for component in coordinate:
-                if isinstance(component, str):
-                    node = getattr(node, component)
+            for qualifier, suggestion in ((qualifier, suggestion)
+                                          for qualifier, table_candidates in candidates
+                                          for suggestion in table_candidates):
+                scratch_conn.exec_driver_sql(suggestion.create_sql)
+                plan_after = explain_sqlite_query(scratch_conn, sql_str, params)
+                scratch_conn.exec_driver_sql(f'drop index {suggestion.index_name}')
 
-                else:
-                    node = node[component]
-                    leaf_node = node
+                node_before = next((node for node in plan_before.walk()
+                                    if (node.table or '').lower() == qualifier), None)
+                node_after = next((node for node in plan_after.walk()
+                                   if (node.table or '').lower() == qualifier), None)
 
-        # Assuming that leaf_node is an instance of Comparison
-        # To parameterize a comparison, use a standard approach where the bind
-        # parameter is the right_term, so if the invalid column is the
-        # left_term, swap them first and then give the right_term a standard
-        # bind-parameter name of :[left_term] (replacing . with _)
-        if leaf_node:
-            if component == 'left_term':
-                leaf_node.left_term = leaf_node.right_term
+                suggestion.plan_before = node_before.detail if node_before else None
+                suggestion.plan_after = node_after.detail if node_after else None
+                suggestion.turns_scan_into_search = bool(
+                    node_before and node_after
+                    and node_before.kind == 'scan'
+                    and node_after.kind == 'search'
+                    and node_after.index == suggestion.index_name)
 
-            leaf_node.right_term = f":{leaf_node.left_term.replace('.', '_')}"
+        scratch_engine.dispose()
 
-        return self
+    def _plan_datasets(self):
+        """Returns the (dataset, join_clause) pairs a plan of the query can read, with
+            those of subquery fields after the query's own"""
 
-    def parameterize(self):
-        """Parameterizes a the query
-        
-        Returns:
-            parameterized_query (Query): The resulting query
-        """
+        plan_datasets = []
 
-        # self.where_clause.parameterize(parameter_fields)
-        invalid_column_coordinates = self.locate_invalid_columns()
-        parameterized_query = self.parameterize_node(
-            invalid_column_coordinates)
+        if self.from_clause:
+            plan_datasets.append((self.from_clause.from_dataset, None))
+            plan_datasets += [(join_clause.dataset, join_clause)
+                              for join_clause in self.from_clause.join_clauses]
 
-        return parameterized_query
+        for field in self.select_clause.fields:
+            if field.is_subquery:
+                plan_datasets += field.query._plan_datasets()
 
-    def run(self, **kwargs):
-        """Runs (executes) the query
+        return plan_datasets
+
+    @staticmethod
+    def _predicate_str(comparisons):
+        """Returns comparisons as a standalone predicate, dropping the leading and/or
 
         Args:
-            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+            comparisons (list): Comparisons in where-clause order
 
         Returns:
-            row_dicts (list): The resulting list of dictionaries from running the query
+            predicate_str (str): The predicate, or 1 = 1 if there are no comparisons
         """
 
-        rows = []
+        if not comparisons:
+            return '1 = 1'
 
-        with self.db_conn.connect() as db_conn:
-            rows = db_conn.execute(statement=sqltext(str(self)), **kwargs)
-            row_dicts = QueryResult()
+        first_comparison = copy(comparisons[0])
+        first_comparison.bool_conjunction = ''
 
-            for row in rows:
-                row_dict = dict(row._mapping.items())
-                row_dicts.append(row_dict)
+        predicate_str = str(Expression(comparisons=[first_comparison] + comparisons[1:]))
 
-        return row_dicts
+        return predicate_str
 
-    def count(self, **kwargs):
-        """Counts the rows from running the query
+    def _count_union_all(self, count_targets):
+        """Counts several datasets in one round trip
 
         Args:
-            kwargs (kwargs): Keyword arguments to pass as parameters when executing
+            count_targets (list): Table names or aliased subqueries to count
 
         Returns:
-            ct (int): The count of resulting rows from running the query
+            counts_dict (dict): The count targets mapped to their row counts
         """
 
-        ct = len(self.run(**kwargs))
+        union_sql_str = ' union all '.join(
+            f'select {i} sqlpt_index, count(*) sqlpt_count from {count_target}'
+            for i, count_target in enumerate(count_targets))
 
-        return ct
+        with self.db_conn.connect() as db_conn:
+            rows = db_conn.execute(statement=sqltext(union_sql_str)).fetchall()
 
-    def counts(self):
-        """Counts the rows from running the query and tables within the query
+        counts_dict = {count_targets[index]: ct for index, ct in rows}
+
+        return counts_dict
+
+    def rows_exist(self, cached=None, params=None, **kwargs):
+        """Checks if rows exist in the query
+        
+        Args:
+            cached (bool): Whether to use the result cache (see Query.scalar)
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
         Returns:
-            counts_dict (dict): The count of rows from running the query and its tables
+            rows_exist_bool (bool): Whether rows exist in the query results or not
         """
 
-        counts_dict = {}
-        query_count = self.count()
-        counts_dict['query'] = query_count
+        # exists stops at the first row instead of counting them all
+        exists_value = self.scalar(f'select exists {self.subquery_str()}', cached=cached,
+                                   params=merge_params(params, kwargs))
 
-        from_dataset = self.from_clause.from_dataset
-        counts_dict[from_dataset.name] = from_dataset.count()
+        rows_exist_bool = True if exists_value else False
 
-        for join_clause in self.from_clause.join_clauses:
-            counts_dict[join_clause.dataset.name] = join_clause.dataset.count()
+        return rows_exist_bool
 
-        return counts_dict
+    async def rows_exist_async(self, params=None, **kwargs):
+        """Checks if rows exist in the query without blocking the event loop
 
-    def rows_exist(self, **kwargs):
-        """Checks if rows exist in the query
-        
         Args:
+            params (dict): Parameters to pass when executing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
             kwargs (kwargs): Keyword arguments to pass as parameters when executing
 
         Returns:
             rows_exist_bool (bool): Whether rows exist in the query results or not
         """
 
-        row_count = self.count(**kwargs)
+        exists_value = await self.scalar_async(f'select exists {self.subquery_str()}',
+                                               params=merge_params(params, kwargs))
 
-        rows_exist_bool = True if row_count != 0 else False
+        rows_exist_bool = True if exists_value else False
 
         return rows_exist_bool
 
@@ -1331,15 +3522,16 @@ class Query(DataSet):
             scalarized_query (Query): The resulting query
         """
 
+        query = self._writable()
         join_clauses_to_remove = []
 
-        for join_clause in self.from_clause.join_clauses:
+        for join_clause in query.from_clause.join_clauses:
             if join_clause.kind == 'left':
                 column_names = join_clause.dataset.get_column_names()
 
-                for field in self.select_clause.fields:
+                for field in query.select_clause.fields:
                     if field.expression in column_names:
-                        self.select_clause.remove_field(field)
+                        query.select_clause.remove_field(field)
 
                         subquery_select_clause = SelectClause(fields=[field])
                         subquery_from_clause = FromClause(
@@ -1356,17 +3548,17 @@ class Query(DataSet):
                         expression = f'({str(subquery)})'
                         subquery_field = Field(
                             expression=expression, alias=alias, query=subquery, db_conn_str=join_clause.dataset.db_conn_str)
-                        self.select_clause.add_field(subquery_field)
+                        query.select_clause.add_field(subquery_field)
 
                         join_clauses_to_remove.append(join_clause)
 
         for join_clause_to_remove in join_clauses_to_remove:
-            self.from_clause.remove_join_clause(join_clause_to_remove)
+            query.from_clause.remove_join_clause(join_clause_to_remove)
 
         scalarized_query = Query(
-            select_clause=self.select_clause,
-            from_clause=self.from_clause,
-            where_clause=self.where_clause)
+            select_clause=query.select_clause,
+            from_clause=query.from_clause,
+            where_clause=query.where_clause)
 
         return scalarized_query
 
@@ -1377,45 +3569,384 @@ class Query(DataSet):
             not contains_subqueries (bool): Whether the query doesn't contain subqueries
         """
 
-        contains_subqueries = False
+        contains_subqueries = False
+
+        for field in self.select_clause.fields:
+            if field.query:
+                contains_subqueries = True
+                break
+
+        if not contains_subqueries:
+            if isinstance(self.from_clause.from_dataset, Query):
+                contains_subqueries = True
+
+        if not contains_subqueries:
+            # FUTURE: Check if a subquery lives in the join's on_clause
+            for join_clause in self.from_clause.join_clauses:
+                if isinstance(join_clause.dataset, Query):
+                    contains_subqueries = True
+                    break
+
+        # FUTURE: Check if a subquery lives in the where_clause
+
+        return not contains_subqueries
+
+    def fuse(self, *queries):
+        """Fuses queries that share this query's from clause into one statement
+
+        The fused statement selects every query's fields plus a 0/1 flag per query for
+        whether a row meets that query's where clause, and keeps the rows that meet any
+        of them, so the from clause and its joins are read once. FusedQuery.run splits
+        the rows back into one result per query.
+
+        Args:
+            queries (Query): Other queries with the same from clause as this one
+
+        Returns:
+            fused_query (FusedQuery): The fused statement and how to split its rows
+
+        Raises:
+            Exception: If a query's from clause differs from this one's, or a query has
+                a group by or having clause, selects distinct or selects *
+        """
+
+        # FUTURE: Figure out how to fuse from clauses, meaning to merge them, keeping
+        #     tables from both and preserving logic as much as possible
+        queries = (self,) + queries
+
+        for query in queries:
+            if str(query.from_clause) != str(self.from_clause):
+                raise Exception(f'Can\'t fuse queries with different from clauses: '
+                                f'{query.from_clause}')
+
+            if query.group_by_clause or query.having_clause:
+                raise Exception('Can\'t fuse queries with group by or having clauses')
+
+            # Distinct would apply to the fused rows, not to each query's own fields
+            if query.select_clause.is_distinct:
+                raise Exception('Can\'t fuse select distinct queries')
+
+            if any(field.expression.split('.')[-1] == '*'
+                   for field in query.select_clause.fields):
+                raise Exception('Can\'t fuse queries that select *')
+
+        select_clause = SelectClause(fields=deepcopy(self.select_clause.fields))
+        where_clause = None
+
+        for query in queries[1:]:
+            select_clause.fuse(query.select_clause)
+
+        if all(query.where_clause for query in queries):
+            where_clause = deepcopy(self.where_clause)
+
+            for query in queries[1:]:
+                where_clause.fuse(query.where_clause)
+
+        field_strs = select_clause.field_names
+        field_positions = []
+        match_positions = []
+
+        for i, query in enumerate(queries):
+            predicate_str = str(query.where_clause.expression) if query.where_clause else '1 = 1'
+
+            field_positions.append([(field.output_name, field_strs.index(str(field)))
+                                    for field in query.select_clause.fields])
+            match_positions.append(len(select_clause.fields))
+            select_clause.add_field(
+                f'case when ({predicate_str}) then 1 else 0 end sqlpt_match_{i}')
+
+        fused_query = FusedQuery(
+            query=Query(select_clause=select_clause, from_clause=deepcopy(self.from_clause),
+                        where_clause=where_clause, db_conn_str=self.db_conn_str),
+            queries=list(queries),
+            field_positions=field_positions,
+            match_positions=match_positions)
+
+        return fused_query
+
+    def push_down_predicates(self):
+        """Returns a copy of the query with outer where-clause comparisons on derived
+            tables moved into those subqueries' where clauses, so they filter early
+
+        A comparison qualifies when it compares a subquery column that maps to a plain
+        column with a literal or bind parameter using a null-rejecting operator, and
+        the outer where clause is and-only. It moves into a from-clause or inner-joined
+        subquery. For a left-joined subquery it's copied, since the outer comparison
+        still has to drop the null-extended rows. Subqueries whose rows a where clause
+        can't filter early are left alone (see _accepts_pushed_down_predicates), as are
+        those with or in their own where clause. Subqueries are rewritten in turn.
+
+        Returns:
+            query (Query): The rewritten query
+        """
+
+        query = self._writable()
+        query = deepcopy(query) if query is self else query
+
+        if not query.from_clause:
+            return query
+
+        derived_tables = [(query.from_clause.from_dataset, 'inner')]
+        derived_tables += [(join_clause.dataset, join_clause.kind.lower())
+                           for join_clause in query.from_clause.join_clauses]
+
+        comparisons = list(query.where_clause.expression.comparisons if query.where_clause else [])
+
+        if any(comparison.bool_conjunction.lower() == 'or' for comparison in comparisons):
+            comparisons = []
+
+        for subquery, kind in derived_tables:
+            if (not isinstance(subquery, Query) or not subquery.alias
+                    or kind not in ('inner', 'cross', 'left')
+                    or not subquery._accepts_pushed_down_predicates()):
+                continue
+
+            inner_comparisons = (subquery.where_clause.expression.comparisons
+                                 if subquery.where_clause else [])
+
+            if any(comparison.bool_conjunction.lower() == 'or'
+                   for comparison in inner_comparisons):
+                continue
+
+            column_expressions = {
+                field.output_name.lower(): field.expression
+                for field in subquery.select_clause.fields
+                if re.fullmatch(r'[\w.]+', field.expression)}
+
+            for comparison in list(comparisons):
+                inner_comparison = self._push_down_comparison(
+                    comparison, subquery.alias, column_expressions)
+
+                if inner_comparison is None:
+                    continue
+
+                if subquery.where_clause is None:
+                    subquery.where_clause = WhereClause(expression=Expression(comparisons=[]))
+
+                if subquery.where_clause.expression.comparisons:
+                    inner_comparison.bool_conjunction = 'and'
+
+                subquery.where_clause.expression.comparisons.append(inner_comparison)
+
+                if kind != 'left':
+                    comparisons.remove(comparison)
+                    query.where_clause.expression.comparisons.remove(comparison)
+
+        query.from_clause.from_dataset = self._pushed_down(query.from_clause.from_dataset)
+
+        for join_clause in query.from_clause.join_clauses:
+            join_clause.dataset = self._pushed_down(join_clause.dataset)
+
+        query._tidy()
+
+        return query
+
+    def _accepts_pushed_down_predicates(self):
+        """Returns whether filtering the query's rows in its where clause gives the same
+            rows as filtering its result
+
+        Not when a field aggregates (with or without group by) or uses a window, which
+        see the rows a where clause would remove, nor with distinct, having, limit or
+        offset. Subquery fields are evaluated per row, so they don't count.
+        """
+
+        segments = split_clauses(self.sql_str) if self.sql_str else {}
+        field_expressions = [field.expression for field in self.select_clause.fields
+                             if not field.is_subquery]
+
+        accepts_predicates = not (
+            self.group_by_clause or self.having_clause or 'limit' in segments
+            or self.select_clause.is_distinct
+            or any(AGGREGATE_PATTERN.search(expression) for expression in field_expressions))
+
+        return accepts_predicates
+
+    @staticmethod
+    def _push_down_comparison(comparison, alias, column_expressions):
+        """Returns the comparison rewritten in a subquery's own columns, or None if it
+            can't be pushed down into the subquery"""
+
+        inner_comparison = None
+
+        if not isinstance(comparison, Comparison):
+            return None
+
+        operator = comparison.operator.lower()
+        terms = [(comparison.left_term, comparison.right_term, operator),
+                 (comparison.right_term, comparison.left_term,
+                  NULL_REJECTING_OPERATORS.get(operator))]
+
+        if operator not in NULL_REJECTING_OPERATORS or comparison.bool_sign:
+            return None
+
+        for column_term, literal_term, column_operator in terms:
+            references = split_column_references(column_term)
+
+            if (column_operator and re.fullmatch(r'[\w.]+', column_term.strip())
+                    and len(references) == 1
+                    and (references[0][0] or '').lower() == alias.lower()
+                    and references[0][1].lower() in column_expressions
+                    and LITERAL_PATTERN.fullmatch(literal_term)):
+                inner_comparison = Comparison(
+                    left_term=column_expressions[references[0][1].lower()],
+                    operator=column_operator, right_term=literal_term)
+
+                break
+
+        return inner_comparison
+
+    @staticmethod
+    def _pushed_down(dataset):
+        """Returns a subquery dataset with its own predicates pushed down"""
+
+        if isinstance(dataset, Query):
+            dataset = dataset.push_down_predicates()
+
+        return dataset
+
+    def eliminate_unused_joins(self, timed=True, params=None, **kwargs):
+        """Drops left joins that can't change the query's result
+
+        A left join can go when nothing outside its own on clause refers to its dataset
+        (found with locate_field, plus unqualified columns the catalog places in its
+        table) and its on clause equates a unique key of its table (from the catalog)
+        with columns of the other datasets, so it matches at most one row. Joins only
+        the dropped joins referred to are dropped in turn.
+
+        Args:
+            timed (bool): Run the query before and after, if any join was dropped, and
+                report the seconds each took
+            params (dict): Parameters to pass when timing, merged over kwargs; use it
+                for a parameter named like one of this method's arguments
+            kwargs (kwargs): Keyword arguments to pass as parameters when timing
+
+        Returns:
+            report (JoinEliminationReport): The dropped joins, the timings, and the
+                rewritten query (a copy; this query is left as is)
+        """
+
+        query = self._writable()
+        query = deepcopy(query) if query is self else query
+        catalog = get_schema_catalog(self.db_conn_str)
+        dropped_join_clauses = []
+        dropped = True
+
+        while dropped and query.from_clause:
+            dropped = False
+
+            for i in reversed(range(len(query.from_clause.join_clauses))):
+                join_clause = query.from_clause.join_clauses[i]
+
+                if (join_clause.kind.lower() == 'left'
+                        and not query._join_referenced(i, catalog)
+                        and query._join_matches_one_row(join_clause, catalog)):
+                    query.from_clause.remove_join_clause(join_clause)
+                    dropped_join_clauses.append(str(join_clause))
+                    dropped = True
+
+        report = JoinEliminationReport(dropped_join_clauses=dropped_join_clauses,
+                                       query=query)
+
+        if timed and dropped_join_clauses:
+            params = merge_params(params, kwargs)
+            calls = {
+                'before': lambda: self.run(cached=False, params=params),
+                'after': lambda: query.run(cached=False, params=params),
+            }
+
+            _, timings = run_timed(calls, max_workers=1)
+            report.seconds_before = timings['before']
+            report.seconds_after = timings['after']
+
+        return report
+
+    def _join_referenced(self, join_index, catalog):
+        """Returns whether anything outside a join clause's on clause refers to its
+            dataset"""
+
+        join_clause = self.from_clause.join_clauses[join_index]
+        table_name, alias = split_alias(str(join_clause.dataset))
+        qualifier = (alias or table_name).lower()
+        column_names = catalog.get_column_names(table_name) or []
+        own_prefix = ('from_clause', 'join_clauses', join_index)
+        referenced = False
+
+        for field in self.select_clause.fields:
+            if field.expression.strip() == '*':
+                referenced = True
+
+        for coordinate, term_str in self._column_terms():
+            if coordinate[:3] == own_prefix:
+                continue
+
+            for term_qualifier, column_name in split_column_references(term_str):
+                if ((term_qualifier or '').lower() == qualifier
+                        or (not term_qualifier and column_name.lower() in column_names)):
+                    referenced = True
+
+        # Subquery fields (skipped by _column_terms) can refer to it too
+        for coordinate in self.locate_field(f'{alias or table_name}.'):
+            if coordinate[:3] == own_prefix:
+                continue
+
+            node = self
+
+            for component in coordinate:
+                node = getattr(node, component) if isinstance(component, str) else node[component]
+
+            if any((term_qualifier or '').lower() == qualifier
+                   for term_qualifier, _ in split_column_references(str(node))):
+                referenced = True
+
+        return referenced
+
+    @staticmethod
+    def _join_matches_one_row(join_clause, catalog):
+        """Returns whether a join clause's on clause equates a unique key of its table
+            with columns of other datasets or literals"""
+
+        if not isinstance(join_clause.dataset, Table):
+            return False
 
-        for field in self.select_clause.fields:
-            if field.query:
-                contains_subqueries = True
-                break
+        table_name, alias = split_alias(str(join_clause.dataset))
+        qualifier = (alias or table_name).lower()
+        comparisons = join_clause.on_clause.expression.comparisons
+        bound_column_names = set()
 
-        if not contains_subqueries:
-            if isinstance(self.from_clause.from_dataset, Query):
-                contains_subqueries = True
+        if any(comparison.bool_conjunction.lower() == 'or' for comparison in comparisons):
+            return False
 
-        if not contains_subqueries:
-            # FUTURE: Check if a subquery lives in the join's on_clause
-            for join_clause in self.from_clause.join_clauses:
-                if isinstance(join_clause.dataset, Query):
-                    contains_subqueries = True
-                    break
+        for comparison in comparisons:
+            if (not isinstance(comparison, Comparison)
+                    or comparison.operator not in ('=', '==') or comparison.bool_sign):
+                continue
 
-        # FUTURE: Check if a subquery lives in the where_clause
+            for column_term, other_term in ((comparison.left_term, comparison.right_term),
+                                            (comparison.right_term, comparison.left_term)):
+                references = split_column_references(column_term)
+                other_references = split_column_references(other_term)
 
-        return not contains_subqueries
+                if (re.fullmatch(r'[\w.]+', column_term.strip())
+                        and len(references) == 1
+                        and (references[0][0] or '').lower() == qualifier
+                        and all(other_qualifier and other_qualifier.lower() != qualifier
+                                for other_qualifier, _ in other_references)):
+                    bound_column_names.add(references[0][1].lower())
 
-    def fuse(self, query):
-        """ docstring tbd """
-        # FUTURE: Figure out how to fuse from clauses, meaning to merge them, keeping
-        #     tables from both and preserving logic as much as possible
-        if self.from_clause == query.from_clause:
-            self.select_clause.fuse(query.select_clause)
-            self.where_clause.fuse(query.where_clause)
+        matches_one_row = any(set(unique_key) <= bound_column_names
+                              for unique_key in catalog.get_unique_keys(table_name))
 
-        return self
+        return matches_one_row
 
     def bind_params(self, **kwargs):
         """ docstring tbd """
+        query = self._writable()
+
         for key, value in kwargs.items():
-            bound_sql_str = self.__str__().replace(f':{key}', str(value))
-            self.__init__(bound_sql_str)
+            bound_sql_str = query.__str__().replace(f':{key}', str(value))
+            query.__init__(bound_sql_str, db_conn_str=query.db_conn_str, alias=query.alias)
 
-        return self
+        return query
 
     def format_sql(self):
         """Formats and returns sql in a human-readable format
@@ -1441,15 +3972,21 @@ class Query(DataSet):
         with open(path, 'wt') as sql_file:
             sql_file.write(self.format_sql())
 
-    def subquery_str(self):
+    def subquery_str(self, alias=False):
         """Get the subquery version of the query
         
+        Args:
+            alias (bool): Follow the parens with the query's alias, if it has one
+
         Returns:
             string (str): the subquery version of the query (wrapped with parens)
         """
 
         string = f'({self.__str__()})'
 
+        if alias and self.alias:
+            string += f' {self.alias}'
+
         return string
 
     def filter_by_subquery(self, subquery_str, operator, value):
@@ -1467,7 +4004,46 @@ class Query(DataSet):
         self.where_clause.add_comparison(comparison)
 
     # FUTURE: Make a query.is_equivalent_to instance method
-    # FUTURE: fuse()
+
+
+@dataclass
+class FusedQuery:
+    """Queries sharing a from clause fused into one statement (see Query.fuse)
+
+    field_positions holds, per query, the (name, position) of each of its fields in the
+    fused rows, and match_positions the position of its 0/1 match flag.
+    """
+    query: Query
+    queries: list = dataclass_field(repr=False)
+    field_positions: list = dataclass_field(repr=False)
+    match_positions: list = dataclass_field(repr=False)
+
+    def __str__(self):
+        return str(self.query)
+
+    def run(self, **kwargs):
+        """Runs the fused statement and splits its rows into one result per query
+
+        Args:
+            kwargs (kwargs): Keyword arguments to pass as parameters when executing;
+                every query gets the same values
+
+        Returns:
+            results (list): A QueryResult of row dictionaries per query, in order
+        """
+
+        with self.query.db_conn.connect() as db_conn:
+            rows = db_conn.execute(statement=sqltext(str(self.query)), **kwargs).fetchall()
+
+        results = []
+
+        for field_positions, match_position in zip(self.field_positions,
+                                                   self.match_positions):
+            results.append(QueryResult(
+                {name: row[position] for name, position in field_positions}
+                for row in rows if row[match_position]))
+
+        return results
 
 
 @dataclass
@@ -1490,17 +4066,28 @@ class Field:
                     if query.from_clause:
                         query.from_clause.from_dataset.db_conn_str = db_conn_str
 
-                else:
-                    query = Query(sql_str=expression, db_conn_str=db_conn_str)
-
             else:
                 query = None
 
         self.expression = expression
         self.alias = alias
-        self.query = query
         self.db_conn_str = db_conn_str
 
+        # Only subquery fields have a query, and it's parsed on first access (see
+        # __getattr__)
+        if query or not self.is_subquery:
+            self.query = query
+
+    def __getattr__(self, name):
+        # Only reached for a subquery field's query before it has been parsed
+        if name != 'query' or 'expression' not in self.__dict__:
+            raise AttributeError(name)
+
+        query = Query(sql_str=self.expression, db_conn_str=self.db_conn_str)
+        self.query = query
+
+        return query
+
     def __hash__(self):
         return hash(str(self))
 
@@ -1510,6 +4097,36 @@ class Field:
 
         return description
 
+    @property
+    def is_subquery(self):
+        """Returns whether the field's expression is a parenthesized subquery
+
+        Returns:
+            field_is_subquery (bool): Whether the expression is a (select ...) subquery
+        """
+
+        field_is_subquery = bool(self.expression) and self.expression[:7].lower() == '(select'
+
+        return field_is_subquery
+
+    @property
+    def output_name(self):
+        """Returns the name the field's column gets in a query result
+
+        Returns:
+            output_name (str): The alias, else the column name of a plain column
+                reference, else the expression itself
+        """
+
+        if self.alias:
+            output_name = self.alias
+        elif re.fullmatch(r'[\w.]+', self.expression):
+            output_name = self.expression.split('.')[-1]
+        else:
+            output_name = self.expression
+
+        return output_name
+
     # FUTURE: can_be_functionalized(self, select_clause)
     # FUTURE: functionalize()
 
@@ -1610,16 +4227,45 @@ class InsertStatement:
 
         return string
 
-    def count(self):
+    def count(self, materialize=False):
         """Returns the count related to the insert statement
-        
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead of
+                running select count(*) in the database
+
+        Returns:
+            ct (int): The count related to the insert statement
+        """
+
+        query = self._count_query()
+        ct = query.count(materialize=materialize) if query else 1
+
+        return ct
+
+    async def count_async(self, materialize=False):
+        """Returns the count related to the insert statement without blocking the
+            event loop
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead
+
         Returns:
             ct (int): The count related to the insert statement
         """
 
+        query = self._count_query()
+        ct = await query.count_async(materialize=materialize) if query else 1
+
+        return ct
+
+    def _count_query(self):
+        """Returns the query whose rows the insert statement relates to, or None for
+            a single values clause"""
+
         # TODO: Better determine between a values clause and a values-query clause
         if hasattr(self.values_clause, 'values'):
-            ct = 1
+            query = None
 
         else:
             # Return count related to a "values_query"
@@ -1632,9 +4278,7 @@ class InsertStatement:
                 from_clause=from_clause,
                 db_conn_str=dataset.db_conn_str)
 
-            ct = query.count()
-
-        return ct
+        return query
 
 
 @dataclass
@@ -1684,8 +4328,18 @@ class SetClause(ExpressionClause):
 
         token_list = []
 
+        start_appending = False
+
+        # Keep only the set keyword and its assignments out of a whole update statement
         for sql_token in sql_tokens:
-            token_list.append(sql_token)
+            if sql_token.ttype in sqlparse.tokens.Keyword and sql_token.value.lower() == 'set':
+                start_appending = True
+
+            elif isinstance(sql_token, Where):
+                break
+
+            if start_appending:
+                token_list.append(sql_token)
 
         return token_list
 
@@ -1736,13 +4390,54 @@ class UpdateStatement:
 
         return string
 
-    def count(self):
+    def count(self, materialize=False):
         """Returns the count related to the update statement
-        
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead of
+                running select count(*) in the database
+
+        Returns:
+            ct (int): The count related to the update statement
+        """
+
+        ct = self._count_query().count(materialize=materialize)
+
+        return ct
+
+    async def count_async(self, materialize=False):
+        """Returns the count related to the update statement without blocking the
+            event loop
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead
+
         Returns:
             ct (int): The count related to the update statement
         """
 
+        ct = await self._count_query().count_async(materialize=materialize)
+
+        return ct
+
+    def explain(self, **kwargs):
+        """Returns the database's plan for running the update statement
+
+        Args:
+            kwargs (kwargs): Keyword arguments to pass as parameters when explaining
+
+        Returns:
+            query_plan (QueryPlan): The plan's nodes, mapped to the updated table
+        """
+
+        dataset = Table(name=str(self.update_clause.dataset), db_conn_str=self.db_conn_str)
+        query_plan = get_query_plan(self.db_conn_str, str(self), [(dataset, None)], kwargs)
+
+        return query_plan
+
+    def _count_query(self):
+        """Returns the query selecting the rows the update statement affects"""
+
         select_clause = SelectClause('select *')
         from_clause = FromClause(f'from {self.update_clause.dataset}')
         where_clause = self.where_clause
@@ -1753,9 +4448,7 @@ class UpdateStatement:
             where_clause=where_clause,
             db_conn_str=self.db_conn_str)
 
-        ct = query.count()
-
-        return ct
+        return query
 
 
 @dataclass
@@ -1798,13 +4491,54 @@ class DeleteStatement:
         return string
 
     # FUTURE: Consider a single count() method for Select, Update, Delete statements
-    def count(self):
+    def count(self, materialize=False):
         """Returns the count related to the delete statement
-        
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead of
+                running select count(*) in the database
+
+        Returns:
+            ct (int): The count related to the delete statement
+        """
+
+        return self._count_query().count(materialize=materialize)
+
+    async def count_async(self, materialize=False):
+        """Returns the count related to the delete statement without blocking the
+            event loop
+
+        Args:
+            materialize (bool): Fetch every row and count them in Python instead
+
         Returns:
             ct (int): The count related to the delete statement
         """
 
+        return await self._count_query().count_async(materialize=materialize)
+
+    def explain(self, **kwargs):
+        """Returns the database's plan for running the delete statement
+
+        Args:
+            kwargs (kwargs): Keyword arguments to pass as parameters when explaining
+
+        Returns:
+            query_plan (QueryPlan): The plan's nodes, mapped to the statement's datasets
+                and join clauses
+        """
+
+        plan_datasets = [(self.from_clause.from_dataset, None)]
+        plan_datasets += [(join_clause.dataset, join_clause)
+                          for join_clause in self.from_clause.join_clauses]
+
+        query_plan = get_query_plan(self.db_conn_str, str(self), plan_datasets, kwargs)
+
+        return query_plan
+
+    def _count_query(self):
+        """Returns the query selecting the rows the delete statement affects"""
+
         select_clause = SelectClause('select *')
         from_clause = self.from_clause
         where_clause = self.where_clause
@@ -1815,7 +4549,253 @@ class DeleteStatement:
             where_clause=where_clause,
             db_conn_str=self.db_conn_str)
 
-        return query.count()
+        return query
+
+
+def estimate_sqlite_row_count(db_conn, table_name):
+    """Returns a table's row count from sqlite_stat1 (populated by analyze)
+
+    Args:
+        db_conn (Connection): A sqlalchemy database connection
+        table_name (str): The name of the table
+
+    Returns:
+        row_count (int): The estimated row count, or None without statistics
+    """
+
+    row_count = None
+
+    stat_table_exists = db_conn.execute(sqltext(
+        "select 1 from sqlite_master where type = 'table' and name = 'sqlite_stat1'"
+    )).scalar()
+
+    if stat_table_exists:
+        # The first number of each stat is the row count of the table or index
+        stat = db_conn.execute(
+            sqltext('select stat from sqlite_stat1 where tbl = :table_name '
+                    'order by idx is not null limit 1'),
+            {'table_name': table_name}).scalar()
+
+        if stat:
+            row_count = int(stat.split()[0])
+
+    return row_count
+
+
+def estimate_postgresql_row_count(db_conn, table_name):
+    """Returns a table's row count from pg_class.reltuples (populated by analyze)
+
+    Args:
+        db_conn (Connection): A sqlalchemy database connection
+        table_name (str): The name of the table
+
+    Returns:
+        row_count (int): The estimated row count, or None without statistics
+    """
+
+    reltuples = db_conn.execute(
+        sqltext('select reltuples from pg_class where oid = to_regclass(:table_name)'),
+        {'table_name': table_name}).scalar()
+
+    # Tables that were never analyzed report -1 (or 0 before PostgreSQL 14)
+    row_count = int(reltuples) if reltuples is not None and reltuples >= 0 else None
+
+    return row_count
+
+
+def estimate_mysql_row_count(db_conn, table_name):
+    """Returns a table's row count from information_schema.tables
+
+    Args:
+        db_conn (Connection): A sqlalchemy database connection
+        table_name (str): The name of the table
+
+    Returns:
+        row_count (int): The estimated row count, or None without statistics
+    """
+
+    table_rows = db_conn.execute(
+        sqltext('select table_rows from information_schema.tables '
+                'where table_schema = database() and table_name = :table_name'),
+        {'table_name': table_name}).scalar()
+
+    row_count = int(table_rows) if table_rows is not None else None
+
+    return row_count
+
+
+# Row-count estimators by sqlalchemy dialect name; add entries to support more backends
+ROW_COUNT_ESTIMATORS = {
+    'sqlite': estimate_sqlite_row_count,
+    'postgresql': estimate_postgresql_row_count,
+    'mysql': estimate_mysql_row_count,
+    'mariadb': estimate_mysql_row_count,
+}
+
+
+SQLITE_PLAN_STEP_PATTERN = re.compile(
+    r'^(?P<operation>SCAN|SEARCH) (?:TABLE |SUBQUERY )?(?P<table>\S+)'
+    r'(?: AS (?P<alias>\S+))?(?: USING (?P<using>.*))?$')
+SQLITE_PLAN_INDEX_PATTERN = re.compile(
+    r'(?P<covering>COVERING )?INDEX(?: (?P<index>[^\s(]+))?|(?P<primary_key>PRIMARY KEY)')
+
+
+def parse_sqlite_plan_detail(detail):
+    """Parses one detail line of sqlite's explain query plan into a plan node
+
+    Args:
+        detail (str): A detail line, e.g. "SEARCH s USING INDEX student_major (major=?)"
+
+    Returns:
+        node (PlanNode): The plan node, without children
+    """
+
+    node = PlanNode(detail=detail, kind='other')
+    step_match = SQLITE_PLAN_STEP_PATTERN.match(detail)
+
+    if step_match:
+        node.kind = step_match['operation'].lower()
+        node.table = step_match['alias'] or step_match['table']
+
+        index_match = SQLITE_PLAN_INDEX_PATTERN.search(step_match['using'] or '')
+
+        if index_match:
+            node.index = index_match['index'] or index_match['primary_key'] or 'automatic'
+            node.covering = bool(index_match['covering'])
+
+    elif detail.startswith('USE TEMP B-TREE'):
+        node.kind = 'temp_btree'
+
+    elif 'SUBQUERY' in detail or detail.startswith(('CO-ROUTINE', 'MATERIALIZE')):
+        node.kind = 'subquery'
+        node.correlated = detail.startswith('CORRELATED')
+
+    elif detail.startswith('COMPOUND'):
+        node.kind = 'compound'
+
+    return node
+
+
+def explain_sqlite_query(db_conn, sql_str, params=None):
+    """Runs sqlite's explain query plan and returns its plan tree
+
+    Args:
+        db_conn (Connection): A sqlalchemy database connection
+        sql_str (str): The statement to explain
+        params (dict): Parameters to pass when explaining
+
+    Returns:
+        query_plan (QueryPlan): The plan's root nodes
+    """
+
+    rows = db_conn.execute(sqltext(f'explain query plan {sql_str}'), params or {}).fetchall()
+
+    query_plan = QueryPlan()
+    nodes = {}
+
+    for node_id, parent_id, _, detail in rows:
+        node = parse_sqlite_plan_detail(detail)
+        nodes[node_id] = node
+
+        if parent_id in nodes:
+            nodes[parent_id].children.append(node)
+        else:
+            query_plan.append(node)
+
+    return query_plan
+
+
+def copy_sqlite_schema(db_conn, scratch_conn):
+    """Copies a sqlite database's tables, indexes, views and planner statistics (but
+        no rows) to another sqlite connection
+
+    Args:
+        db_conn (Connection): A sqlalchemy connection to the source database
+        scratch_conn (Connection): A sqlalchemy connection to an empty database
+
+    Returns:
+        None
+    """
+
+    schema_rows = db_conn.exec_driver_sql(
+        "select sql from sqlite_master where sql is not null and name not like 'sqlite_%' "
+        "and type in ('table', 'index', 'view') "
+        "order by case type when 'table' then 0 when 'index' then 1 else 2 end").fetchall()
+
+    for schema_row in schema_rows:
+        scratch_conn.exec_driver_sql(schema_row[0])
+
+    stat_rows = []
+
+    if db_conn.exec_driver_sql(
+            "select 1 from sqlite_master where name = 'sqlite_stat1'").scalar():
+        stat_rows = db_conn.exec_driver_sql('select tbl, idx, stat from sqlite_stat1').fetchall()
+
+    # Analyzing the empty copy creates sqlite_stat1, which then takes the source's
+    # statistics so the planner sees the real table sizes
+    if stat_rows:
+        scratch_conn.exec_driver_sql('analyze')
+        scratch_conn.exec_driver_sql('delete from sqlite_stat1')
+
+        for stat_row in stat_rows:
+            scratch_conn.exec_driver_sql('insert into sqlite_stat1 values (?, ?, ?)',
+                                         tuple(stat_row))
+
+        scratch_conn.exec_driver_sql('analyze sqlite_master')
+
+
+# Query-plan explainers by sqlalchemy dialect name; an explainer takes a connection, a
+# sql string and a dict of bind parameters and returns a QueryPlan. Add entries to support more
+# backends
+QUERY_PLAN_EXPLAINERS = {
+    'sqlite': explain_sqlite_query,
+}
+
+
+def get_query_plan(db_conn_str, sql_str, plan_datasets=(), params=None):
+    """Explains a statement and maps its plan nodes to the datasets they read
+
+    Args:
+        db_conn_str (str): A sqlalchemy database url
+        sql_str (str): The statement to explain
+        plan_datasets (list): (dataset, join_clause) pairs the statement reads; a node
+            is mapped by the dataset's alias or table name
+        params (dict): Parameters to pass when explaining
+
+    Returns:
+        query_plan (QueryPlan): The plan's root nodes
+
+    Raises:
+        Exception: If there's no explainer for the database's dialect
+    """
+
+    engine = engine_registry.get_engine(db_conn_str)
+    explainer = QUERY_PLAN_EXPLAINERS.get(engine.dialect.name)
+
+    if explainer is None:
+        raise Exception(f"No query plan explainer for dialect '{engine.dialect.name}'")
+
+    with engine.connect() as db_conn:
+        query_plan = explainer(db_conn, sql_str, params or {})
+
+    datasets_by_name = {}
+
+    for dataset, join_clause in plan_datasets:
+        if isinstance(dataset, Query):
+            names = [dataset.alias]
+        else:
+            table_name, alias = split_alias(str(dataset))
+            names = [alias, table_name.split('.')[-1]]
+
+        for name in names:
+            if name:
+                datasets_by_name.setdefault(name.lower(), (dataset, join_clause))
+
+    for node in query_plan.walk():
+        if node.table and node.table.lower() in datasets_by_name:
+            node.dataset, node.join_clause = datasets_by_name[node.table.lower()]
+
+    return query_plan
 
 
 def get_dataset(token, db_conn_str=None):
@@ -1826,6 +4806,11 @@ def get_dataset(token, db_conn_str=None):
         sql_str = str(token)[1:-1]
         dataset = Query(sql_str=sql_str, db_conn_str=db_conn_str)
 
+    # An aliased subquery, e.g. (select ...) t
+    elif isinstance(token, Identifier) and isinstance(token.token_first(), Parenthesis):
+        sql_str = str(token.token_first())[1:-1]
+        dataset = Query(sql_str=sql_str, db_conn_str=db_conn_str, alias=token.get_alias())
+
     else:
         dataset = Table(name=str(token), db_conn_str=db_conn_str)
 
@@ -1834,36 +4819,23 @@ def get_dataset(token, db_conn_str=None):
 
 def parse_select_clause(sql_str):
     """ docstring tbd """
-    sql_tokens = remove_whitespace(sqlparse.parse(sql_str)[0].tokens)
-
-    token_list = []
-
-    if str(sql_tokens[0]).lower() == 'select':
-        for sql_token in sql_tokens:
-            if isinstance(sql_token, Token):
-                if sql_token.value.lower() == 'from':
-                    break
-
-            elif isinstance(sql_token, Where):
-                break
-
-            token_list.append(sql_token)
+    # Split the fields with the lexer; sqlparse's identifier-list grouping grows
+    # quadratically with the number of fields
+    fields = []
 
-    fields = parse_fields_from_token_list(token_list)
+    for field_str in split_fields(sql_str):
+        field_dict = parse_field(field_str)
+        fields.append(Field(**field_dict))
 
     return fields
 
 
 def parse_field(s_str, return_type='dict', db_conn_str=None):
     """ docstring tbd """
-    regex = (
-        r'(?P<expression>\'?[\w\*]+\'?(?:\([^\)]*\))?|\([^\)]*\))[ ]?(?P<alias>\w*)')  # noqa
-    pattern = re.compile(regex)
-    match_obj = re.match(pattern, s_str)
+    expression, alias = split_alias(s_str)
 
-    expression = match_obj.group('expression')
-    alias = match_obj.group('alias')
-    query = Query(sql_str=expression, db_conn_str=db_conn_str)
+    # Field parses subquery expressions into a query only when it's first needed
+    query = None
 
     if return_type == 'dict':
         return_val = {'expression': expression, 'alias': alias, 'query': query}
@@ -1881,22 +4853,3 @@ def parse_fields(s_str):
     fields = parse_select_clause(sql_str)
 
     return fields
-
-
-def parse_fields_from_token_list(field_token_list):
-    """ docstring tbd """
-    fields = []
-
-    # FUTURE: Chain the "remove" functionality
-    for identifier in remove_whitespace(field_token_list, (';', ',')):
-
-        if str(identifier).lower() != 'select':
-            if isinstance(identifier, IdentifierList):
-                for inner_identifier in remove_whitespace(identifier, (',')):
-                    field_dict = parse_field(str(inner_identifier))
-                    fields.append(Field(**field_dict))
-            else:
-                field_dict = parse_field(str(identifier))
-                fields.append(Field(**field_dict))
-
-    return fields
@@ -1,13 +1,22 @@
-from unittest import TestCase
+import asyncio
+import importlib.util
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase, skipUnless
 
 from sqlalchemy.engine import Engine
-from sqlpt.sql import (Comparison, DataSet, DeleteClause, DeleteStatement,
+from sqlalchemy.exc import DBAPIError, NoSuchTableError
+from sqlpt.service import engine_registry, get_schema_catalog
+from sqlpt.sql import (ColumnarQueryResult, Comparison, CompactQueryResult, DataSet, DeleteClause, DeleteStatement,
                        Expression, ExpressionClause, Field, FromClause,
                        GroupByClause, HavingClause, InsertClause,
                        InsertStatement, JoinClause, OnClause, OrderByClause, Query,
-                       QueryResult, SelectClause, SetClause, Table,
+                       QueryResult, SelectClause, SetClause, Table, parse_cache, result_cache,
                        UpdateClause, UpdateStatement, ValuesClause,
-                       WhereClause)
+                       WhereClause, parse_sqlite_plan_detail)
 
 DB_CONN_STR = 'sqlite:///tests/college.db'
 
@@ -20,6 +29,234 @@ class QueryResultTestCase(TestCase):
         self.assertEqual(query_result.count(), 1)
 
 
+class CompactQueryResultTestCase(TestCase):
+    def test_compact_query_result_create(self):
+        query_result = CompactQueryResult(columns=['a', 'b'], rows=[(1, 2), (3, 4)])
+
+        self.assertEqual(query_result.count(), 2)
+        self.assertEqual(query_result[1]['b'], 4)
+        self.assertEqual(query_result[1][0], 3)
+        self.assertEqual(query_result.column('a'), [1, 3])
+        self.assertEqual(list(query_result.dicts()), [{'a': 1, 'b': 2}, {'a': 3, 'b': 4}])
+
+    def test_compact_query_result_run(self):
+        query = Query(sql_str='select subject, course_number from section',
+                      db_conn_str=DB_CONN_STR)
+        query_result = query.run(result_format='compact')
+
+        self.assertEqual(query_result.columns, ('subject', 'course_number'))
+        self.assertEqual(list(query_result.dicts()), query.run())
+
+        empty_query = Query(sql_str='select subject from section where 1 = 0',
+                            db_conn_str=DB_CONN_STR)
+        empty_query_result = empty_query.run(result_format='compact')
+
+        self.assertEqual(empty_query_result.count(), 0)
+        self.assertEqual(empty_query_result.columns, ('subject',))
+
+    def test_compact_query_result_pickle(self):
+        query = Query(sql_str='select subject, course_number from section',
+                      db_conn_str=DB_CONN_STR)
+        query_result = query.run(result_format='compact')
+        other_query_result = query.run(result_format='compact')
+
+        self.assertIs(other_query_result.row_class, query_result.row_class)
+
+        unpickled_query_result = pickle.loads(pickle.dumps(query_result))
+
+        self.assertEqual(unpickled_query_result.columns, query_result.columns)
+        self.assertEqual(list(unpickled_query_result.dicts()), list(query_result.dicts()))
+        self.assertIs(unpickled_query_result.row_class, query_result.row_class)
+
+        unpickled_row = pickle.loads(pickle.dumps(query_result[0]))
+
+        self.assertEqual(unpickled_row['subject'], query_result[0]['subject'])
+
+
+class ColumnarQueryResultTestCase(TestCase):
+    def test_columnar_query_result_create(self):
+        query_result = ColumnarQueryResult(columns=['a', 'b', 'c'])
+        query_result.extend_rows([(1, 0.5, 'x'), (2, 1.5, 'y')])
+        query_result.extend_rows([(None, 2.5, 'z')])
+
+        self.assertEqual(query_result.count(), 3)
+        self.assertEqual(query_result['a'], [1, 2, None])
+        self.assertEqual(query_result['b'].typecode, 'd')
+        self.assertEqual(list(query_result['b']), [0.5, 1.5, 2.5])
+        self.assertEqual(query_result['c'], ['x', 'y', 'z'])
+
+    def test_columnar_query_result_run(self):
+        query = Query(sql_str='select id, subject from section', db_conn_str=DB_CONN_STR)
+        query_result = query.run(result_format='columnar')
+
+        self.assertEqual(query_result.count(), 4)
+        self.assertEqual(query_result['id'].typecode, 'q')
+        self.assertEqual(list(query_result['id']), [1, 2, 3, 4])
+        self.assertEqual(query_result['subject'], ['LOGC', 'LING', 'COMP', 'LITR'])
+
+
+class ParseCacheTestCase(TestCase):
+    def setUp(self):
+        parse_cache.clear()
+        self.sql_str = ('select subject, course_number from section '
+                        'join term on section.term_id = term.id where term.code = :code')
+
+    def tearDown(self):
+        parse_cache.clear()
+
+    def test_parse_cache_hits(self):
+        Query(sql_str=self.sql_str, cached=True)
+        Query(sql_str=f'  {self.sql_str};', cached=True)
+
+        self.assertEqual(parse_cache.stats()['hits'], 1)
+        self.assertEqual(parse_cache.stats()['misses'], 1)
+
+    def test_parse_cache_eviction(self):
+        maxsize = parse_cache.maxsize
+        parse_cache.maxsize = 1
+
+        try:
+            Query(sql_str='select a from b', cached=True)
+            Query(sql_str='select c from d', cached=True)
+
+            self.assertEqual(len(parse_cache), 1)
+        finally:
+            parse_cache.maxsize = maxsize
+
+    def test_parse_cache_copy_on_write(self):
+        query_1 = Query(sql_str=self.sql_str, cached=True)
+        query_1.select_clause.add_field('section_number')
+        query_1.from_clause.remove_join_clause(query_1.from_clause.join_clauses[0])
+
+        query_2 = Query(sql_str=self.sql_str, cached=True)
+        query_2.delete_node([('where_clause', 'expression', 'comparisons', 0)])
+
+        query_3 = Query(sql_str=self.sql_str, cached=True)
+
+        self.assertEqual(parse_cache.stats()['hits'], 2)
+        self.assertEqual(str(query_1), 'select subject, course_number, section_number '
+                                       'from section where term.code = :code')
+        self.assertEqual(str(query_2), 'select subject, course_number from section '
+                                       'join term on section.term_id = term.id')
+        self.assertEqual(str(query_3), self.sql_str)
+
+    def test_parse_cache_nested_mutation(self):
+        query_1 = Query(sql_str=self.sql_str, cached=True)
+        query_1.where_clause.expression.comparisons[0].right_term = "'201940'"
+        query_1.where_clause.expression.comparisons.append(
+            Comparison(left_term='section.id', operator='>', right_term='1'))
+        query_1.from_clause.join_clauses[0].on_clause.expression.comparisons[0].left_term = 'x'
+        query_1.select_clause.fields[0].alias = 'subj'
+
+        query_2 = Query(sql_str=self.sql_str, cached=True)
+
+        self.assertEqual(parse_cache.stats()['hits'], 1)
+        self.assertEqual(str(query_2), self.sql_str)
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'college.db')
+        shutil.copy('tests/college.db', self.db_path)
+        self.db_conn_str = f'sqlite:///{self.db_path}'
+        result_cache.clear()
+
+    def tearDown(self):
+        result_cache.clear()
+        engine_registry.dispose(self.db_conn_str)
+        shutil.rmtree(self.directory)
+
+    def test_result_cache_hits(self):
+        query = Query(sql_str='select * from section where term_id = :term_id',
+                      db_conn_str=self.db_conn_str)
+
+        rows = query.run(cached=True, term_id=1)
+        rows[0]['subject'] = 'XXXX'
+        rows.append({})
+
+        cached_rows = query.run(cached=True, term_id=1)
+        cached_rows[1]['subject'] = 'YYYY'
+
+        self.assertEqual(query.run(cached=True, term_id=1), query.run(term_id=1))
+        self.assertEqual(result_cache.stats()['hits'], 2)
+        result_cache.clear()
+
+        query.run(cached=True, term_id=1)
+        query.run(cached=True, term_id=1)
+        self.assertEqual(query.count(cached=True, term_id=1), 2)
+        self.assertEqual(query.count(cached=True, term_id=2), 2)
+        self.assertEqual(query.count(cached=True, term_id=1), 2)
+        self.assertEqual(result_cache.stats()['hits'], 2)
+        self.assertEqual(result_cache.stats()['misses'], 3)
+
+    def test_result_cache_invalidated_on_change(self):
+        table = Table(name='section', db_conn_str=self.db_conn_str)
+        result_cache.enabled = True
+
+        try:
+            self.assertEqual(table.count(), 4)
+
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('delete from section where id = 4')
+
+            self.assertEqual(table.count(), 3)
+            self.assertEqual(result_cache.stats()['invalidations'], 1)
+        finally:
+            result_cache.enabled = False
+
+    def test_result_cache_invalidate(self):
+        query = Query(sql_str='select * from section', db_conn_str=self.db_conn_str)
+        query.run(cached=True)
+        query.run(result_format='compact', cached=True)
+        Query(sql_str='select 1', db_conn_str='sqlite://').run(cached=True)
+
+        result_cache.invalidate(self.db_conn_str)
+
+        self.assertEqual(len(result_cache), 1)
+        self.assertEqual(result_cache.stats()['invalidations'], 2)
+
+        result_cache.invalidate()
+
+        self.assertEqual(len(result_cache), 0)
+        self.assertEqual(result_cache.stats()['bytes'], 0)
+
+    def test_result_cache_eviction(self):
+        maxbytes = result_cache.maxbytes
+        query = Query(sql_str='select * from section', db_conn_str=self.db_conn_str)
+
+        try:
+            result_cache.maxbytes = 1
+            query.run(cached=True)
+            self.assertEqual(len(result_cache), 0)
+
+            result_cache.maxbytes = 2 ** 20
+            query.run(cached=True)
+            query.run(result_format='compact', cached=True)
+            self.assertEqual(len(result_cache), 2)
+
+            result_cache.maxbytes = result_cache.stats()['bytes'] - 1
+            query.run(result_format='columnar', cached=True)
+            self.assertLess(result_cache.stats()['bytes'], result_cache.maxbytes)
+            self.assertGreaterEqual(result_cache.stats()['evictions'], 1)
+        finally:
+            result_cache.maxbytes = maxbytes
+
+    def test_result_cache_ttl(self):
+        ttl = result_cache.ttl
+        query = Query(sql_str='select 1', db_conn_str='sqlite://')
+
+        try:
+            result_cache.ttl = 0
+            query.scalar(cached=True)
+            query.scalar(cached=True)
+
+            self.assertEqual(result_cache.stats()['hits'], 0)
+            self.assertEqual(result_cache.stats()['invalidations'], 1)
+        finally:
+            result_cache.ttl = ttl
+
+
 class DataSetTestCase(TestCase):
     def test_dataset_create(self):
         dataset = DataSet()
@@ -38,6 +275,12 @@ class TableTestCase(TestCase):
 
         self.assertEqual(type(table.db_conn), Engine)
 
+    def test_table_db_conn_shared(self):
+        table = Table(name='student_section', db_conn_str=DB_CONN_STR)
+        query = Query(sql_str='select * from term', db_conn_str=DB_CONN_STR)
+
+        self.assertIs(table.db_conn, query.db_conn)
+
     def test_table_rows_unique(self):
         table = Table(name='student_section', db_conn_str=DB_CONN_STR)
         field_names = ['student_id', 'term_id', 'section_id']
@@ -59,6 +302,53 @@ class TableTestCase(TestCase):
 
         self.assertEqual(ct, expected_ct)
 
+    def test_table_count_modes(self):
+        table = Table(name='student_section', db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(table.count(mode='exact'), 4)
+        self.assertIsNone(table.count(mode='estimate'))
+        self.assertEqual(table.count(mode='fast'), 4)
+
+        with self.assertRaises(Exception):
+            table.count(mode='guess')
+
+    def test_table_count_estimate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, 'college.db')
+            shutil.copyfile('tests/college.db', db_path)
+
+            with sqlite3.connect(db_path) as conn:
+                conn.execute('analyze')
+
+            db_conn_str = f'sqlite:///{db_path}'
+            table = Table(name='student_section', db_conn_str=db_conn_str)
+            query = Query(sql_str='select * from student where id <= 2',
+                          db_conn_str=db_conn_str)
+
+            self.assertEqual(table.count(mode='estimate'), 4)
+            self.assertEqual(query.counts(mode='estimate'), {'query': 2, 'student': 4})
+            self.assertEqual(asyncio.run(table.count_async(mode='estimate')), 4)
+
+            engine_registry.dispose(db_conn_str)
+
+    @skipUnless(importlib.util.find_spec('aiosqlite'), 'aiosqlite is not installed')
+    def test_table_count_estimate_async_engine(self):
+        # Estimates on an asyncio driver go through its async engine
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, 'college.db')
+            shutil.copyfile('tests/college.db', db_path)
+
+            with sqlite3.connect(db_path) as conn:
+                conn.execute('analyze')
+
+            async_db_conn_str = f'sqlite+aiosqlite:///{db_path}'
+            async_table = Table(name='student_section', db_conn_str=async_db_conn_str)
+
+            self.assertEqual(asyncio.run(async_table.count_async(mode='estimate')), 4)
+            self.assertEqual(asyncio.run(async_table.count_async(mode='fast')), 4)
+
+            engine_registry.dispose(async_db_conn_str)
+
     def test_table_get_column_names(self):
         table = Table(name='student_section', db_conn_str=DB_CONN_STR)
         column_names = table.get_column_names()
@@ -66,6 +356,9 @@ class TableTestCase(TestCase):
 
         self.assertEqual(column_names, expected_column_names)
 
+        with self.assertRaises(NoSuchTableError):
+            Table(name='no_such_table t', db_conn_str=DB_CONN_STR).get_column_names()
+
     def test_table_equivalence(self):
         table_1 = Table(name='student_section', db_conn_str=DB_CONN_STR)
         table_2 = Table(name='student_section', db_conn_str=DB_CONN_STR)
@@ -590,7 +883,48 @@ class QueryTestCase(TestCase):
         self.assertEqual(location, expected_locations)
 
     # FUTURE: Test delete_node
-    # FUTURE: Test locate_invalid_columns
+
+    def test_query_locate_invalid_columns(self):
+        sql_str = '''
+            select s.id,
+                   s.bogus,
+                   name
+              from student s
+              join term t
+                on s.term_id = t.id
+               and s.nope = t.id
+             where major = 'x'
+               and t.zip = 1
+             group by s.id, wat
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        actual_coordinates = query.locate_invalid_columns()
+        expected_coordinates = [
+            ('select_clause', 'fields', 1),
+            ('from_clause', 'join_clauses', 0, 'on_clause', 'expression', 'comparisons', 1,
+             'left_term'),
+            ('where_clause', 'expression', 'comparisons', 1, 'left_term'),
+            ('group_by_clause', 'field_names', 1),
+        ]
+
+        self.assertEqual(actual_coordinates, expected_coordinates)
+
+        expected_sql = ("select s.id, name from student s join term t on s.term_id = t.id "
+                        "where major = 'x' group by s.id")
+
+        self.assertEqual(str(query.crop()), expected_sql)
+
+    def test_query_locate_invalid_columns_subquery(self):
+        sql_str = 'select t.a, t.id from (select id a, major from student) t where t.major = 1'
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.from_clause.from_dataset.alias, 't')
+        self.assertEqual(str(query), sql_str)
+        self.assertEqual(query.locate_invalid_columns(), [('select_clause', 'fields', 1)])
+        self.assertEqual(query.get_column_names(), ['a', 'id'])
 
     def test_query_crop(self):
         """Test ignore dangling parameters"""
@@ -611,6 +945,68 @@ class QueryTestCase(TestCase):
 
         self.assertEqual(actual_count, expected_count)
 
+    def test_query_crop_fixed_point(self):
+        sql_str = '''
+            select s.id,
+                   s.bogus,
+                   (select name from term where section.term_id = term.id and term.zz = 1) term_name,
+                   t.code
+              from student s
+              join term t
+                on s.nope = t.id
+             where s.major = 'x'
+               and t.zip = 1
+                or s.id = 2
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        actual_sql = str(query.crop(check=True))
+        expected_sql = ("select s.id, (select name from term) term_name from student s "
+                        "where s.major = 'x' or s.id = 2")
+
+        self.assertEqual(actual_sql, expected_sql)
+
+        # Every pass shares one catalog lookup, so the schema version is read once
+        catalog = get_schema_catalog(DB_CONN_STR)
+        checks = []
+        is_current = catalog.is_current
+        catalog.is_current = lambda: checks.append(1) or is_current()
+
+        try:
+            Query(sql_str=sql_str, db_conn_str=DB_CONN_STR).crop()
+        finally:
+            del catalog.is_current
+
+        self.assertEqual(checks, [1])
+
+    def test_query_crop_check(self):
+        # The offline catalog knows columns, not functions, so only the check catches this
+        sql_str = 'select s.id, s.bogus, no_such_function(s.id) f from student s'
+        expected_sql = 'select s.id, no_such_function(s.id) f from student s'
+
+        self.assertEqual(str(Query(sql_str=sql_str, db_conn_str=DB_CONN_STR).crop()),
+                         expected_sql)
+
+        with self.assertRaises(DBAPIError) as context:
+            Query(sql_str=sql_str, db_conn_str=DB_CONN_STR).crop(check=True)
+
+        self.assertIn('no_such_function', str(context.exception.orig))
+
+    def test_query_crop_correlated_subquery(self):
+        sql_str = '''
+            select (select name from term where section.term_id = term.id and term.zz = 1) term_name
+              from section
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        cropped_query = query.crop()
+
+        self.assertEqual(cropped_query.select_clause.fields[0].expression,
+                         '(select name from term where section.term_id = term.id)')
+        self.assertEqual(cropped_query.count(), 4)
+
     # FUTURE: Test parameterize_node
 
     def test_query_parameterize(self):
@@ -668,6 +1064,16 @@ class QueryTestCase(TestCase):
 
         self.assertEqual(row_dicts, expected_row_dicts)
 
+    def test_query_iter_rows(self):
+        query = Query(sql_str='select subject from section', db_conn_str=DB_CONN_STR)
+
+        row_batches = list(query.iter_rows(batch_size=3, batches=True))
+        rows = list(query.iter_rows(batch_size=3))
+
+        self.assertEqual([len(row_batch) for row_batch in row_batches], [3, 1])
+        self.assertEqual(rows, query.run())
+        self.assertEqual(rows[0], {'subject': 'LOGC'})
+
     def test_query_count(self):
         sql_str = '''
             select subject,
@@ -681,6 +1087,19 @@ class QueryTestCase(TestCase):
 
         self.assertEqual(ct, expected_count)
 
+    def test_query_count_materialize(self):
+        sql_str = 'select term_id, count(*) from section group by term_id'
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.count(), 2)
+        self.assertEqual(query.count(materialize=True), 2)
+
+    def test_query_count_parameterized(self):
+        sql_str = 'select subject from section where term_id = :term_id'
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.count(term_id=1), 2)
+
     def test_query_counts(self):
         sql_str = '''
             select subject,
@@ -750,7 +1169,212 @@ class QueryTestCase(TestCase):
 
         self.assertEqual(actual_counts, expected_counts)
 
-    # FUTURE: Test rows_exist
+    def test_query_counts_self_join(self):
+        sql_str = '''
+            select *
+              from student s1
+              join student_section
+                on s1.id = student_section.student_id
+              join student s2
+                on s2.id = student_section.student_id
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        expected_counts = {
+            'query': 4,
+            'student s1': 4,
+            'student_section': 4,
+            'student s2': 4
+        }
+
+        for max_workers, union_all in ((1, False), (4, False), (4, True)):
+            actual_counts = query.counts(max_workers=max_workers, union_all=union_all)
+
+            self.assertEqual(actual_counts, expected_counts)
+            self.assertEqual(set(actual_counts.timings), set(expected_counts))
+
+    def test_query_profile_joins(self):
+        sql_str = '''
+            select *
+              from student s
+              join student_section ss
+                on s.id = ss.student_id
+              join section
+                on section.term_id = ss.term_id
+             where s.id = 1
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        for max_workers in (1, 3):
+            steps = query.profile_joins(max_workers=max_workers)
+
+            self.assertEqual([step.dataset for step in steps],
+                             ['student s', 'student_section ss', 'section'])
+            self.assertEqual([step.row_count for step in steps], [4, 4, 8])
+            self.assertEqual([step.fan_out for step in steps], [None, 1.0, 2.0])
+            self.assertEqual(steps[2].join_clause,
+                             'join section on section.term_id = ss.term_id')
+
+    def test_query_profile_filters(self):
+        sql_str = '''
+            select *
+              from student s
+              join student_section ss
+                on s.id = ss.student_id
+             where s.id > 1
+               and ss.term_id = :term_id
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        profiles = query.profile_filters(term_id=1)
+
+        self.assertEqual([profile.predicate for profile in profiles],
+                         ['s.id > 1', 'ss.term_id = :term_id'])
+        self.assertEqual([profile.row_count for profile in profiles], [3, 2])
+        self.assertEqual([profile.selectivity for profile in profiles], [0.75, 0.5])
+        self.assertEqual([profile.row_count_without for profile in profiles], [2, 3])
+        self.assertEqual(profiles[0].marginal_selectivity, 0.5)
+
+    def test_query_count_variants(self):
+        query = Query(sql_str='select * from section where term_id > 0',
+                      db_conn_str=DB_CONN_STR)
+
+        variants = {
+            'term_1': 'term_id = :term_id',
+            'term_2_or_logic': WhereClause("where term_id = 2 or subject = 'LOGC'"),
+            'everything': None,
+            'nothing': 'where 1 = 0',
+        }
+
+        counts = query.count_variants(variants, term_id=1)
+
+        self.assertEqual(counts, {'term_1': 2, 'term_2_or_logic': 3,
+                                  'everything': 4, 'nothing': 0})
+        self.assertEqual(query.count_variants({}), {})
+
+    def test_query_explain(self):
+        sql_str = '''
+            select (select name from term where term.id = section.term_id) term_name
+              from student s
+              join student_section ss
+                on s.id = ss.student_id
+              join section
+                on section.id = ss.section_id
+             group by s.major
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        query_plan = query.explain()
+        nodes = {node.table: node for node in query_plan.walk() if node.table}
+
+        self.assertEqual(nodes['ss'].kind, 'scan')
+        self.assertIs(nodes['ss'].join_clause, query.from_clause.join_clauses[0])
+        self.assertEqual(nodes['s'].kind, 'search')
+        self.assertIs(nodes['s'].dataset, query.from_clause.from_dataset)
+        self.assertIsNone(nodes['s'].join_clause)
+        self.assertEqual(nodes['term'].dataset.name, 'term')
+        self.assertEqual(query_plan.scans(), [nodes['ss']])
+        self.assertIn('temp_btree', [node.kind for node in query_plan.walk()])
+        self.assertTrue(any(node.correlated for node in query_plan.walk()))
+
+    def test_query_advise_indexes(self):
+        sql_str = '''
+            select *
+              from student s
+              join student_section ss
+                on ss.student_id = s.id
+             where ss.term_id = :term_id
+               and ss.section_id > 2
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        suggestions = query.advise_indexes()
+
+        self.assertEqual([(suggestion.table, suggestion.columns) for suggestion in suggestions],
+                         [('student_section', ['term_id', 'section_id'])])
+        self.assertEqual(suggestions[0].plan_before, 'SCAN ss')
+        self.assertTrue(suggestions[0].plan_after.startswith(
+            'SEARCH ss USING INDEX sqlpt_student_section_term_id_section_id'))
+        self.assertTrue(suggestions[0].turns_scan_into_search)
+
+        query = Query(sql_str='select * from term where id = 1 or code = :code',
+                      db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.advise_indexes(), [])
+
+        query = Query(sql_str='select * from term where id = 1', db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.advise_indexes(), [])
+
+    def test_parse_sqlite_plan_detail(self):
+        node = parse_sqlite_plan_detail('SEARCH TABLE student AS s USING COVERING INDEX '
+                                        'student_major (major=?)')
+
+        self.assertEqual((node.kind, node.table, node.index, node.covering),
+                         ('search', 's', 'student_major', True))
+
+        node = parse_sqlite_plan_detail('SEARCH t USING INTEGER PRIMARY KEY (rowid=?)')
+
+        self.assertEqual((node.kind, node.index), ('search', 'PRIMARY KEY'))
+
+    def test_query_rows_exist(self):
+        query = Query(sql_str='select * from section where term_id = :term_id',
+                      db_conn_str=DB_CONN_STR)
+
+        self.assertTrue(query.rows_exist(term_id=1))
+        self.assertFalse(query.rows_exist(term_id=9))
+
+    def test_query_params_named_like_options(self):
+        expected_rows = Query(sql_str='select * from section where term_id = 1',
+                              db_conn_str=DB_CONN_STR).run()
+
+        for name in ('cached', 'batch_size', 'batches', 'result_format', 'sql_str',
+                     'materialize', 'params'):
+            query = Query(sql_str=f'select * from section where term_id = :{name}',
+                          db_conn_str=DB_CONN_STR)
+
+            self.assertEqual(query.run(params={name: 1}), expected_rows)
+            self.assertEqual(list(query.iter_rows(params={name: 1})), expected_rows)
+            self.assertEqual(query.count(params={name: 1}), len(expected_rows))
+            self.assertEqual(query.count(materialize=True, params={name: 1}),
+                             len(expected_rows))
+            self.assertEqual(asyncio.run(query.count_async(params={name: 1})),
+                             len(expected_rows))
+            self.assertTrue(query.rows_exist(params={name: 1}))
+            self.assertIsNotNone(query.scalar(params={name: 1}))
+            self.assertTrue(query.explain(params={name: 1}))
+
+        # Keyword bind parameters still work, and params wins over them
+        query = Query(sql_str='select * from section where term_id = :term_id',
+                      db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(query.run(term_id=1), expected_rows)
+        self.assertEqual(query.run(params={'term_id': 1}, term_id=9), expected_rows)
+
+    def test_query_async(self):
+        query = Query(sql_str='select * from section where term_id = :term_id',
+                      db_conn_str=DB_CONN_STR)
+
+        async def probe():
+            results = await asyncio.gather(
+                query.run_async(term_id=1),
+                query.count_async(term_id=1),
+                query.rows_exist_async(term_id=9),
+                Table(name='section', db_conn_str=DB_CONN_STR).count_async())
+
+            return results
+
+        rows, ct, rows_exist_bool, table_ct = asyncio.run(probe())
+
+        self.assertEqual(rows, query.run(term_id=1))
+        self.assertEqual(ct, 2)
+        self.assertFalse(rows_exist_bool)
+        self.assertEqual(table_ct, 4)
 
     # FUTURE: Unskip this when fixed (the term Table wasn't getting the db_conn_str)
     def skip_test_query_scalarize(self):
@@ -799,50 +1423,152 @@ class QueryTestCase(TestCase):
         self.assertFalse(query.is_leaf())
         self.assertTrue(query.select_clause.fields[2].query.is_leaf())
 
-    # FUTURE: Test fuse
-    def skip_test_fuse(self):
-        sql_1 = ("select id, "
-                 "       name, "
-                 "       first_term "
-                 "  from tbl_stu "
-                 "  join tbl_stu_crs "
-                 "    on tbl_stu.id = tbl_stu_crs.stu_id "
-                 " where stu_sem = '2019-Fa' "
-                 "   and major = 'MAGC';")
-
-        sql_2 = ("select id, "
-                 "       name, "
-                 "       major "
-                 "  from tbl_stu_crs "
-                 "  join tbl_stu "
-                 "    on tbl_stu.id = tbl_stu_crs.stu_id "
-                 " where stu_sem = '2020-Sp' "
-                 "   and enrl = 1;")
-
-        sql_3 = ("select id, "
-                 "       name, "
-                 "       first_term, "
-                 "       major "
-                 "  from tbl_stu_crs "
-                 "  join tbl_stu "
-                 "    on tbl_stu.id = tbl_stu_crs.stu_id "
-                 " where major = 'MAGC' "
-                 "   and enrl = 1 "
-                 "   and stu_sem = ':stu_sem';")
-
-        query_1 = Query(sql_1)
-        query_2 = Query(sql_2)
-
-        query_3 = Query(sql_3)
-
-        # query_4 = fused(query_1, query_2)
-
-        # self.assertEqual(query_4, query_3)
-
-        parameter_fields = ['stu_sem']
-        query_1.fuse(query_2).parameterize(parameter_fields)
-
-        self.assertEqual(query_1, query_3)
+    def test_query_push_down_predicates(self):
+        sql_str = '''
+            select s.id, p.n
+              from student s
+              join (select id, name n, shoe_size * 2 double_size from person) p
+                on p.id = s.person_id
+              left
+              join (select student_id, term_id from student_section) ss
+                on ss.student_id = s.id
+             where p.n like :name
+               and p.double_size > 0
+               and ss.term_id = 1
+               and s.enrolled = 1
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        pushed_down_query = query.push_down_predicates()
+
+        self.assertEqual(str(pushed_down_query.from_clause.from_dataset), 'student s')
+        self.assertEqual(str(pushed_down_query.from_clause.join_clauses[0].dataset),
+                         'select id, name n, shoe_size * 2 double_size from person '
+                         'where name like :name')
+        self.assertEqual(str(pushed_down_query.from_clause.join_clauses[1].dataset),
+                         'select student_id, term_id from student_section where term_id = 1')
+        self.assertEqual(str(pushed_down_query.where_clause),
+                         'where p.double_size > 0 and ss.term_id = 1 and s.enrolled = 1')
+        self.assertEqual(pushed_down_query.run(name='%'), query.run(name='%'))
+        self.assertEqual(query.sql_str, sql_str)
+
+        query = Query(sql_str='select * from (select term_id, count(*) ct from section '
+                              'group by term_id) t where t.term_id = 1')
+
+        self.assertEqual(str(query.push_down_predicates()), str(query))
+
+    def test_query_push_down_predicates_unsafe_subqueries(self):
+        sql_strs = (
+            'select x.id, x.rn from (select id, row_number() over (order by id) rn '
+            'from student) x where x.id = 3',
+            'select x.ct from (select count(*) ct, term_id from section) x where x.term_id = 2',
+            'select s.id, p.ct from student s left join (select id, count(*) ct from person) p '
+            'on p.id = s.person_id where p.id = 1',
+            'select x.id from (select distinct id from student) x where x.id = 3',
+            'select x.id from (select id from student limit 2 offset 1) x where x.id = 3',
+        )
+
+        for sql_str in sql_strs:
+            query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+            pushed_down_query = query.push_down_predicates()
+
+            self.assertEqual(str(pushed_down_query), str(query))
+            self.assertEqual(pushed_down_query.run(), query.run())
+
+    def test_query_eliminate_unused_joins(self):
+        sql_str = '''
+            select s.id, s.major
+              from student s
+              left
+              join person p
+                on p.id = s.person_id
+              left
+              join student_section ss
+                on ss.student_id = s.id
+              left
+              join section
+                on section.id = ss.section_id
+               and section.term_id = :term_id
+             where s.enrolled = 1
+        '''
+
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        report = query.eliminate_unused_joins(term_id=1)
+
+        self.assertEqual(report.dropped_join_clauses,
+                         ['left join section on section.id = ss.section_id '
+                          'and section.term_id = :term_id',
+                          'left join person p on p.id = s.person_id'])
+        self.assertEqual(str(report.query),
+                         'select s.id, s.major from student s left join student_section ss '
+                         'on ss.student_id = s.id where s.enrolled = 1')
+        self.assertEqual(report.query.run(), query.run(term_id=1))
+        self.assertGreater(report.seconds_before, 0)
+        self.assertEqual(len(query.from_clause.join_clauses), 3)
+
+        for sql_str in ('select s.id, name from student s left join person p on p.id = s.person_id',
+                        'select * from student s left join person p on p.id = s.person_id',
+                        'select s.id, (select x.name from person x where x.id = p.id) name '
+                        'from student s left join person p on p.id = s.person_id'):
+            query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR)
+
+            self.assertEqual(query.eliminate_unused_joins(timed=False).dropped_join_clauses, [])
+
+    def test_query_fuse(self):
+        from_str = 'from student s join student_section ss on ss.student_id = s.id'
+
+        query_1 = Query(sql_str=f'select s.id, s.major {from_str} where ss.term_id = :term_id',
+                        db_conn_str=DB_CONN_STR)
+        query_2 = Query(sql_str=f'select ss.id, s.major m {from_str} '
+                                 'where ss.section_id in (1, 3) and s.id > 1',
+                        db_conn_str=DB_CONN_STR)
+        query_3 = Query(sql_str=f'select s.major {from_str}', db_conn_str=DB_CONN_STR)
+
+        fused_query = query_1.fuse(query_2)
+
+        self.assertEqual(str(fused_query.query.where_clause),
+                         'where (ss.term_id = :term_id) or '
+                         '(ss.section_id in (1, 3) and s.id > 1)')
+        self.assertEqual(fused_query.run(term_id=1),
+                         [query_1.run(term_id=1), query_2.run(term_id=1)])
+
+        fused_query = query_1.fuse(query_2, query_3)
+
+        self.assertIsNone(fused_query.query.where_clause)
+        self.assertEqual(fused_query.query.select_clause.field_names[:4],
+                         ['s.id', 's.major', 'ss.id', 's.major m'])
+        self.assertEqual(fused_query.run(term_id=1)[2], query_3.run())
+
+        with self.assertRaises(Exception):
+            query_1.fuse(Query(sql_str='select id from term', db_conn_str=DB_CONN_STR))
+
+        with self.assertRaises(Exception):
+            query_1.fuse(Query(sql_str=f'select distinct s.major {from_str}',
+                               db_conn_str=DB_CONN_STR))
+
+    def test_where_clause_fuse(self):
+        where_clause = WhereClause('where s.term_id = :term_id')
+        where_clause.fuse(WhereClause('where s.bogus = 1 and s.id > 1'))
+        where_clause.fuse(WhereClause('where s.id = 4'))
+
+        groups = where_clause.expression.comparisons
+
+        self.assertEqual(str(where_clause),
+                         'where (s.term_id = :term_id) or (s.bogus = 1 and s.id > 1) '
+                         'or (s.id = 4)')
+        self.assertTrue(all(isinstance(group, Expression) for group in groups))
+        self.assertEqual([group.bool_conjunction for group in groups], ['', 'or', 'or'])
+        self.assertEqual(where_clause.locate_field('s.bogus'),
+                         [('where_clause', 'expression', 'comparisons', 1, 'comparisons', 0,
+                           'left_term')])
+
+        query = Query(sql_str='select s.id from student s', db_conn_str=DB_CONN_STR)
+        query.where_clause = where_clause
+
+        self.assertEqual(str(query.crop().where_clause),
+                         'where (s.term_id = :term_id) or (s.id > 1) or (s.id = 4)')
 
     # FUTURE: Test bind_params
 
@@ -951,6 +1677,43 @@ class QueryTestCase(TestCase):
 
         self.assertEqual(str(actual_query), sql_str)
 
+    def test_query_group_by_having(self):
+        sql_str = ('select term_id, count(*) from student_section '
+                   'where section_id > 1 group by term_id having count(*) > 1')
+        query = Query(sql_str=sql_str)
+
+        self.assertEqual(query.group_by_clause.field_names, ['term_id'])
+        self.assertEqual(str(query.having_clause), 'having count(*) > 1')
+        self.assertEqual(str(query), sql_str)
+
+    def test_query_keyword_table_names(self):
+        sql_str = ('select * from section sec join term t on t.id = sec.term_id '
+                   'join section on section.term_id = t.id')
+
+        query = Query(sql_str=sql_str)
+
+        self.assertEqual(query.from_clause.from_dataset.name, 'section sec')
+        self.assertEqual(query.from_clause.join_clauses[1].dataset.name, 'section')
+        self.assertEqual(str(query), sql_str)
+
+    def test_query_lazy(self):
+        sql_str = ('select subject, course_number from section '
+                   'join term on section.term_id = term.id where term.code = :code')
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR, lazy=True)
+
+        self.assertNotIn('select_clause', query.__dict__)
+        self.assertEqual(str(query.from_clause.from_dataset), 'section')
+        self.assertNotIn('select_clause', query.__dict__)
+        self.assertEqual(str(query), sql_str)
+        self.assertEqual(query, Query(sql_str=sql_str, db_conn_str=DB_CONN_STR))
+
+    def test_query_lazy_str_after_change(self):
+        sql_str = 'select subject, course_number from section where subject = :subject'
+        query = Query(sql_str=sql_str, db_conn_str=DB_CONN_STR, lazy=True)
+        query.select_clause.remove_field('course_number')
+
+        self.assertEqual(str(query), 'select subject from section where subject = :subject')
+
     def test_complex_query(self):
         """ docstring tbd """
         sql_str = '''
@@ -1022,7 +1785,14 @@ class FieldTestCase(TestCase):
         self.assertTrue(field)
         self.assertEqual(field.expression, 'column_name')
         self.assertEqual(field.alias, 'a')
-        self.assertEqual(field.query, Query())
+        self.assertIsNone(field.query)
+
+    def test_field_subquery_parsed_lazily(self):
+        field = Field('(select fld from tbl) a')
+
+        self.assertNotIn('query', field.__dict__)
+        self.assertEqual(str(field.query), 'select fld from tbl')
+        self.assertIn('query', field.__dict__)
 
 
 # FUTURE: Test UpdateClause
@@ -1123,6 +1893,23 @@ class UpdateStatementTestCase(TestCase):
         self.assertEqual(actual_expected_row_count,
                          expected_expected_row_count)
 
+    def test_update_statement_explain(self):
+        sql_str = "update student set major = 'BIOL' where id = 4"
+
+        update_statement = UpdateStatement(s_str=sql_str, db_conn_str=DB_CONN_STR)
+        query_plan = update_statement.explain()
+
+        self.assertEqual(str(update_statement), sql_str)
+        self.assertEqual(query_plan[0].kind, 'search')
+        self.assertEqual(query_plan[0].dataset.name, 'student')
+
+    def test_update_statement_count_async(self):
+        sql_str = "update student set major = 'BIOL' where id = 4"
+
+        update_statement = UpdateStatement(s_str=sql_str, db_conn_str=DB_CONN_STR)
+
+        self.assertEqual(asyncio.run(update_statement.count_async()), 1)
+
 
 # FUTURE: Test DeleteClause
 
@@ -1157,7 +1944,6 @@ class DeleteStatementTestCase(TestCase):
 # FUTURE: Test parse_select_clause
 # FUTURE: Test parse_field
 # FUTURE: Test parse_fields
-# FUTURE: Test parse_fields_from_token_list
 
 # FUTURE: See if those last module-level functions could be static methods
 
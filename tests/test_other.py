@@ -1,9 +1,16 @@
 """ docstring tbd """
 
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 from unittest import TestCase
 
 from sqlpt import service
-from sqlpt.sql import (Field, FromClause, Query, SelectClause, WhereClause,
+from sqlpt.sql import (Field, FromClause, Query, SelectClause, Table, WhereClause,
                        parse_fields)
 
 
@@ -408,3 +415,218 @@ class ServiceTestCase(TestCase):
         expected_item_list = ['test', 'list', 'of', 'strings']
 
         self.assertEqual(actual_item_list, expected_item_list)
+
+    def test_split_fields(self):
+        """ docstring tbd """
+        sql_str = 'select a name, fn(id, dob) age, (select c from d where e = f) g from h'
+        actual_field_strs = service.split_fields(sql_str)
+        expected_field_strs = ['a name', 'fn(id, dob) age', '(select c from d where e = f) g']
+
+        self.assertEqual(actual_field_strs, expected_field_strs)
+
+    def test_split_alias(self):
+        """ docstring tbd """
+        self.assertEqual(service.split_alias('student.id'), ('student.id', ''))
+        self.assertEqual(service.split_alias('student.id sid'), ('student.id', 'sid'))
+        self.assertEqual(service.split_alias('count(*) as ct'), ('count(*)', 'ct'))
+        self.assertEqual(service.split_alias('case when a then 1 end b'),
+                         ('case when a then 1 end', 'b'))
+        self.assertEqual(service.split_alias('distinct a'), ('distinct a', ''))
+
+    def test_split_column_references(self):
+        """ docstring tbd """
+        actual_references = service.split_column_references(
+            "lower(s.name) || :suffix || 'x' || id || t.*")
+        expected_references = [('s', 'name'), (None, 'id'), ('t', '*')]
+
+        self.assertEqual(actual_references, expected_references)
+
+    def test_schema_catalog(self):
+        """ docstring tbd """
+        catalog = service.get_schema_catalog('sqlite:///tests/college.db')
+
+        self.assertIs(catalog, service.get_schema_catalog('sqlite:///tests/college.db'))
+        self.assertIn('student', catalog.table_names())
+        self.assertEqual(catalog.get_column_names('TERM'), ['id', 'code', 'name'])
+        self.assertIsNone(catalog.get_column_names('missing'))
+
+    def test_split_clauses(self):
+        """ docstring tbd """
+        sql_str = ('select a, (select b from c where d = e) f from g left join h on i = j '
+                   'where k = l group by a having count(*) > 1;')
+        actual_segments = service.split_clauses(sql_str)
+        expected_segments = {
+            'select': 'select a, (select b from c where d = e) f',
+            'from': 'from g left join h on i = j',
+            'where': 'where k = l',
+            'group by': 'group by a',
+            'having': 'having count(*) > 1',
+        }
+
+        self.assertEqual(actual_segments, expected_segments)
+
+
+class EngineRegistryTestCase(TestCase):
+    """ docstring tbd """
+    def test_engine_reused_per_db_conn_str(self):
+        """ docstring tbd """
+        registry = service.EngineRegistry()
+
+        engine_1 = registry.get_engine('sqlite:///tests/college.db')
+        engine_2 = registry.get_engine('sqlite:///tests/college.db')
+
+        self.assertIs(engine_1, engine_2)
+        self.assertEqual(registry.stats()['hits'], 1)
+        self.assertEqual(registry.stats()['engines'], 1)
+
+        registry.dispose()
+
+    def test_engine_stats_checked_out(self):
+        """ docstring tbd """
+        registry = service.EngineRegistry(pool_size=2, max_overflow=0)
+        engine = registry.get_engine('sqlite:///tests/college.db')
+
+        with engine.connect():
+            self.assertEqual(registry.stats()['checked_out'], 1)
+
+        self.assertEqual(registry.stats()['checked_out'], 0)
+
+        registry.dispose()
+
+    def test_engine_dispose(self):
+        """ docstring tbd """
+        registry = service.EngineRegistry()
+        registry.get_engine('sqlite:///tests/college.db')
+        registry.get_engine('sqlite://')
+
+        registry.dispose('sqlite://')
+        self.assertEqual(registry.stats()['engines'], 1)
+
+        registry.dispose()
+        self.assertEqual(registry.stats()['engines'], 0)
+
+
+class AsyncExecutorTestCase(TestCase):
+    """ docstring tbd """
+    def test_async_executor_bounded(self):
+        """ docstring tbd """
+        executor = service.AsyncExecutor(max_workers=2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def probe():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+
+            time.sleep(0.02)
+
+            with lock:
+                running.pop()
+
+            return True
+
+        async def run_all():
+            values = await asyncio.gather(*(executor.run(probe) for _ in range(6)))
+
+            return values
+
+        self.assertEqual(asyncio.run(run_all()), [True] * 6)
+        self.assertEqual(max(peak), 2)
+
+        executor.shutdown()
+
+    def test_is_async_db_conn_str(self):
+        """ docstring tbd """
+        self.assertFalse(service.is_async_db_conn_str('sqlite:///tests/college.db'))
+        self.assertFalse(service.is_async_db_conn_str(None))
+
+    def test_run_timed(self):
+        """ docstring tbd """
+        calls = {'a': lambda: 1, 'b': lambda: 2}
+
+        for max_workers in (1, 2):
+            values, timings = service.run_timed(calls, max_workers=max_workers)
+
+            self.assertEqual(values, {'a': 1, 'b': 2})
+            self.assertEqual(set(timings), {'a', 'b'})
+
+
+class SchemaCatalogTestCase(TestCase):
+    """ docstring tbd """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'college.db')
+        shutil.copy('tests/college.db', self.db_path)
+        self.db_conn_str = f'sqlite:///{self.db_path}'
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('create unique index term_code on term (code)')
+            conn.execute('create table enrollment (student_id int references student (id), '
+                         'section_id int references section (id), unique (student_id, section_id))')
+
+    def tearDown(self):
+        service.engine_registry.dispose(self.db_conn_str)
+        shutil.rmtree(self.directory)
+
+    def test_schema_catalog_keys(self):
+        """ docstring tbd """
+        catalog = service.SchemaCatalog(self.db_conn_str)
+
+        self.assertEqual(catalog.get_unique_keys('term'), [['id'], ['code']])
+        self.assertEqual(catalog.get_unique_keys('enrollment'),
+                         [['student_id', 'section_id']])
+        self.assertEqual([foreign_key['referred_table']
+                          for foreign_key in catalog.get_foreign_keys('enrollment')],
+                         ['section', 'student'])
+        self.assertEqual(catalog.get_indexes('term')[0]['column_names'], ['code'])
+
+    def test_schema_catalog_save_load(self):
+        """ docstring tbd """
+        path = os.path.join(self.directory, 'catalog.json')
+        catalog = service.SchemaCatalog(self.db_conn_str)
+        catalog.save(path)
+
+        loaded_catalog = service.SchemaCatalog.load(path, self.db_conn_str)
+
+        self.assertEqual(loaded_catalog.get_column_names('student'),
+                         catalog.get_column_names('student'))
+        self.assertEqual(loaded_catalog.get_unique_keys('term'), [['id'], ['code']])
+        self.assertTrue(loaded_catalog.is_current())
+
+    def test_schema_catalog_version(self):
+        """ docstring tbd """
+        catalog = service.get_schema_catalog(self.db_conn_str)
+        self.assertNotIn('major', catalog.table_names())
+        self.assertNotIn('major', Table('term', self.db_conn_str).get_column_names())
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('create table major (code varchar primary key)')
+            conn.execute('alter table term add column major varchar')
+
+        self.assertIn('major', service.get_schema_catalog(self.db_conn_str).table_names())
+        self.assertIn('major', Table('term', self.db_conn_str).get_column_names())
+        self.assertEqual(Table('major', self.db_conn_str).get_column_names(), ['code'])
+
+    def test_schema_catalog_version_checks(self):
+        """ docstring tbd """
+        catalog = service.get_schema_catalog(self.db_conn_str)
+        catalog.table_names()
+        checks = []
+        is_current = catalog.is_current
+        catalog.is_current = lambda: checks.append(1) or is_current()
+
+        for _ in range(5):
+            service.get_schema_catalog(self.db_conn_str).get_columns('term')
+
+        self.assertEqual(checks, [1] * 5)
+
+        # An opt-in version_ttl skips the check until it has passed
+        catalog.version_ttl = 60
+        checks.clear()
+
+        for _ in range(5):
+            service.get_schema_catalog(self.db_conn_str).get_columns('term')
+
+        self.assertEqual(checks, [])